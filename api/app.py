@@ -1,22 +1,37 @@
-from flask import Flask
+import logging
+from flask import Flask, jsonify
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from extensions import cache
-from config import is_production
+from config import is_production, LAZY_INIT, METRICS_ENABLED, TRUSTED_PROXY_COUNT
+from json_provider import FastJSONProvider
+from structured_logging import setup_logging
+from metrics import init_metrics
+from middleware.compression import init_compression
+from middleware.conditional import init_conditional_get
+from middleware.request_id import init_request_id
 
 from routes.health_routes import health_bp
 from routes.portfolio_app_routes import portfolio_bp
 from routes.default_routes import default_bp
 from routes.auth_routes import auth_bp
 from routes.project_users_routes import project_users_bp
+from routes.metrics_routes import metrics_bp
 
-from services.rsa_encryption_service import RSAEncryption
+from services.password_hash_service import PasswordHashUnavailable
+from services.token_revocation_service import revocation_store
 from database.database import initialize_db
 
-# Initialize the database on app startup
-initialize_db()
+# Structured logs on stdout, written off the request threads
+setup_logging()
+logger = logging.getLogger(__name__)
 
-# Initialize RSA Encryption Manager on load
-rsa_manager = RSAEncryption()
+if not LAZY_INIT:
+    # Initialize the database on app startup
+    initialize_db()
+    
+    # Load token revocations so logouts survive cold starts
+    revocation_store.load()
 
 
 def create_app():
@@ -26,6 +41,17 @@ def create_app():
     
     # Create application instance
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    
+    # Take the client IP (used for rate limiting) from X-Forwarded-For set by trusted proxies
+    if TRUSTED_PROXY_COUNT:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT)
+    
+    # Tag requests (and their log records) with X-Request-ID; logs slow requests
+    init_request_id(app)
+    
+    # Time requests; registered early so the timing covers the other after_request hooks
+    init_metrics(app)
     
     # Configure Flask for better performance with large responses
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16 MB
@@ -35,15 +61,29 @@ def create_app():
     cache.init_app(app)
     
     # Enable CORS for all routes
-    CORS(app, expose_headers=['Content-Disposition'])
+    CORS(app, expose_headers=['Content-Disposition', 'X-Request-ID'])
+    
+    # Answer If-None-Match with 304; registered before compression so it runs after it
+    init_conditional_get(app)
+    
+    # Compress responses according to Accept-Encoding
+    init_compression(app)
     
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/v1/auth')
     app.register_blueprint(health_bp, url_prefix='/api/v1')
     app.register_blueprint(portfolio_bp, url_prefix='/api/v1/portfolio')
     app.register_blueprint(project_users_bp, url_prefix='/api/v1/users')
+    if METRICS_ENABLED:
+        app.register_blueprint(metrics_bp, url_prefix='/api/v1')
     app.register_blueprint(default_bp, url_prefix='/')
     
+    # Shed load instead of queueing when password hashing is saturated
+    @app.errorhandler(PasswordHashUnavailable)
+    def handle_password_hash_unavailable(e):
+        logger.warning("Password hashing unavailable: %s", e, extra={"sample": "password_hash_unavailable"})
+        return jsonify({"error": "Service temporarily unavailable, please retry"}), 503, {"Retry-After": "1"}
+    
     return app
 
 
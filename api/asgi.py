@@ -0,0 +1,126 @@
+# ASGI entry point: an alternative to index.py for serving many concurrent requests per worker
+#
+#   cd api && uvicorn asgi:app --host 0.0.0.0 --port 5328
+#
+# Requires the packages in requirements-async.txt.
+
+import sys
+import os
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+# Add the current directory to Python path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.routing import Mount
+from werkzeug.exceptions import HTTPException
+
+from app import app as flask_app
+from config import is_production, ASGI_WSGI_THREADS, ASGI_EXECUTOR_THREADS
+from metrics import REQUEST_DURATION
+from middleware.request_id import RequestIdMiddleware, log_request
+from routes.async_routes import NATIVE_HANDLERS, init_async_routes, close_services
+from services.password_hash_service import password_hash_service
+
+# Methods served natively; HEAD, OPTIONS and the rest go to Flask
+NATIVE_METHODS = {"GET"}
+
+
+class NativeRouteDispatcher:
+    """
+    Routes each request with the Flask app's own URL map. Endpoints that have a native
+    async handler are served on the event loop; everything else (including 404s, 405s
+    and trailing-slash redirects) is passed to the Flask app, which runs in a thread pool.
+    """
+
+    def __init__(self, flask_app, handlers):
+        self.wsgi = WSGIMiddleware(flask_app, workers=ASGI_WSGI_THREADS)
+        self.url_adapter = flask_app.url_map.bind("localhost")
+        self.handlers = handlers
+
+    def _match(self, scope):
+        if scope["type"] != "http" or scope["method"] not in NATIVE_METHODS:
+            return None, None, None
+        try:
+            rule, args = self.url_adapter.match(scope["path"], scope["method"], return_rule=True)
+        except HTTPException:
+            return None, None, None
+        return rule, self.handlers.get(rule.endpoint), args
+
+    async def __call__(self, scope, receive, send):
+        rule, handler, args = self._match(scope)
+        if handler is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request = Request(scope, receive)
+        response = await handler(request, **args)
+        await response(scope, receive, send)
+
+        duration = time.perf_counter() - start
+        REQUEST_DURATION.observe(
+            duration,
+            blueprint=rule.endpoint.rpartition(".")[0],
+            route=rule.rule,
+            method=scope["method"],
+            status=response.status_code,
+        )
+        log_request(scope["method"], scope["path"], response.status_code, duration)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    Runs each call in a copy of the submitter's context (run_in_executor doesn't), so records
+    logged from executor threads keep the request ID.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Blocking calls made by the native handlers (token checks, response cache I/O, rendering the feed)
+    asyncio.get_running_loop().set_default_executor(
+        ContextThreadPoolExecutor(max_workers=ASGI_EXECUTOR_THREADS, thread_name_prefix="asgi-executor"))
+    yield
+    await close_services()
+    # Stop the Argon2 worker processes rather than leaving them to interpreter exit
+    password_hash_service.shutdown(wait=True)
+
+
+def create_asgi_app():
+    """
+    Build the ASGI application around the Flask app, serving the same routes and JSON contracts.
+    """
+    init_async_routes(flask_app)
+    dispatcher = NativeRouteDispatcher(flask_app, NATIVE_HANDLERS)
+
+    return Starlette(
+        debug=not is_production,
+        routes=[Mount("/", app=dispatcher)],
+        # Same policy as CORS(app, expose_headers=[...]) on the Flask app
+        middleware=[Middleware(RequestIdMiddleware),
+                    Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],
+                               expose_headers=["Content-Disposition", "X-Request-ID"])],
+        lifespan=lifespan,
+    )
+
+
+app = create_asgi_app()
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=5328)
@@ -0,0 +1,343 @@
+import json
+import logging
+import os
+import stat
+import time
+import zlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from flask.json.tag import TaggedJSONSerializer
+from flask_caching.backends.base import BaseCache
+
+logger = logging.getLogger(__name__)
+
+# Serialized values start with a one-byte format marker
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_entries_accessed_at ON cache_entries (accessed_at);
+CREATE INDEX IF NOT EXISTS cache_entries_expires_at ON cache_entries (expires_at);
+
+CREATE TABLE IF NOT EXISTS cache_totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_totals (id, entries, bytes) VALUES (0, 0, 0);
+
+CREATE TRIGGER IF NOT EXISTS cache_entries_insert AFTER INSERT ON cache_entries BEGIN
+    UPDATE cache_totals SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entries_delete AFTER DELETE ON cache_entries BEGIN
+    UPDATE cache_totals SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_entries_resize AFTER UPDATE OF size ON cache_entries BEGIN
+    UPDATE cache_totals SET bytes = bytes + NEW.size - OLD.size WHERE id = 0;
+END;
+"""
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache backend stored in a local SQLite file, shared by every worker process on the host
+    and surviving process restarts. Needs no external services.
+
+    - Per-entry TTL (timeout 0 means no expiry, as in cachelib).
+    - Bounded by entry count and total bytes; least recently used entries are evicted first.
+      Access times are refreshed at most every `touch_interval` seconds to keep reads cheap.
+    - Values are stored as tagged JSON (dicts, lists, tuples, bytes, strings, numbers...), never
+      pickled, and zlib-compressed above `compress_threshold` bytes. Values that can't be
+      represented are not cached.
+    - The file must live in a directory only the current user can access (created 0700 if
+      missing); a directory or file owned by someone else is refused.
+    - Connections are pooled and reused across threads.
+    """
+
+    def __init__(self, path, default_timeout=300, max_entries=1000, max_bytes=64 * 1024 * 1024,
+                 compress_threshold=1024, touch_interval=5.0, max_idle_connections=8):
+        super().__init__(default_timeout=default_timeout)
+        if not path:
+            raise ValueError("SQLiteCache needs an explicit path (CACHE_SQLITE_PATH)")
+        self.path = os.path.abspath(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compress_threshold = compress_threshold
+        self.touch_interval = touch_interval
+        self.max_idle_connections = max_idle_connections
+
+        self._serializer = _JSONSerializer()
+        self._idle = []  # connections not in use, most recently returned last
+        self._idle_pid = os.getpid()
+        self._idle_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        _check_private_file(self.path)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL;")  # persistent: recorded in the file
+            conn.executescript(_SCHEMA)
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        return cls(*args, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Connection / serialization helpers
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """
+        Borrow a connection, opening one only if none is idle. Connections inherited across
+        fork() are dropped unused: SQLite connections must not be shared between processes.
+        """
+        with self._idle_lock:
+            if self._idle_pid != os.getpid():
+                self._idle, self._idle_pid = [], os.getpid()
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+
+        try:
+            yield conn
+        except BaseException:
+            conn.close()  # may be mid-transaction or broken
+            raise
+
+        with self._idle_lock:
+            if self._idle_pid == os.getpid() and len(self._idle) < self.max_idle_connections:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _dumps(self, value) -> bytes:
+        data = self._serializer.dumps(value).encode("utf-8")
+        if len(data) >= self.compress_threshold:
+            compressed = zlib.compress(data, 6)
+            if len(compressed) < len(data):
+                return _ZLIB + compressed
+        return _RAW + data
+
+    def _loads(self, blob: bytes):
+        marker, data = blob[:1], blob[1:]
+        if marker == _ZLIB:
+            data = zlib.decompress(data)
+        elif marker != _RAW:
+            raise ValueError("Unknown cache value format")
+        return self._serializer.loads(data.decode("utf-8"))
+
+    def _expires_at(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout > 0 else None
+
+    def _count(self, stat: str, n: int = 1):
+        with self._stats_lock:
+            self._stats[stat] += n
+
+    # ------------------------------------------------------------------
+    # cachelib API
+    # ------------------------------------------------------------------
+
+    def get(self, key):
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at, accessed_at FROM cache_entries WHERE key = ?;", (key,)
+                ).fetchone()
+                if row is None:
+                    self._count("misses")
+                    return None
+
+                value, expires_at, accessed_at = row
+                if expires_at is not None and expires_at <= now:
+                    conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?;", (key, now))
+                    self._count("misses")
+                    return None
+
+                if now - accessed_at >= self.touch_interval:
+                    conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?;", (now, key))
+            self._count("hits")
+            return self._loads(value)
+        except (sqlite3.Error, ValueError, zlib.error) as e:  # ValueError covers malformed JSON
+            logger.error("Error reading cache entry: %s", e, extra={"sample": "response_cache_error"})
+            self._count("misses")
+            return None
+
+    def set(self, key, value, timeout=None):
+        try:
+            blob = self._dumps(value)
+        except TypeError as e:
+            logger.error("Value for cache key %s can't be stored: %s", key, e, extra={"sample": "response_cache_error"})
+            return False
+        try:
+            with self._connection() as conn:
+                conn.execute("""
+                    INSERT INTO cache_entries (key, value, expires_at, accessed_at, size)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (key) DO UPDATE SET
+                        value = excluded.value,
+                        expires_at = excluded.expires_at,
+                        accessed_at = excluded.accessed_at,
+                        size = excluded.size;
+                """, (key, blob, self._expires_at(timeout), time.time(), len(blob)))
+                self._enforce_limits(conn)
+            return True
+        except sqlite3.Error as e:
+            logger.error("Error writing cache entry: %s", e, extra={"sample": "response_cache_error"})
+            return False
+
+    def add(self, key, value, timeout=None):
+        try:
+            blob = self._dumps(value)
+        except TypeError as e:
+            logger.error("Value for cache key %s can't be stored: %s", key, e, extra={"sample": "response_cache_error"})
+            return False
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?;", (key, now))
+                cur = conn.execute("""
+                    INSERT INTO cache_entries (key, value, expires_at, accessed_at, size)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (key) DO NOTHING;
+                """, (key, blob, self._expires_at(timeout), now, len(blob)))
+                if cur.rowcount:
+                    self._enforce_limits(conn)
+            return cur.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error("Error writing cache entry: %s", e, extra={"sample": "response_cache_error"})
+            return False
+
+    def delete(self, key):
+        try:
+            with self._connection() as conn:
+                return conn.execute("DELETE FROM cache_entries WHERE key = ?;", (key,)).rowcount > 0
+        except sqlite3.Error as e:
+            logger.error("Error deleting cache entry: %s", e, extra={"sample": "response_cache_error"})
+            return False
+
+    def has(self, key):
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    "SELECT 1 FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?);",
+                    (key, time.time())
+                ).fetchone()
+            return row is not None
+        except sqlite3.Error:
+            return False
+
+    def clear(self):
+        try:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM cache_entries;")
+            return True
+        except sqlite3.Error as e:
+            logger.error("Error clearing cache: %s", e)
+            return False
+
+    # ------------------------------------------------------------------
+    # Size bounds
+    # ------------------------------------------------------------------
+
+    def _enforce_limits(self, conn):
+        """
+        Drop expired entries, then least recently used ones, until both bounds hold.
+        Evicts down to 90% of each bound so that eviction doesn't run on every write.
+        """
+        entries, size = conn.execute("SELECT entries, bytes FROM cache_totals WHERE id = 0;").fetchone()
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?;", (time.time(),))
+
+        target_entries = int(self.max_entries * 0.9)
+        target_bytes = int(self.max_bytes * 0.9)
+        while True:
+            entries, size = conn.execute("SELECT entries, bytes FROM cache_totals WHERE id = 0;").fetchone()
+            if entries <= target_entries and size <= target_bytes:
+                return
+
+            # Estimate how many rows to drop from the average entry size
+            excess = max(entries - target_entries, 0)
+            if size > target_bytes and entries:
+                excess = max(excess, -(-(size - target_bytes) * entries // size))
+            cur = conn.execute("""
+                DELETE FROM cache_entries WHERE key IN (
+                    SELECT key FROM cache_entries ORDER BY accessed_at LIMIT ?
+                );
+            """, (max(excess, 1),))
+            self._count("evictions", cur.rowcount)
+            if cur.rowcount == 0:
+                return
+
+    def stats(self) -> dict:
+        """
+        Hit/miss/eviction counters for this process plus the shared entry count and size.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        try:
+            with self._connection() as conn:
+                entries, size = conn.execute("SELECT entries, bytes FROM cache_totals WHERE id = 0;").fetchone()
+        except sqlite3.Error:
+            entries, size = None, None
+        return {**stats, "entries": entries, "bytes": size,
+                "max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+
+class _JSONSerializer(TaggedJSONSerializer):
+    """
+    Flask's tagged JSON (as used for session cookies) on the standard json module, so it works
+    outside an app context and whatever JSON provider the app uses.
+    """
+
+    def dumps(self, value) -> str:
+        return json.dumps(self.tag(value), separators=(",", ":"), ensure_ascii=False)
+
+    def loads(self, value: str):
+        return json.loads(value, object_hook=self.untag)
+
+
+def _check_private_file(path: str):
+    """
+    Make sure the cache file can't be planted or read by other local users: its directory is
+    created 0700 if missing, and must be a real directory owned by this user with no group or
+    other access; an existing file must be a regular file owned by this user. The file is
+    created 0600. Raises PermissionError otherwise.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, 0o700, exist_ok=True)
+
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"Cache directory {directory} is not a directory")
+    if hasattr(os, "geteuid"):
+        if info.st_uid != os.geteuid():
+            raise PermissionError(f"Cache directory {directory} is owned by another user")
+        if info.st_mode & 0o077:
+            raise PermissionError(f"Cache directory {directory} must not be accessible to other users (chmod 700)")
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+    try:
+        info = os.fstat(fd)
+    finally:
+        os.close(fd)
+    if not stat.S_ISREG(info.st_mode):
+        raise PermissionError(f"Cache file {path} is not a regular file")
+    if hasattr(os, "geteuid") and info.st_uid != os.geteuid():
+        raise PermissionError(f"Cache file {path} is owned by another user")
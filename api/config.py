@@ -8,6 +8,142 @@ if not os.getenv("VERCEL"):
 # Environment detection
 is_production = os.getenv("ENV") == "production" or os.getenv("VERCEL") == "1"
 
+# Cold starts: defer DB schema checks and service setup until first use (default on Vercel)
+LAZY_INIT = os.getenv("LAZY_INIT", "true" if os.getenv("VERCEL") else "false").lower() == "true"
+
 
 # External URLS
-DEV_TO_API_URL = "https://dev.to/api/articles/me"
\ No newline at end of file
+DEV_TO_API_URL = os.getenv("DEV_TO_API_URL", "https://dev.to/api/articles/me")
+
+# Dev.to HTTP client
+DEVTO_CONNECT_TIMEOUT = float(os.getenv("DEVTO_CONNECT_TIMEOUT", "3.05"))  # seconds
+DEVTO_READ_TIMEOUT = float(os.getenv("DEVTO_READ_TIMEOUT", "10"))  # seconds
+DEVTO_MAX_RETRIES = int(os.getenv("DEVTO_MAX_RETRIES", "3"))
+DEVTO_BACKOFF_BASE = float(os.getenv("DEVTO_BACKOFF_BASE", "0.5"))  # seconds, doubled per attempt
+DEVTO_BACKOFF_MAX = float(os.getenv("DEVTO_BACKOFF_MAX", "8"))  # seconds
+DEVTO_PER_PAGE = int(os.getenv("DEVTO_PER_PAGE", "1000"))  # dev.to allows up to 1000 articles per page
+DEVTO_MAX_PARALLEL = int(os.getenv("DEVTO_MAX_PARALLEL", "4"))  # concurrent page requests
+DEVTO_MAX_PAGES = int(os.getenv("DEVTO_MAX_PAGES", "50"))  # stop paging after this many full pages
+
+# Blog feed freshness (stale-while-revalidate)
+BLOGS_FRESH_TTL = float(os.getenv("BLOGS_FRESH_TTL", "10800"))  # seconds the feed is served without refreshing
+BLOGS_STALE_TTL = float(os.getenv("BLOGS_STALE_TTL", "86400"))  # further seconds it is served while one background refresh runs
+BLOGS_REFRESH_AHEAD = float(os.getenv("BLOGS_REFRESH_AHEAD", "0.8"))  # fraction of BLOGS_FRESH_TTL after which a popular feed is renewed (0 = off)
+BLOGS_REFRESH_AHEAD_MIN_HITS = int(os.getenv("BLOGS_REFRESH_AHEAD_MIN_HITS", "10"))  # requests per process that make the feed popular
+BLOGS_REFRESH_RETRY = float(os.getenv("BLOGS_REFRESH_RETRY", "60"))  # seconds between refresh attempts while dev.to is failing
+
+
+# Database connection pool
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))  # per process; api/server.py defaults it to SERVER_THREADS + 1 per worker
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))  # seconds to wait for a new database connection
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))  # seconds to wait for a free connection
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))  # seconds before idle connections are closed
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))  # ping connections idle longer than this
+DB_SCHEMA_RETRY_INTERVAL = float(os.getenv("DB_SCHEMA_RETRY_INTERVAL", "5"))  # seconds between schema checks while the database is unreachable
+# Prepare hot queries once per connection; disable behind transaction-pooling proxies (e.g. PgBouncer)
+DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "true").lower() == "true"
+
+
+# Project users listing
+USERS_PAGE_DEFAULT_LIMIT = int(os.getenv("USERS_PAGE_DEFAULT_LIMIT", "50"))
+USERS_PAGE_MAX_LIMIT = int(os.getenv("USERS_PAGE_MAX_LIMIT", "500"))
+USERS_STREAM_BATCH_SIZE = int(os.getenv("USERS_STREAM_BATCH_SIZE", "1000"))  # rows fetched per server-side cursor round trip
+USERS_BATCH_MAX_SIZE = int(os.getenv("USERS_BATCH_MAX_SIZE", "500"))  # max items accepted by the bulk endpoints
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))  # user records kept in memory per process
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))  # seconds; bounds staleness of user lookups (not login) after writes by other workers
+USER_CACHE_NEGATIVE_TTL = float(os.getenv("USER_CACHE_NEGATIVE_TTL", "10"))  # seconds to remember unknown usernames
+
+
+# Password hashing (Argon2id). Defaults match argon2-cffi; tune with scripts/calibrate_argon2.py
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+# Worker processes for hash/verify; 0 runs inline. Serverless runtimes lack the shared memory a process pool needs.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0" if os.getenv("VERCEL") else str(os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))  # jobs allowed to wait beyond the busy workers
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "5"))  # seconds before failing with 503
+
+
+# Auth tokens
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))  # verified tokens kept in memory per process
+TOKEN_CACHE_NEGATIVE_TTL = float(os.getenv("TOKEN_CACHE_NEGATIVE_TTL", "300"))  # seconds to remember rejected tokens
+REVOCATION_SWEEP_INTERVAL = float(os.getenv("REVOCATION_SWEEP_INTERVAL", "300"))  # seconds between purges of expired revocations
+REVOCATION_RELOAD_INTERVAL = float(os.getenv("REVOCATION_RELOAD_INTERVAL", "30"))  # seconds between syncs of revocations made by other workers
+REVOCATION_BLOOM_ENABLED = os.getenv("REVOCATION_BLOOM_ENABLED", "false").lower() == "true"
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+
+
+# Hybrid RSA + AES-GCM credential envelopes
+SESSION_KEY_CACHE_SIZE = int(os.getenv("SESSION_KEY_CACHE_SIZE", "10000"))  # unwrapped AES session keys kept per process
+SESSION_KEY_TTL = float(os.getenv("SESSION_KEY_TTL", "3600"))  # seconds a session key stays usable without re-wrapping
+PUBLIC_KEY_MAX_AGE = int(os.getenv("PUBLIC_KEY_MAX_AGE", "3600"))  # Cache-Control max-age for /auth/public_key and /auth/jwks
+
+
+# Response cache backend: "simple" (per process), "sqlite" (shared by all workers on the host) or "null"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "simple").lower()
+# Required for "sqlite": a file in a directory only the app's user can access (created 0700 if missing)
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_COMPRESS_THRESHOLD = int(os.getenv("CACHE_COMPRESS_THRESHOLD", "1024"))  # zlib-compress values at least this large
+
+# Request coalescing: callers waiting on an identical in-flight lookup give up after this many seconds
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "30"))
+
+
+# Response compression (brotli is used when the optional `brotli` package is installed)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes; smaller bodies are sent as-is
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+
+# Metrics (Prometheus text format at /api/v1/metrics)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # when set, scrapes must send "Authorization: Bearer <token>"; required in production
+
+
+# Credential endpoint throttling (per process). Rates are tokens per second.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_SWEEP_INTERVAL = float(os.getenv("RATE_LIMIT_SWEEP_INTERVAL", "60"))  # seconds between purges of idle keys
+LOGIN_IP_RATE = float(os.getenv("LOGIN_IP_RATE", "0.5"))  # 30 attempts/minute per client IP
+LOGIN_IP_BURST = float(os.getenv("LOGIN_IP_BURST", "10"))
+LOGIN_USERNAME_RATE = float(os.getenv("LOGIN_USERNAME_RATE", "0.1"))  # 6 failed attempts/minute per username and client network
+LOGIN_USERNAME_BURST = float(os.getenv("LOGIN_USERNAME_BURST", "5"))
+LOGIN_LOCKOUT_THRESHOLD = int(os.getenv("LOGIN_LOCKOUT_THRESHOLD", "5"))  # consecutive failures before lockout
+LOGIN_LOCKOUT_BASE = float(os.getenv("LOGIN_LOCKOUT_BASE", "1"))  # seconds, doubled per further failure
+LOGIN_LOCKOUT_MAX = float(os.getenv("LOGIN_LOCKOUT_MAX", "900"))  # seconds
+USER_CREATE_IP_RATE = float(os.getenv("USER_CREATE_IP_RATE", "0.2"))  # 12 creations/minute per client IP (bulk creates count each user)
+USER_CREATE_IP_BURST = float(os.getenv("USER_CREATE_IP_BURST", "5"))
+# Reverse proxies in front of the app whose X-Forwarded-For entry is trusted for the client IP
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "1" if os.getenv("VERCEL") else "0"))
+
+
+# Logging (JSON lines on stdout). LOG_LEVELS overrides the level per logger, e.g. "database=DEBUG,werkzeug=WARNING"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # "json" or "text"
+# Format and write records on a background thread; off on Vercel, which freezes the process between requests
+LOG_ASYNC = os.getenv("LOG_ASYNC", "false" if os.getenv("VERCEL") else "true").lower() == "true"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records waiting for the writer thread before new ones are dropped
+LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "10"))  # high-volume messages (e.g. invalid tokens) kept per window and key...
+LOG_SAMPLE_WINDOW = float(os.getenv("LOG_SAMPLE_WINDOW", "60"))  # ...seconds; the rest are counted and dropped
+LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", "1000"))  # requests slower than this are logged at WARNING
+
+
+# Pre-fork production server (server.py, requires requirements-server.txt)
+SERVER_BIND = os.getenv("SERVER_BIND", "0.0.0.0:5328")
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", str(os.cpu_count() or 1)))  # worker processes (threads absorb I/O waits)
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", "4"))  # request threads per worker
+SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "30"))  # seconds a busy worker may go silent before it is restarted
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))  # seconds in-flight requests get to finish on SIGTERM or reload
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "5"))  # seconds an idle keep-alive connection is held
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0"))  # replace a worker after this many requests, +-10% (0 = never)
+SERVER_WARMUP = os.getenv("SERVER_WARMUP", "true").lower() == "true"  # connect, load keys and hash once before a worker serves
+
+
+# ASGI entry point (asgi.py): routes without a native async handler run on the Flask app in threads
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "10"))
+ASGI_EXECUTOR_THREADS = int(os.getenv("ASGI_EXECUTOR_THREADS", str(min(32, (os.cpu_count() or 1) + 4))))  # token checks, response cache I/O, rendering the blog feed
@@ -1,42 +1,133 @@
+import logging
 import os
-import psycopg2
-from psycopg2 import OperationalError
+import time
+import threading
+from config import (
+    DB_POOL_MIN_SIZE,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_POOL_MAX_IDLE,
+    DB_POOL_HEALTH_CHECK_INTERVAL,
+    DB_CONNECT_TIMEOUT,
+    DB_SCHEMA_RETRY_INTERVAL,
+    LAZY_INIT,
+)
+from metrics import registry, DB_CONNECTION_DURATION
+from .pool import ConnectionPool, PoolTimeout, psycopg2
+from .migrations import migrate
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# In lazy mode the schema is checked on first database use instead of at import
+_schema_ready = not LAZY_INIT
+_schema_lock = threading.Lock()
+_schema_retry_at = 0.0  # monotonic time before which a failed check is not retried
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Return the process-wide connection pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    DATABASE_URL,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    max_idle=DB_POOL_MAX_IDLE,
+                    health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL,
+                    connect_timeout=DB_CONNECT_TIMEOUT,
+                )
+    return _pool
+
+
 def get_connection():
+    """
+    Borrow a connection from the shared pool.
+    Calling close() on the returned connection hands it back to the pool.
+    """
+    ensure_schema()
+    start = time.perf_counter()
+    conn = _checkout()
+    DB_CONNECTION_DURATION.observe(time.perf_counter() - start, outcome="ok" if conn else "error")
+    return conn
+
+
+def _checkout():
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        return conn
-    except OperationalError as e:
-        print(f"Error connecting to the database: {e}")
+        return get_pool().getconn()
+    except (PoolTimeout, psycopg2.OperationalError) as e:
+        logger.error("Error connecting to the database: %s", e, extra={"sample": "db_connect"})
         return None
-    
-def initialize_db():
-    conn = get_connection()
+
+
+def ensure_schema():
+    """
+    Run initialize_db() once per process; concurrent callers wait for it to finish.
+    After a failure it is retried at most once per DB_SCHEMA_RETRY_INTERVAL, and callers
+    in between go straight on to checkout instead of queueing for another attempt.
+    """
+    global _schema_ready, _schema_retry_at
+    if _schema_ready or time.monotonic() < _schema_retry_at:
+        return
+    with _schema_lock:
+        # Callers that waited for a failed attempt don't make their own
+        if _schema_ready or time.monotonic() < _schema_retry_at:
+            return
+        _schema_ready = initialize_db()
+        if not _schema_ready:
+            _schema_retry_at = time.monotonic() + DB_SCHEMA_RETRY_INTERVAL
+
+
+@registry.register_collector
+def _collect_pool_stats():
+    # Only report a pool that exists; scraping must not open database connections
+    if _pool is None:
+        return
+    stats = _pool.stats()
+    for key, value in stats.items():
+        if key in ("size", "in_use", "idle", "min_size", "max_size"):
+            yield f"db_pool_{key}", "gauge", f"Connection pool {key.replace('_', ' ')}.", [(f"db_pool_{key}", {}, value)]
+        else:
+            yield f"db_pool_{key}", "counter", f"Connection pool {key.replace('_', ' ')}.", [(f"db_pool_{key}_total", {}, value)]
+
+
+def close_pool():
+    """
+    Close the shared pool, e.g. on worker shutdown.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def initialize_db() -> bool:
+    """
+    Bring the schema up to date with the migrations in database/migrations.py.
+    On an up-to-date database this is a single version query.
+    Returns True if the schema is known to be current.
+    """
+    conn = _checkout()
     
     if not conn:
-        print(f"Failed to connect to the database.")
-        return
+        logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
+        return False
     
-    cur = conn.cursor()
     try:
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS project_users (
-                id SERIAL PRIMARY KEY,
-                project_name VARCHAR(100) UNIQUE NOT NULL,
-                username VARCHAR(100) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_active BOOLEAN DEFAULT TRUE
-            );
-        """)
-        
-        conn.commit()
-        print("Database initialized successfully.")
+        migrate(conn)
+        return True
     except Exception as e:
-        print(f"Error initializing the database: {e}")
-        conn.rollback()
+        logger.exception("Error initializing the database: %s", e)
+        return False
     finally:
-        cur.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
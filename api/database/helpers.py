@@ -1,10 +1,19 @@
-from .database import get_connection
+import logging
 import uuid
+import base64
 import datetime
-import jwt
-import os
-from argon2 import PasswordHasher
-from psycopg2.extras import RealDictCursor
+import hashlib
+import time
+from services.password_hash_service import password_hash_service
+from extensions import TTLCache, lazy_module
+from metrics import register_cache_stats
+from services.token_revocation_service import revocation_store
+from config import JWT_SECRET_KEY, TOKEN_CACHE_SIZE, TOKEN_CACHE_NEGATIVE_TTL
+
+# PyJWT pulls in cryptography; import it on first token operation
+jwt = lazy_module("jwt")
+
+logger = logging.getLogger(__name__)
 
 """
 -------------------
@@ -13,25 +22,42 @@ Utility functions
 """
 
 def hash_password(password: str) -> str:
-    # Generate Argon2 hash of the password
-    ph = PasswordHasher()
-    return ph.hash(password)
+    # Generate Argon2 hash of the password (raises PasswordHashUnavailable when overloaded)
+    return password_hash_service.hash(password)
+
+
+def hash_passwords(passwords: list) -> list:
+    # hash_password() for a batch, run in parallel on the hashing pool (raises PasswordHashUnavailable when overloaded)
+    return password_hash_service.hash_many(passwords)
 
 
 def verify_hashed_password(stored_hash: str, password: str) -> bool:
-    # Verify the provided password against the stored Argon2 hash
-    ph = PasswordHasher()
-    try:
-        ph.verify(stored_hash, password)
-        return True
-    except:
-        return False
+    # Verify the provided password against the stored Argon2 hash (raises PasswordHashUnavailable when overloaded)
+    return password_hash_service.verify(stored_hash, password)
+
 
 def generate_token() -> str:
     # Generate a unique token using UUID4
     return str(uuid.uuid4())
 
 
+def encode_page_cursor(created_at: datetime.datetime, row_id: int) -> str:
+    """ Encode a keyset position (created_at, id) into an opaque URL-safe cursor; created_at may be None """
+    raw = f"{created_at.isoformat() if created_at is not None else ''}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_page_cursor(cursor: str):
+    """ Decode a cursor produced by encode_page_cursor. Raises ValueError if malformed """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        created_at, row_id = raw.rsplit('|', 1)
+        return (datetime.datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
 """
 -------------------
 Token management functions
@@ -40,36 +66,95 @@ Token management functions
 
 def generate_jwt(user_id: int):
     """ Generate a JWT token for a given user_id """
-    secret_key = os.getenv("JWT_SECRET_KEY")
-    if not secret_key:
-        print("JWT_SECRET_KEY not set in environment variables.")
+    if not JWT_SECRET_KEY:
+        logger.error("JWT_SECRET_KEY not set in environment variables.", extra={"sample": "jwt_secret_missing"})
         return None
     
     payload = {
         'user_id': user_id,
+        'jti': generate_token(),
         'iat': datetime.datetime.now(datetime.timezone.utc),
         'exp': datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)  # Token valid for 24 hours
     }
     
-    token = jwt.encode(payload, secret_key, algorithm='HS256')
+    token = jwt.encode(payload, JWT_SECRET_KEY, algorithm='HS256')
     return token
 
+
+# Verified tokens keyed by SHA-256 digest: payload until `exp`, or _REJECTED for bad tokens
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE)
+register_cache_stats("tokens", _token_cache.stats)
+_REJECTED = False
+
+
 def validate_jwt(token: str):
-    """ Validate a JWT token and return the payload if valid """
-    secret_key = os.getenv("JWT_SECRET_KEY")
-    if not secret_key:
-        print("JWT_SECRET_KEY not set in environment variables.")
+    """
+    Validate a JWT token and return the payload if valid.
+    The payload is the caller's own copy; the cached one is never handed out.
+    """
+    payload = _decode_jwt(token)
+    if payload is None or revocation_store.is_revoked(get_token_id(token, payload)):
         return None
+    return payload
+
+
+def _decode_jwt(token: str):
+    """ Payload of a correctly signed, unexpired token (revocation not checked), else None """
+    if not JWT_SECRET_KEY:
+        logger.error("JWT_SECRET_KEY not set in environment variables.", extra={"sample": "jwt_secret_missing"})
+        return None
+    
+    cache_key = hashlib.sha256(token.encode('utf-8')).digest()
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached) if cached else None
     
     try:
-        payload = jwt.decode(token, secret_key, algorithms=['HS256'])
-        return payload
+        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=['HS256'])
     except jwt.ExpiredSignatureError:
-        print("Token has expired.")
+        # Stays expired, so remembering the rejection is always right
+        logger.info("Token has expired.", extra={"sample": "token_expired"})
+        _token_cache.set(cache_key, _REJECTED, TOKEN_CACHE_NEGATIVE_TTL)
+        return None
+    except jwt.ImmatureSignatureError:
+        # Not valid yet (nbf / iat ahead of our clock); it may be in a moment, so nothing is cached
+        logger.info("Token is not valid yet.", extra={"sample": "token_immature"})
         return None
     except jwt.InvalidTokenError:
-        print("Invalid token.")
+        logger.info("Invalid token.", extra={"sample": "token_invalid"})
+        _token_cache.set(cache_key, _REJECTED, TOKEN_CACHE_NEGATIVE_TTL)
+        return None
+    
+    # Cache until the token itself expires (tokens without `exp` are not cached)
+    if 'exp' in payload:
+        ttl = payload['exp'] - time.time()
+        if ttl > 0:
+            _token_cache.set(cache_key, dict(payload), ttl)
+    return payload
+
+
+def get_token_id(token: str, payload: dict) -> str:
+    """ Revocation key for a token: its `jti`, or a digest for tokens issued before `jti` was added """
+    return payload.get('jti') or hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def revoke_jwt(token: str):
+    """
+    Revoke a valid token until it expires.
+    Returns None if the token is invalid or already revoked, else whether the revocation was
+    persisted (other workers only learn about persisted ones). An unpersisted revocation still
+    applies to this process, and revoking the token again retries the write.
+    """
+    payload = _decode_jwt(token)
+    if not payload:
+        return None
+    
+    jti = get_token_id(token, payload)
+    if revocation_store.is_revoked(jti) and not revocation_store.is_pending(jti):
         return None
+    return revocation_store.revoke(jti, payload['exp'])
 
-  
 
+def get_token_cache_stats() -> dict:
+    """ Hit/miss/eviction counters of the verified-token cache """
+    return _token_cache.stats()
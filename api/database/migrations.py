@@ -0,0 +1,192 @@
+import logging
+from .pool import psycopg2
+
+logger = logging.getLogger(__name__)
+
+# Ordered schema migrations: (version, description, statements). Append new entries with the
+# next version number; never edit or reorder one that has shipped. Each migration runs in its
+# own transaction and is recorded in schema_version.
+MIGRATIONS = [
+    (1, "create project_users and revoked_tokens", [
+        # IF NOT EXISTS: databases created before migrations existed already have these
+        """
+        CREATE TABLE IF NOT EXISTS project_users (
+            id SERIAL PRIMARY KEY,
+            project_name VARCHAR(100) UNIQUE NOT NULL,
+            username VARCHAR(100) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_active BOOLEAN DEFAULT TRUE
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            jti VARCHAR(64) PRIMARY KEY,
+            expires_at TIMESTAMPTZ NOT NULL,
+            revoked_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+        """,
+    ]),
+    (2, "index project_users for listings and activity filters", [
+        # Keyset pagination and created-at ranges: ORDER BY / WHERE (created_at, id)
+        "CREATE INDEX IF NOT EXISTS project_users_created_at_id_idx ON project_users (created_at, id);",
+        # Inactive accounts are the minority, so a partial index keeps their listing cheap
+        """
+        CREATE INDEX IF NOT EXISTS project_users_inactive_created_at_idx
+        ON project_users (created_at, id) WHERE is_active = FALSE;
+        """,
+    ]),
+    (3, "index revoked_tokens expiry", [
+        # Revocation loads (expires_at > NOW()) and sweeps (expires_at <= NOW())
+        "CREATE INDEX IF NOT EXISTS revoked_tokens_expires_at_idx ON revoked_tokens (expires_at);",
+    ]),
+    (4, "drop the per-deployment schema marker", [
+        "DROP TABLE IF EXISTS schema_deployments;",
+    ]),
+    (5, "index project_users for prefix and substring search", [
+        # LIKE 'foo%' can use a btree index under any collation with the pattern operator class
+        "CREATE INDEX IF NOT EXISTS project_users_project_name_pattern_idx ON project_users (project_name text_pattern_ops);",
+        "CREATE INDEX IF NOT EXISTS project_users_username_pattern_idx ON project_users (username text_pattern_ops);",
+        # LIKE '%foo%' needs trigram indexes. pg_trgm ships with most Postgres installs, but not all
+        # of them allow CREATE EXTENSION; without it, substring search still works as a scan.
+        """
+        DO $$
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        EXCEPTION WHEN insufficient_privilege OR undefined_file OR feature_not_supported THEN
+            RAISE NOTICE 'pg_trgm unavailable, substring search will not be indexed: %', SQLERRM;
+        END
+        $$;
+        """,
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                CREATE INDEX IF NOT EXISTS project_users_project_name_trgm_idx
+                    ON project_users USING gin (project_name gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS project_users_username_trgm_idx
+                    ON project_users USING gin (username gin_trgm_ops);
+            END IF;
+        END
+        $$;
+        """,
+    ]),
+    (6, "count writes to project_users for conditional GETs", [
+        # One row, bumped once per writing statement (any worker, or straight to the database),
+        # so ETags derived from it change whenever a users response could
+        """
+        CREATE TABLE IF NOT EXISTS project_users_version (
+            id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+            version BIGINT NOT NULL
+        );
+        """,
+        "INSERT INTO project_users_version (id, version) VALUES (TRUE, 1) ON CONFLICT (id) DO NOTHING;",
+        """
+        CREATE OR REPLACE FUNCTION bump_project_users_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE project_users_version SET version = version + 1;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS project_users_version_bump ON project_users;",
+        """
+        CREATE TRIGGER project_users_version_bump
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON project_users
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_project_users_version();
+        """,
+    ]),
+    (7, "make project_users.created_at NOT NULL", [
+        # Rows from before the column had a default sort first, at the earliest known creation time
+        """
+        UPDATE project_users
+        SET created_at = (SELECT COALESCE(MIN(created_at), LOCALTIMESTAMP) FROM project_users)
+        WHERE created_at IS NULL;
+        """,
+        "ALTER TABLE project_users ALTER COLUMN created_at SET NOT NULL;",
+    ]),
+    (8, "drop the project_users write counter", [
+        # Every write statement updated its single row, serializing writers; ETags now hash the body
+        "DROP TRIGGER IF EXISTS project_users_version_bump ON project_users;",
+        "DROP FUNCTION IF EXISTS bump_project_users_version();",
+        "DROP TABLE IF EXISTS project_users_version;",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# pg_advisory_lock key shared by every process that may migrate this database
+MIGRATION_LOCK_ID = 0x64657668  # "devh"
+
+if [version for version, _, _ in MIGRATIONS] != list(range(1, len(MIGRATIONS) + 1)):
+    raise ValueError("Migration versions must be consecutive, starting at 1")
+
+
+def schema_version(conn) -> int:
+    """
+    Version recorded in schema_version (0 if the table doesn't exist yet).
+    Ends the transaction it starts.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT MAX(version) FROM schema_version;")
+        version = cur.fetchone()[0] or 0
+        conn.commit()
+        return version
+    except psycopg2.errors.UndefinedTable:
+        conn.rollback()
+        return 0
+    finally:
+        cur.close()
+
+
+def migrate(conn) -> int:
+    """
+    Apply pending migrations and return the resulting schema version.
+
+    An up-to-date database costs a single version query. Otherwise the migrations run while
+    holding a session-level advisory lock, so concurrent cold starts apply each one only once;
+    processes that waited for the lock re-read the version and usually find nothing left to do.
+    """
+    version = schema_version(conn)
+    if version >= LATEST_VERSION:
+        return version
+
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            );
+        """)
+        conn.commit()
+
+        version = schema_version(conn)
+        for migration_version, description, statements in MIGRATIONS:
+            if migration_version <= version:
+                continue
+            for statement in statements:
+                cur.execute(statement)
+            cur.execute(
+                "INSERT INTO schema_version (version, description) VALUES (%s, %s);",
+                (migration_version, description)
+            )
+            conn.commit()
+            version = migration_version
+            logger.info("Applied migration %s: %s", migration_version, description,
+                        extra={"schema_version": migration_version})
+        return version
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        try:
+            cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
+            conn.commit()
+        except psycopg2.Error:
+            # The lock goes away with the session if the connection is broken
+            conn.rollback()
+        cur.close()
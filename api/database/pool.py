@@ -0,0 +1,313 @@
+import threading
+import time
+from collections import deque
+
+from extensions import lazy_module
+
+# Imported on first connection to keep cold starts light
+psycopg2 = lazy_module("psycopg2")
+psycopg2_extensions = lazy_module("psycopg2.extensions")
+
+
+class PoolTimeout(Exception):
+    """
+    Raised when no connection could be checked out within the pool timeout.
+    """
+
+
+class PooledConnection:
+    """
+    Thin proxy around a psycopg2 connection borrowed from a ConnectionPool.
+    Behaves like the raw connection, except close() hands it back to the pool.
+    As a context manager it ends the transaction like psycopg2 (commit on success,
+    rollback on error) and then returns the connection to the pool.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    @property
+    def raw(self):
+        return self._conn
+
+    @property
+    def closed(self):
+        return self._conn is None or self._conn.closed
+
+    def close(self):
+        """
+        Return the connection to the pool instead of closing it.
+        Safe to call more than once.
+        """
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._conn is None:
+            return
+        try:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        finally:
+            self.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
+
+    - Keeps between min_size and max_size physical connections open.
+    - Idle connections above min_size are closed after max_idle seconds.
+    - Connections idle for longer than health_check_interval are pinged
+      with SELECT 1 on checkout and replaced if broken.
+    """
+
+    def __init__(self, dsn, min_size=1, max_size=10, timeout=5.0,
+                 max_idle=300.0, health_check_interval=30.0, connect_timeout=None):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size: require 0 <= min_size <= max_size and max_size >= 1")
+
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self.connect_timeout = connect_timeout  # seconds, for each new connection (None: libpq's default)
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = deque()  # (conn, returned_at), most recently returned on the right
+        self._size = 0        # physical connections owned by the pool (idle + in use)
+        self._in_use = 0
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "created": 0,
+            "closed": 0,
+            "evicted_idle": 0,
+            "failed_health_checks": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Checkout / release
+    # ------------------------------------------------------------------
+
+    def getconn(self, timeout=None):
+        """
+        Borrow a connection from the pool, wrapped in a PooledConnection.
+        Raises PoolTimeout if none becomes available within `timeout` seconds
+        and OperationalError if a new connection cannot be opened.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            conn, idle_since = self._acquire_slot(deadline)
+
+            if conn is None:
+                # A slot was reserved for a new physical connection
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._available:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._available.notify()
+                    raise
+                return PooledConnection(self, conn)
+
+            if self._is_healthy(conn, idle_since):
+                return PooledConnection(self, conn)
+
+            # Broken connection: drop it and try again with the freed slot
+            with self._available:
+                self._stats["failed_health_checks"] += 1
+            self._discard(conn)
+
+    def release(self, conn):
+        """
+        Return a raw connection to the pool. Any open transaction is rolled back
+        so the next borrower starts from a clean state.
+        """
+        if not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2_extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                pass
+
+        with self._available:
+            if self._closed or conn.closed:
+                self._in_use -= 1
+                self._size -= 1
+                reuse = False
+            else:
+                self._in_use -= 1
+                self._idle.append((conn, time.monotonic()))
+                reuse = True
+            self._available.notify()
+
+        if not reuse:
+            self._close_quietly(conn)
+
+        self._evict_idle()
+
+    def _acquire_slot(self, deadline):
+        """
+        Wait for either an idle connection or spare capacity.
+        Returns (conn, idle_since) for an idle connection, or (None, None)
+        when the caller has reserved a slot and must open a new connection.
+        """
+        with self._available:
+            waited = False
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    self._in_use += 1
+                    self._stats["checkouts"] += 1
+                    return conn, idle_since
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    self._in_use += 1
+                    self._stats["checkouts"] += 1
+                    return None, None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"Timed out waiting for a database connection ({self.max_size} in use)"
+                    )
+
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                self._available.wait(remaining)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _connect(self):
+        if self.connect_timeout:
+            conn = psycopg2.connect(self.dsn, connect_timeout=self.connect_timeout)
+        else:
+            conn = psycopg2.connect(self.dsn)
+        with self._available:
+            self._stats["created"] += 1
+        return conn
+
+    def _is_healthy(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def _discard(self, conn):
+        with self._available:
+            self._size -= 1
+            self._in_use -= 1
+            self._available.notify()
+        self._close_quietly(conn)
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._available:
+            self._stats["closed"] += 1
+
+    def _evict_idle(self):
+        """
+        Close connections that have been idle longer than max_idle, keeping at least min_size.
+        The oldest idle connections sit on the left of the deque.
+        """
+        expired = []
+        now = time.monotonic()
+        with self._available:
+            while self._idle and self._size > self.min_size:
+                conn, returned_at = self._idle[0]
+                if now - returned_at < self.max_idle:
+                    break
+                self._idle.popleft()
+                self._size -= 1
+                self._stats["evicted_idle"] += 1
+                expired.append(conn)
+
+        for conn in expired:
+            self._close_quietly(conn)
+
+    def prefill(self):
+        """
+        Open connections up to min_size. Raises the connection error if one cannot be
+        opened; the connections opened before it stay in the pool.
+        """
+        while True:
+            with self._available:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._available:
+                    self._size -= 1
+                raise
+            with self._available:
+                self._idle.appendleft((conn, time.monotonic()))
+                self._available.notify()
+
+    def close(self):
+        """
+        Close all idle connections and refuse further checkouts.
+        Connections still in use are closed when they are released.
+        """
+        with self._available:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._available.notify_all()
+
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """
+        Snapshot of pool counters.
+        """
+        with self._available:
+            return {
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._stats,
+            }
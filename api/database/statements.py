@@ -0,0 +1,118 @@
+import logging
+import re
+import threading
+import weakref
+from config import DB_PREPARED_STATEMENTS
+from .pool import psycopg2, psycopg2_extensions
+
+logger = logging.getLogger(__name__)
+
+# Hot queries, written with psycopg2 placeholders. Each is prepared once per physical
+# connection (PREPARE ... AS, with $n parameters) and then run with EXECUTE.
+STATEMENTS = {
+    "user_by_username": """
+        SELECT id, project_name, username, password_hash, created_at, is_active
+        FROM project_users WHERE username = %s
+    """,
+    "user_auth_by_username": """
+        SELECT id, password_hash, is_active FROM project_users WHERE username = %s
+    """,
+    "insert_user": """
+        INSERT INTO project_users (project_name, username, password_hash)
+        VALUES (%s, %s, %s)
+        RETURNING id, project_name, username, created_at, is_active
+    """,
+    "delete_user": """
+        DELETE FROM project_users WHERE username = %s
+    """,
+    "activate_user": """
+        UPDATE project_users SET is_active = TRUE WHERE username = %s
+    """,
+    "deactivate_user": """
+        UPDATE project_users SET is_active = FALSE WHERE username = %s
+    """,
+}
+
+_PLACEHOLDER = re.compile(r"%s")
+
+# Raw psycopg2 connection -> whether STATEMENTS are prepared on it. Entries disappear
+# with the connection, so replaced or reconnected connections are prepared afresh.
+_prepared = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+
+def _numbered(query: str) -> str:
+    counter = iter(range(1, query.count("%s") + 1))
+    return _PLACEHOLDER.sub(lambda _: f"${next(counter)}", query.strip())
+
+
+def _prepare_sql(name: str, query: str) -> str:
+    return f"PREPARE {name} AS {_numbered(query)};"
+
+
+def _execute_sql(name: str, query: str) -> str:
+    params = query.count("%s")
+    return f"EXECUTE {name} ({', '.join(['%s'] * params)});" if params else f"EXECUTE {name};"
+
+
+# DEALLOCATE ALL first, so re-preparing a connection that lost track of its statements can't clash
+_PREPARE_ALL = "\n".join(["DEALLOCATE ALL;"] + [_prepare_sql(name, query) for name, query in STATEMENTS.items()])
+_EXECUTE = {name: _execute_sql(name, query) for name, query in STATEMENTS.items()}
+_PLAIN = {name: query.strip() + ";" for name, query in STATEMENTS.items()}
+
+
+def _ensure_prepared(conn) -> bool:
+    """
+    Prepare every registered statement on `conn` in one round trip, the first time it's seen.
+    Only done outside a transaction, so the PREPAREs are committed on their own.
+    Returns False if the statements are not available on this connection.
+    """
+    with _prepared_lock:
+        state = _prepared.get(conn)
+    if state is not None:
+        return state
+
+    if conn.get_transaction_status() != psycopg2_extensions.TRANSACTION_STATUS_IDLE:
+        return False
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute(_PREPARE_ALL)
+        conn.commit()
+        state = True
+    except psycopg2.Error as e:
+        # e.g. behind a transaction-pooling proxy; fall back to plain statements on this connection
+        logger.warning("Could not prepare statements, using plain SQL: %s", e)
+        conn.rollback()
+        state = False
+
+    with _prepared_lock:
+        _prepared[conn] = state
+    return state
+
+
+def prepare_statements(conn) -> bool:
+    """
+    Prepare the registered statements on `conn` now instead of on its first use (e.g. while
+    warming a worker). Returns whether they are available on it.
+    """
+    return DB_PREPARED_STATEMENTS and _ensure_prepared(conn)
+
+
+def execute_statement(cur, name: str, params=()):
+    """
+    Run a registered statement on `cur`: as EXECUTE of the prepared statement when
+    available, otherwise as plain SQL (DB_PREPARED_STATEMENTS=false, or preparing failed).
+    Call it as the first statement of a checkout, before the transaction has started.
+    """
+    if not (DB_PREPARED_STATEMENTS and _ensure_prepared(cur.connection)):
+        cur.execute(_PLAIN[name], params)
+        return
+
+    try:
+        cur.execute(_EXECUTE[name], params)
+    except psycopg2.errors.InvalidSqlStatementName:
+        # The session lost its statements (e.g. reset by a proxy): prepare again on next checkout
+        with _prepared_lock:
+            _prepared.pop(cur.connection, None)
+        raise
@@ -1,3 +1,237 @@
+import importlib
+import threading
+import time
+import types
+from collections import OrderedDict
 from flask_caching import Cache
+from metrics import register_cache_stats, SINGLE_FLIGHT_CALLS
+from config import (
+    CACHE_BACKEND,
+    CACHE_SQLITE_PATH,
+    CACHE_MAX_ENTRIES,
+    CACHE_MAX_BYTES,
+    CACHE_COMPRESS_THRESHOLD,
+    SINGLE_FLIGHT_TIMEOUT,
+)
 
-cache = Cache(config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 300})
+
+def _cache_config(backend: str) -> dict:
+    if backend == "sqlite":
+        if not CACHE_SQLITE_PATH:
+            raise ValueError("CACHE_BACKEND=sqlite requires CACHE_SQLITE_PATH")
+        return {
+            'CACHE_TYPE': 'cache_backends.SQLiteCache',
+            'CACHE_OPTIONS': {
+                'path': CACHE_SQLITE_PATH,
+                'max_entries': CACHE_MAX_ENTRIES,
+                'max_bytes': CACHE_MAX_BYTES,
+                'compress_threshold': CACHE_COMPRESS_THRESHOLD,
+            },
+        }
+    if backend == "null":
+        return {'CACHE_TYPE': 'NullCache'}
+    return {'CACHE_TYPE': 'SimpleCache', 'CACHE_THRESHOLD': CACHE_MAX_ENTRIES}
+
+
+cache = Cache(config={**_cache_config(CACHE_BACKEND), 'CACHE_DEFAULT_TIMEOUT': 300})
+
+
+def get_cache_stats() -> dict:
+    """
+    Stats of the response cache backend, if it keeps any (the SQLite backend does).
+    """
+    backend = getattr(cache, 'cache', None)
+    stats = getattr(backend, 'stats', None)
+    return stats() if callable(stats) else {}
+
+
+register_cache_stats("response", get_cache_stats)
+
+
+class lazy_module(types.ModuleType):
+    """
+    Module placeholder that performs the real import on first attribute access.
+    Keeps heavy dependencies (cryptography, psycopg2, argon2, ...) off the cold-start path:
+
+        psycopg2 = lazy_module("psycopg2")
+        psycopg2.connect(...)  # imported here
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded in-process cache with per-entry TTL and LRU eviction.
+    Keeps hit/miss/eviction counters for observability.
+    """
+
+    def __init__(self, maxsize: int, default_ttl: float = None):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()  # key -> (value, expires_at or None); least recently used first
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key, default=None):
+        """
+        Return the cached value, or `default` if the key is absent or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return default
+
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        """
+        Store a value. `ttl` (seconds) overrides the default; None with no default means no expiry.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, **self._stats}
+
+
+asyncio = lazy_module("asyncio")
+
+
+class SingleFlightTimeout(TimeoutError):
+    """
+    Raised to a caller that waited longer than the flight's timeout for an in-flight call.
+    """
+
+
+class _LeaderCancelled(Exception):
+    """
+    Set on a coroutine flight whose leader was cancelled, so that its waiters retry the call.
+    """
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key. The first caller (the leader) runs the function;
+    callers arriving while it runs wait for it and get the same result, or the same exception.
+    Nothing is remembered once the call returns, so this complements a cache rather than replacing it.
+
+    Waiters give up after `timeout` seconds with SingleFlightTimeout; the leader carries on.
+    When a coroutine leader is cancelled, its waiters aren't: they retry, and one of them leads.
+    Threads use do(), coroutines do_async(); the two never share an in-flight call.
+    Calls are counted in single_flight_calls_total{flight="<name>"}.
+
+        user_lookups = SingleFlight("users")
+        user = user_lookups.do(username, fetch_user, username)
+    """
+
+    def __init__(self, name: str, timeout: float = SINGLE_FLIGHT_TIMEOUT):
+        self.name = name
+        self.timeout = timeout
+        self._calls = {}  # key -> _Call, for threads
+        self._futures = {}  # key -> asyncio.Future, for coroutines (one event loop)
+        self._lock = threading.Lock()
+
+    def do(self, key, f, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            SINGLE_FLIGHT_CALLS.inc(flight=self.name, result="coalesced")
+            if not call.done.wait(self.timeout):
+                SINGLE_FLIGHT_CALLS.inc(flight=self.name, result="timeout")
+                raise SingleFlightTimeout(f"{self.name}: gave up after {self.timeout}s waiting for {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        SINGLE_FLIGHT_CALLS.inc(flight=self.name, result="leader")
+        try:
+            call.result = f(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, f, *args, **kwargs):
+        future = self._futures.get(key)
+        if future is not None:
+            SINGLE_FLIGHT_CALLS.inc(flight=self.name, result="coalesced")
+            try:
+                # shield: a waiter timing out must not cancel the leader's call
+                return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                SINGLE_FLIGHT_CALLS.inc(flight=self.name, result="timeout")
+                raise SingleFlightTimeout(f"{self.name}: gave up after {self.timeout}s waiting for {key!r}") from None
+            except _LeaderCancelled:
+                return await self.do_async(key, f, *args, **kwargs)
+
+        SINGLE_FLIGHT_CALLS.inc(flight=self.name, result="leader")
+        future = self._futures[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await f(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here, so an exception nobody waited for isn't logged
+            raise
+        finally:
+            del self._futures[key]
+
+    def __len__(self):
+        return len(self._calls) + len(self._futures)
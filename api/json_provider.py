@@ -0,0 +1,55 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency; fall back to the stdlib encoder
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that encodes with orjson when it is installed and falls back to
+    Flask's stdlib-based provider otherwise (or for values orjson rejects, such as
+    integers beyond 64 bits).
+
+    Output stays compatible with the default provider: keys are sorted, and dates
+    go through Flask's default hook so they keep the RFC 822 (HTTP date) format.
+    """
+
+    _options = 0
+    if orjson is not None:
+        _options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def _encode(self, obj, indent: bool = False) -> bytes:
+        options = self._options | (orjson.OPT_INDENT_2 if indent else 0)
+        # Datetimes (via OPT_PASSTHROUGH_DATETIME) and unknown types go to Flask's default hook
+        return orjson.dumps(obj, default=self.default, option=options)
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._encode(obj).decode('utf-8')
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # Let the stdlib parser raise its usual error (and accept what it accepts, e.g. NaN)
+            return super().loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = self._encode(obj, indent=indent) + b"\n"
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,305 @@
+import logging
+import time
+import inspect
+import threading
+from bisect import bisect_left
+from functools import wraps
+from flask import g, request
+from config import METRICS_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers sub-millisecond cache hits up to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter, one series per combination of label values.
+    """
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # label values tuple -> count
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield self.name + "_total", dict(zip(self.labelnames, key)), value
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket bounds, one series per combination of label values.
+    Observations cost one bisect and a short lock; they are dropped when METRICS_ENABLED is false.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values tuple -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in series.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                yield self.name + "_bucket", {**labels, "le": _format_value(float(bound))}, cumulative
+            yield self.name + "_count", labels, cumulative
+            yield self.name + "_sum", labels, values[-1]
+
+
+class _Timer:
+    """
+    Context manager that observes the elapsed time of its block.
+    """
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Holds the process's metrics and renders them in the Prometheus text format.
+
+    Collectors are callables run at scrape time that yield (name, type, help, samples)
+    for values kept elsewhere, such as cache and pool stats.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        lines = []
+
+        def emit(name, metric_type, documentation, samples):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        for metric in metrics:
+            emit(metric.name, metric.type, metric.documentation, metric.samples())
+        for collector in collectors:
+            try:
+                for family in collector():
+                    emit(*family)
+            except Exception as e:
+                logger.exception("Collector %s failed: %s", getattr(collector, '__name__', collector), e)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("blueprint", "route", "method", "status"))
+DB_CONNECTION_DURATION = registry.histogram(
+    "db_connection_acquire_duration_seconds", "Time to borrow a connection from the pool.", ("outcome",))
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds", "ProjectUsersService query latency, connection checkout included.", ("query",))
+RSA_DECRYPT_DURATION = registry.histogram(
+    "rsa_decrypt_duration_seconds", "Credential decryption latency.", ("format",))
+PASSWORD_HASH_DURATION = registry.histogram(
+    "password_hash_duration_seconds", "Argon2 hash/verify latency, queueing included.", ("operation",))
+DEVTO_FETCH_DURATION = registry.histogram(
+    "devto_fetch_duration_seconds", "Time to fetch all articles from dev.to, retries included.", (),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+RESPONSE_CACHE_REQUESTS = registry.counter(
+    "response_cache_requests", "Cached route lookups.", ("route", "result"))
+SINGLE_FLIGHT_CALLS = registry.counter(
+    "single_flight_calls", "Coalesced lookups: leaders ran the work, coalesced calls waited for it.",
+    ("flight", "result"))
+BLOG_FEED_REQUESTS = registry.counter(
+    "blog_feed_requests", "Blog feed lookups by the state of the copy served.", ("result",))
+BLOG_FEED_REFRESHES = registry.counter(
+    "blog_feed_refreshes", "Blog feed fetches from dev.to.", ("trigger", "result"))
+LOG_RECORDS_DROPPED = registry.counter(
+    "log_records_dropped", "Log records not written: sampled out, or the writer queue was full.", ("reason",))
+
+
+# Cache name -> callable returning its stats dict (TTLCache.stats() / SQLiteCache.stats() shape)
+_cache_stats_sources = {}
+
+
+def register_cache_stats(name: str, stats):
+    """
+    Expose a cache's hit/miss/eviction counters and size under cache="<name>".
+    """
+    _cache_stats_sources[name] = stats
+
+
+@registry.register_collector
+def _collect_cache_stats():
+    snapshots = []
+    for name, stats in list(_cache_stats_sources.items()):
+        try:
+            snapshots.append((name, stats() or {}))
+        except Exception as e:
+            logger.exception("Could not read stats of cache %s: %s", name, e)
+
+    for key, metric_type, documentation in (
+        ("hits", "counter", "Cache hits."),
+        ("misses", "counter", "Cache misses (expired entries included)."),
+        ("evictions", "counter", "Entries evicted to respect the size bounds."),
+    ):
+        samples = [(f"cache_{key}_total", {"cache": name}, stats[key]) for name, stats in snapshots if key in stats]
+        yield f"cache_{key}", metric_type, documentation, samples
+
+    samples = []
+    for name, stats in snapshots:
+        entries = stats.get("size", stats.get("entries"))
+        if entries is not None:
+            samples.append(("cache_entries", {"cache": name}, entries))
+    yield "cache_entries", "gauge", "Entries currently held.", samples
+
+
+def timed(histogram: Histogram, **labels):
+    """
+    Decorator that records the duration of each call in `histogram`. Coroutines are timed until
+    they return and generators (sync or async) until exhausted. Returns the function unchanged
+    when METRICS_ENABLED is false.
+    """
+    def decorator(f):
+        if not METRICS_ENABLED:
+            return f
+
+        if inspect.iscoroutinefunction(f):
+            @wraps(f)
+            async def timed_coroutine(*args, **kwargs):
+                with histogram.time(**labels):
+                    return await f(*args, **kwargs)
+            return timed_coroutine
+
+        if inspect.isasyncgenfunction(f):
+            @wraps(f)
+            async def timed_async_generator(*args, **kwargs):
+                with histogram.time(**labels):
+                    async for item in f(*args, **kwargs):
+                        yield item
+            return timed_async_generator
+
+        if inspect.isgeneratorfunction(f):
+            @wraps(f)
+            def timed_generator(*args, **kwargs):
+                with histogram.time(**labels):
+                    yield from f(*args, **kwargs)
+            return timed_generator
+
+        @wraps(f)
+        def timed_function(*args, **kwargs):
+            with histogram.time(**labels):
+                return f(*args, **kwargs)
+        return timed_function
+    return decorator
+
+
+def _start_timer():
+    g.metrics_start = time.perf_counter()
+
+
+def _observe_request(response):
+    start = g.pop("metrics_start", None)
+    if start is not None:
+        rule = request.url_rule
+        REQUEST_DURATION.observe(
+            time.perf_counter() - start,
+            blueprint=request.blueprint or "",
+            # The rule, not the path, keeps label cardinality bounded
+            route=rule.rule if rule is not None else "unmatched",
+            method=request.method,
+            status=response.status_code,
+        )
+    return response
+
+
+def init_metrics(app):
+    """
+    Time every request on the app (no-op when METRICS_ENABLED is false).
+    """
+    if METRICS_ENABLED:
+        app.before_request(_start_timer)
+        app.after_request(_observe_request)
@@ -1,11 +1,12 @@
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, g
 from database.helpers import validate_jwt
 
 def token_required(f):
     """
     Decorator to require a valid auth token for accessing a route.
     Expects the token to be in the Authorization header as: Bearer <token>
+    On success the decoded claims are available as g.jwt_payload and g.user_id.
     """
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -34,13 +35,17 @@ def token_required(f):
                 "message": "Please provide a token after 'Bearer' in the Authorization header"
             }), 401
         
-        # Validate the token
-        if not validate_jwt(token):
+        # Validate the token (served from the verified-token cache when possible)
+        payload = validate_jwt(token)
+        if not payload:
             return jsonify({
                 "error": "Invalid or expired token",
                 "message": "Please provide a valid authentication token"
             }), 401
         
+        g.jwt_payload = payload
+        g.user_id = payload.get('user_id')
+        
         # If token is valid, proceed with the original function
         return f(*args, **kwargs)
     
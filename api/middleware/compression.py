@@ -0,0 +1,161 @@
+import gzip
+from functools import wraps
+from flask import request, make_response, current_app
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+from extensions import cache, SingleFlight
+from metrics import RESPONSE_CACHE_REQUESTS
+from config import (
+    COMPRESSION_ENABLED,
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY,
+)
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/html",
+    "text/plain",
+}
+
+# Preferred first when the client accepts several
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Coalesces concurrent misses of the same response cache entry
+response_flight = SingleFlight("response_cache")
+
+
+def negotiate_encoding(accept_encoding: str = None):
+    """
+    Pick the best content coding the client accepts, or None for identity.
+    Reads the current Flask request unless an Accept-Encoding value is given.
+    """
+    if accept_encoding is None:
+        accepted = request.accept_encodings
+    else:
+        accepted = parse_accept_header(accept_encoding, Accept)
+    for encoding in SUPPORTED_ENCODINGS:
+        if accepted[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str, best: bool = False) -> bytes:
+    """
+    Compress `data`. With best=True use the highest level, for bodies that are compressed once and served many times.
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if best else COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=9 if best else COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _is_compressible(response) -> bool:
+    return (
+        200 <= response.status_code < 300
+        and response.status_code != 204
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and "Content-Encoding" not in response.headers
+        and response.mimetype in COMPRESSIBLE_MIMETYPES
+    )
+
+
+def _apply_encoding(response, body: bytes, encoding: str):
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    # A strong ETag identifies one representation, so the encoded body needs its own
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+
+
+def compress_response(response):
+    """
+    after_request hook: compress eligible responses according to Accept-Encoding.
+    """
+    if not _is_compressible(response):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return response
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    _apply_encoding(response, compress(data, encoding), encoding)
+    return response
+
+
+def init_compression(app):
+    """
+    Register response compression on the app (no-op when COMPRESSION_ENABLED is false).
+    """
+    if COMPRESSION_ENABLED:
+        app.after_request(compress_response)
+
+
+def cached_response(timeout, key_prefix: str = "view/%s"):
+    """
+    Like cache.cached, but stores the finished response body already encoded for the
+    negotiated content coding (one cache entry per coding). Cache hits are served
+    without re-serializing JSON or re-compressing. Only 200 responses are cached.
+
+    `timeout` may be a callable, evaluated after the view, for views whose data has its own
+    freshness; when it returns less than a second the response is not cached.
+
+    Concurrent misses for the same entry run the view once: the other requests wait for it
+    (see SingleFlight) and are served a copy of its response, whatever its status.
+    200 responses carry a strong ETag of their body, for conditional_get.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            encoding = negotiate_encoding() if COMPRESSION_ENABLED else None
+            cache_key = f"{key_prefix % request.path}:{encoding or 'identity'}"
+
+            cached = cache.get(cache_key)
+            RESPONSE_CACHE_REQUESTS.inc(route=request.url_rule.rule, result="miss" if cached is None else "hit")
+            if cached is not None:
+                status, headers, body = cached
+                return current_app.response_class(body, status=status, headers=headers)
+
+            rendered = {}
+
+            def store(response):
+                ttl = int(timeout()) if callable(timeout) else timeout
+                if callable(timeout) and ttl <= 0:
+                    return
+                if encoding and _is_compressible(response) and len(response.get_data()) >= COMPRESSION_MIN_SIZE:
+                    _apply_encoding(response, compress(response.get_data(), encoding, best=True), encoding)
+                response.vary.add("Accept-Encoding")
+                cache.set(cache_key, (response.status_code, list(response.headers.items()), response.get_data()),
+                          timeout=ttl)
+
+            def render():
+                response = rendered["response"] = make_response(f(*args, **kwargs))
+                if response.is_streamed:
+                    return None
+                if response.status_code == 200:
+                    response.add_etag()  # of the identity body; encoding suffixes it
+                    store(response)
+                return response.status_code, list(response.headers.items()), response.get_data()
+
+            snapshot = response_flight.do(cache_key, render)
+            if "response" in rendered:
+                return rendered["response"]
+            if snapshot is None:
+                return make_response(f(*args, **kwargs))  # a streamed body can't be shared
+            status, headers, body = snapshot
+            return current_app.response_class(body, status=status, headers=headers)
+        return decorated
+    return decorator
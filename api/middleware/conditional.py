@@ -0,0 +1,57 @@
+from functools import wraps
+from flask import request, make_response
+
+
+def _set_cache_headers(response, private: bool):
+    # Clients may keep the response but must revalidate it; the ETag makes that cheap
+    response.cache_control.no_cache = True
+    if private:
+        response.cache_control.private = True
+        response.vary.add("Authorization")
+
+
+def conditional_get(private: bool = False, validate=None):
+    """
+    Conditional GET for a read endpoint. Responses get `Cache-Control: no-cache`, plus `private`
+    and `Vary: Authorization` on authenticated routes, and 200 responses a strong ETag: the view's
+    own (cached_response sets one), or a hash of the body.
+
+    `validate`, a callable returning an error response for a malformed request (None if it is
+    fine), runs first, so bad arguments are rejected without running the view.
+
+    The 304s come from conditional_response(), once the body (and so its ETag) is final.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if validate is not None:
+                error = validate()
+                if error is not None:
+                    response = make_response(error)
+                    _set_cache_headers(response, private)
+                    return response
+
+            response = make_response(f(*args, **kwargs))
+            _set_cache_headers(response, private)
+            if response.status_code == 200 and not response.is_streamed:
+                response.add_etag()  # keeps an ETag the view set
+            return response
+        return decorated
+    return decorator
+
+
+def conditional_response(response):
+    """
+    after_request hook: answer If-None-Match with 304 for responses that carry a strong ETag.
+    """
+    if response.status_code == 200 and not response.is_streamed and response.get_etag()[0]:
+        response.make_conditional(request)
+    return response
+
+
+def init_conditional_get(app):
+    """
+    Register conditional_response. Hooks run in reverse order of registration, so call this
+    before init_compression(): the comparison then sees the ETag of the encoded body.
+    """
+    app.after_request(conditional_response)
@@ -0,0 +1,83 @@
+from functools import wraps
+from flask import request, jsonify, make_response
+from config import RATE_LIMIT_ENABLED, USERS_BATCH_MAX_SIZE
+from metrics import registry
+from services.login_throttle_service import login_throttle
+
+# Login responses that count as a failed attempt: bad credentials or an undecryptable password
+LOGIN_FAILURE_STATUSES = {400, 401}
+
+
+def _too_many_requests(retry_after: int):
+    response = jsonify({"error": "Too many requests, please retry later"})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def _login_username():
+    data = request.get_json(silent=True)
+    username = data.get('username') if isinstance(data, dict) else None
+    return username if isinstance(username, str) else ""
+
+
+def _bulk_create_count():
+    data = request.get_json(silent=True)
+    users = data.get('users') if isinstance(data, dict) else None
+    return min(len(users), USERS_BATCH_MAX_SIZE) if isinstance(users, list) else 1
+
+
+def rate_limited(scope: str):
+    """
+    Decorator that throttles a credential endpoint before the view (and its crypto) runs.
+    Rejected requests get 429 with Retry-After.
+
+    - scope="login": per-IP bucket, a per-username-and-network bucket drawn by failed attempts,
+      and lockout after repeated failures; the view's status decides whether an attempt failed.
+    - scope="create_user": per-IP bucket.
+    - scope="bulk_create_user": the same bucket, charged one token per user in the batch.
+    """
+    if scope not in ("login", "create_user", "bulk_create_user"):
+        raise ValueError(f"Unknown rate limit scope: {scope}")
+
+    def decorator(f):
+        if not RATE_LIMIT_ENABLED:
+            return f
+
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            ip = request.remote_addr or ""
+
+            if scope in ("create_user", "bulk_create_user"):
+                count = _bulk_create_count() if scope == "bulk_create_user" else 1
+                retry_after = login_throttle.check_create(ip, count)
+                if retry_after:
+                    return _too_many_requests(retry_after)
+                return f(*args, **kwargs)
+
+            username = _login_username()
+            retry_after = login_throttle.check_login(ip, username)
+            if retry_after:
+                return _too_many_requests(retry_after)
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                login_throttle.record_success(ip, username)
+            elif response.status_code in LOGIN_FAILURE_STATUSES:
+                login_throttle.record_failure(ip, username)
+            return response
+        return decorated
+    return decorator
+
+
+@registry.register_collector
+def _collect_throttle_stats():
+    stats = login_throttle.stats()
+    yield "rate_limit_decisions", "counter", "Credential endpoint requests by rate limiter decision.", [
+        ("rate_limit_decisions_total", {"decision": decision}, stats[decision])
+        for decision in ("allowed", "throttled", "locked_out")
+    ]
+    yield "rate_limit_keys", "gauge", "Keys currently tracked by the rate limiter.", [
+        ("rate_limit_keys", {"kind": kind}, stats[f"{kind}_keys"])
+        for kind in ("ip", "username", "create", "failure")
+    ]
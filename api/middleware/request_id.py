@@ -0,0 +1,101 @@
+import logging
+import re
+import time
+import uuid
+from flask import g, request
+from config import LOG_SLOW_REQUEST_MS
+from structured_logging import request_id_var
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# IDs accepted from clients and proxies; anything else is replaced rather than logged
+_VALID_REQUEST_ID = re.compile(r"[\w.:\-]{1,128}")
+
+
+def request_id_from(header_value) -> str:
+    """
+    The caller's request ID if it is well-formed, else a new one.
+    """
+    if header_value and _VALID_REQUEST_ID.fullmatch(header_value):
+        return header_value
+    return uuid.uuid4().hex
+
+
+def log_request(method: str, path: str, status: int, duration: float):
+    """
+    Log a finished request: at WARNING when slower than LOG_SLOW_REQUEST_MS, else at DEBUG.
+    """
+    duration_ms = round(duration * 1000, 1)
+    level = logging.WARNING if duration_ms >= LOG_SLOW_REQUEST_MS else logging.DEBUG
+    if logger.isEnabledFor(level):
+        logger.log(level, "%s %s %s in %.1f ms", method, path, status, duration_ms,
+                   extra={"method": method, "path": path, "status": status, "duration_ms": duration_ms})
+
+
+def _begin_request():
+    request_id = request_id_from(request.headers.get(REQUEST_ID_HEADER))
+    g.request_id = request_id
+    g.request_id_token = request_id_var.set(request_id)
+    g.request_start = time.perf_counter()
+
+
+def _finish_request(response):
+    request_id = g.get("request_id")
+    if request_id:
+        response.headers[REQUEST_ID_HEADER] = request_id
+        log_request(request.method, request.path, response.status_code, time.perf_counter() - g.request_start)
+    return response
+
+
+def _reset_request_id(exc=None):
+    token = g.pop("request_id_token", None)
+    if token is not None:
+        request_id_var.reset(token)
+
+
+def init_request_id(app):
+    """
+    Give every request an ID (the caller's X-Request-ID, or a new one): it is attached to the
+    records logged while serving it and echoed in the response header.
+    """
+    app.before_request(_begin_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_reset_request_id)
+
+
+class RequestIdMiddleware:
+    """
+    ASGI counterpart of init_request_id() for api/asgi.py. The ID is also put in the request
+    headers, so routes served by the Flask app keep it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        name = REQUEST_ID_HEADER.lower().encode("latin-1")
+        incoming = next((value for key, value in scope["headers"] if key == name), b"")
+        request_id = request_id_from(incoming.decode("latin-1"))
+        encoded = request_id.encode("latin-1")
+        headers = [(key, value) for key, value in scope["headers"] if key != name]
+        scope = dict(scope, headers=headers + [(name, encoded)])
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                response_headers = list(message.get("headers", []))
+                if not any(key.lower() == name for key, _ in response_headers):
+                    response_headers.append((name, encoded))
+                message = dict(message, headers=response_headers)
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+from starlette.responses import Response
+from werkzeug.http import parse_etags, generate_etag
+from config import COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE
+from database.helpers import validate_jwt
+from metrics import RESPONSE_CACHE_REQUESTS
+from middleware.compression import negotiate_encoding, compress, response_flight
+
+logger = logging.getLogger(__name__)
+
+# Native async handlers for the ASGI entry point, keyed by the Flask endpoint they replace.
+# Only endpoints that wait on the network (dev.to) or do no work at all run here; paths,
+# status codes and JSON bodies are those of the Flask views. Every other endpoint is served
+# by the Flask app itself, so validation, throttling and ETags have a single implementation.
+
+# Set up by init_async_routes()
+_json_provider = None
+_response_cache = None
+
+# Created on the first request that needs it
+blog_feed_service = None
+
+
+def init_async_routes(flask_app):
+    """
+    Bind the handlers to the Flask app whose JSON encoding and response cache they share.
+    """
+    global _json_provider, _response_cache
+    _json_provider = flask_app.json
+    with flask_app.app_context():
+        from extensions import cache
+        _response_cache = cache.cache
+
+
+def _blog_feed_service():
+    global blog_feed_service
+    if blog_feed_service is None:
+        from services.async_blog_feed_service import AsyncBlogFeedService
+        from services.async_devto_service import AsyncDevToService
+        blog_feed_service = AsyncBlogFeedService(AsyncDevToService(), _response_cache)
+    return blog_feed_service
+
+
+async def close_services():
+    """
+    Release the HTTP client held by the blog feed service.
+    """
+    if blog_feed_service is not None:
+        await blog_feed_service.close()
+
+
+async def _in_executor(f, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, f, *args)
+
+
+"""
+-------------------
+Responses
+-------------------
+"""
+
+def _render(payload, status: int, accept_encoding: str, etag=None):
+    """
+    Serialize like jsonify and compress like the compress_response hook.
+    etag=True tags a 200 response with a hash of the body, as @conditional_get does.
+    Returns (body, headers).
+    """
+    body = (_json_provider.dumps(payload) + "\n").encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if etag is True:
+        etag = generate_etag(body)
+    encoding = None
+    if COMPRESSION_ENABLED and 200 <= status < 300 and status != 204:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate_encoding(accept_encoding) if len(body) >= COMPRESSION_MIN_SIZE else None
+        if encoding:
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+    if etag and status == 200:
+        headers["ETag"] = f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+    return body, headers
+
+
+async def json_response(request, payload, status: int = 200):
+    """
+    JSON response for a small `payload`, rendered on the event loop.
+    """
+    body, headers = _render(payload, status, request.headers.get("accept-encoding", ""))
+    return Response(body, status_code=status, headers=headers)
+
+
+# Cache-Control of @conditional_get(private=True): clients keep responses but revalidate them
+PRIVATE_NO_CACHE = "no-cache, private"
+
+
+def _not_modified(request, etag: str, cache_control: str, vary: str = None):
+    """
+    304 for a request whose If-None-Match names `etag` (as sent, compression suffix included),
+    or None.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not etag or not if_none_match or not parse_etags(if_none_match).contains(etag.strip('"')):
+        return None
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if vary:
+        headers["Vary"] = vary
+    return Response(status_code=304, headers=headers)
+
+
+def _conditional(request, response, cache_control: str, vary: str = None):
+    """
+    Finish a read response as @conditional_get and the conditional_response hook do.
+    """
+    response.headers["Cache-Control"] = cache_control
+    if vary:
+        response.headers["Vary"] = vary
+    if response.status_code != 200:
+        return response
+    vary = response.headers.get("vary")
+    return _not_modified(request, response.headers.get("etag"), cache_control, vary) or response
+
+
+async def _check_token(request):
+    """
+    Same checks and messages as @token_required. Returns an error response, or None if the token is valid.
+    """
+    auth_header = request.headers.get("authorization")
+
+    if not auth_header:
+        return await json_response(request, {
+            "error": "Authorization header is required",
+            "message": "Please provide an Authorization header with a Bearer token"
+        }, 401)
+
+    if not auth_header.startswith('Bearer '):
+        return await json_response(request, {
+            "error": "Invalid authorization format",
+            "message": "Authorization header must be in format: Bearer <token>"
+        }, 401)
+
+    token = auth_header.split(' ')[1]
+    if not token:
+        return await json_response(request, {
+            "error": "Token is required",
+            "message": "Please provide a token after 'Bearer' in the Authorization header"
+        }, 401)
+
+    # Verified tokens are cached, but the revocation store may load from the database on first use
+    if not await _in_executor(validate_jwt, token):
+        return await json_response(request, {
+            "error": "Invalid or expired token",
+            "message": "Please provide a valid authentication token"
+        }, 401)
+    return None
+
+
+"""
+-------------------
+Handlers
+-------------------
+"""
+
+async def health_check(request):
+    return await json_response(request, {
+        "status": "healthy",
+        "message": "Devhub AI API is running"
+    })
+
+
+async def get_blogs(request):
+    """
+    GET /api/v1/portfolio/blogs, sharing the pre-compressed cache entries of @cached_response.
+    """
+    error = await _check_token(request)
+    if error is not None:
+        return error
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", "")) if COMPRESSION_ENABLED else None
+    cache_key = f"view/{request.url.path}:{encoding or 'identity'}"
+
+    cached = await _in_executor(_response_cache.get, cache_key)
+    RESPONSE_CACHE_REQUESTS.inc(route="/api/v1/portfolio/blogs", result="miss" if cached is None else "hit")
+    if cached is not None:
+        status, headers, body = cached
+    else:
+        # Concurrent misses share one render, as with @cached_response
+        status, headers, body = await response_flight.do_async(cache_key, _render_blogs, encoding, cache_key)
+    vary = "Accept-Encoding, Authorization" if status == 200 else "Authorization"
+    return _conditional(request, Response(body, status_code=status, headers=dict(headers)), PRIVATE_NO_CACHE, vary)
+
+
+async def _render_blogs(encoding, cache_key: str):
+    """
+    Build the blogs response for `encoding`, caching it while the feed is fresh.
+    Returns (status, headers, body).
+    """
+    feed = _blog_feed_service()
+    blogs = await feed.get_articles()
+    if blogs is None:
+        body, headers = _render({"error": "Failed to fetch blogs"}, 500, encoding or "")
+        return 500, headers, body
+
+    payload = {"message": "List of blogs", "blogs": blogs}
+    # As @cached_response: kept only while the feed it was rendered from is fresh
+    ttl = int(feed.fresh_for())
+    if ttl <= 0:
+        body, headers = await _in_executor(_render, payload, 200, encoding or "", True)
+        return 200, headers, body
+
+    def render_for_cache():
+        body = (_json_provider.dumps(payload) + "\n").encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        etag = generate_etag(body)
+        if encoding and len(body) >= COMPRESSION_MIN_SIZE:
+            body = compress(body, encoding, best=True)
+            headers["Content-Encoding"] = encoding
+            etag = f"{etag}-{encoding}"
+        headers["ETag"] = f'"{etag}"'
+        headers["Content-Length"] = str(len(body))
+        headers["Vary"] = "Accept-Encoding"
+        _response_cache.set(cache_key, (200, list(headers.items()), body), timeout=ttl)
+        return 200, headers, body
+
+    return await _in_executor(render_for_cache)
+
+
+# Flask endpoint -> native handler
+NATIVE_HANDLERS = {
+    "health.health_check": health_check,
+    "portfolio.get_blogs": get_blogs,
+}
@@ -1,34 +1,89 @@
-from flask import Blueprint, jsonify, request
-from services.rsa_encryption_service import RSAEncryption
-from services.auth_service import AuthService
-from cryptography.hazmat.primitives import serialization
+import logging
+import json
+import hashlib
+from flask import Blueprint, jsonify, request, Response
+from config import PUBLIC_KEY_MAX_AGE
+from middleware.rate_limit import rate_limited
 
-# Initialize RSA Encryption Manager
-rsa_manager = RSAEncryption()
-auth_service = AuthService()
+# Serialized public key documents, built once on first request: name -> (body, etag)
+_key_documents = {}
 
 # Create a blueprint
 auth_bp = Blueprint('auth', __name__)
 
+logger = logging.getLogger(__name__)
+
+# Services are created on the first request to this blueprint
+auth_service = None
+rsa_manager = None
+
+
+@auth_bp.before_request
+def init_services():
+    global auth_service, rsa_manager
+    if auth_service is None:
+        from services.auth_service import AuthService
+        from services.rsa_encryption_service import rsa_manager as shared_rsa_manager
+        rsa_manager = shared_rsa_manager
+        auth_service = AuthService()
+
+
+def _key_document(name: str, build):
+    """
+    Serialize a key document once and reuse the bytes and strong ETag.
+    """
+    document = _key_documents.get(name)
+    if document is None:
+        body = json.dumps(build(), separators=(',', ':'), sort_keys=True).encode('utf-8')
+        document = (body, hashlib.sha256(body).hexdigest())
+        _key_documents[name] = document
+    return document
+
+
+def _serve_key_document(name: str, build):
+    """
+    Serve a prebuilt key document with ETag / Cache-Control, answering 304 when unchanged.
+    """
+    body, etag = _key_document(name, build)
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = PUBLIC_KEY_MAX_AGE
+    return response.make_conditional(request)
+
+
 @auth_bp.route('/public_key', methods=['GET'])
 def get_public_key():
     """
     Enfdpoint to retrieve the RSA public key.
     """
-    if rsa_manager.public_key:
-        try:
-            public_key_pem = rsa_manager.public_key.public_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PublicFormat.SubjectPublicKeyInfo
-            )
-            return jsonify({
-                "publicKey": public_key_pem.decode('utf-8')
-            }), 200
-        except Exception as e:
-            print(f"[auth_bp][get_public_key] >> Error retrieving public key: {e}")
-            return jsonify({"error": "Failed to retrieve public key"}), 500
-    else:
-        return jsonify({"error": "Public key not available"}), 500
+    try:
+        if not rsa_manager.public_key_pem:
+            return jsonify({"error": "Public key not available"}), 500
+        
+        return _serve_key_document('public_key', lambda: {
+            "publicKey": rsa_manager.public_key_pem.decode('utf-8'),
+            "kid": rsa_manager.key_id
+        })
+    except Exception as e:
+        logger.exception("Error retrieving public key: %s", e)
+        return jsonify({"error": "Failed to retrieve public key"}), 500
+
+
+@auth_bp.route('/jwks', methods=['GET'])
+def get_jwks():
+    """
+    Endpoint to retrieve the RSA public keys as a JSON Web Key Set.
+    Lists the current key first, followed by retired keys still accepted for decryption.
+    """
+    try:
+        if not rsa_manager.jwks["keys"]:
+            return jsonify({"error": "Public key not available"}), 500
+        
+        return _serve_key_document('jwks', lambda: rsa_manager.jwks)
+    except Exception as e:
+        logger.exception("Error retrieving JWKS: %s", e)
+        return jsonify({"error": "Failed to retrieve JWKS"}), 500
     
 
 @auth_bp.route('/encrypt_test/<string:plaintext>', methods=['GET'])
@@ -46,7 +101,7 @@ def encrypt_test(plaintext):
         else:
             return jsonify({"error": "Encryption failed"}), 500
     except Exception as e:
-        print(f"[auth_bp][encrypt_test] >> Error during encryption: {e}")
+        logger.exception("Error during encryption: %s", e)
         return jsonify({"error": "Encryption error"}), 500
     
 @auth_bp.route('/decrypt_test', methods=['POST'])
@@ -70,10 +125,11 @@ def decrypt_test():
         else:
             return jsonify({"error": "Decryption failed"}), 500
     except Exception as e:
-        print(f"[auth_bp][decrypt_test] >> Error during decryption: {e}")
+        logger.exception("Error during decryption: %s", e)
         return jsonify({"error": "Decryption error"}), 500
     
 @auth_bp.route('/login', methods=['POST'])
+@rate_limited("login")
 def login():
     """
     Endpoint to authenticate a user and issue an auth token.
@@ -81,6 +137,8 @@ def login():
     """
     
     data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"error": "Missing 'username' or 'password' in request body"}), 400
     username = data.get('username')
     password = data.get('password')
     
@@ -102,7 +160,7 @@ def validate_token():
     Expects JSON body with 'token' field.
     """
     data = request.get_json()
-    token = data.get('token')
+    token = data.get('token') if isinstance(data, dict) else None
     
     if not token:
         return jsonify({"error": "Missing 'token' in request body"}), 400
@@ -117,7 +175,7 @@ def logout():
     Expects JSON body with 'token' field.
     """
     data = request.get_json()
-    token = data.get('token')
+    token = data.get('token') if isinstance(data, dict) else None
     
     if not token:
         return jsonify({"error": "Missing 'token' in request body"}), 400
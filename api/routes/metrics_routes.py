@@ -0,0 +1,29 @@
+import hmac
+from flask import Blueprint, Response, jsonify, request
+from config import METRICS_TOKEN, is_production
+from metrics import registry
+
+# Create a Blueprint for the metrics endpoint
+metrics_bp = Blueprint('metrics', __name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Expose this process's metrics in the Prometheus text format.
+    In production the endpoint only exists when METRICS_TOKEN is set.
+    """
+    if is_production and not METRICS_TOKEN:
+        return jsonify({"error": "Not found"}), 404
+
+    if METRICS_TOKEN:
+        auth_header = request.headers.get('Authorization', '')
+        # As bytes: compare_digest rejects str with non-ASCII characters with a TypeError
+        if not hmac.compare_digest(auth_header.encode('utf-8'), f"Bearer {METRICS_TOKEN}".encode('utf-8')):
+            return jsonify({"error": "Unauthorized"}), 401
+
+    response = Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+    response.cache_control.no_store = True
+    return response
@@ -1,23 +1,34 @@
 from flask import Blueprint, jsonify
-from services.devto_service import DevToService
 from middleware.auth_decorator import token_required
-from extensions import cache
+from middleware.compression import cached_response
+from middleware.conditional import conditional_get
 
 # Create a bluprint
 portfolio_bp = Blueprint('portfolio', __name__)
 
-# Initialize service(s)
-devto_service = DevToService()
+# Services are created on the first request to this blueprint
+blog_feed_service = None
+
+
+@portfolio_bp.before_request
+def init_services():
+    global blog_feed_service
+    if blog_feed_service is None:
+        from extensions import cache
+        from services.blog_feed_service import BlogFeedService
+        from services.devto_service import DevToService
+        blog_feed_service = BlogFeedService(DevToService(), cache.cache)
 
 @portfolio_bp.route('/blogs', methods=['GET'])
 @token_required
-@cache.cached(timeout=10800)  # Cache this route for 3 hours
+@conditional_get(private=True)
+@cached_response(timeout=lambda: blog_feed_service.fresh_for())  # Pre-compressed, while the feed is fresh
 def get_blogs():
     """
     Endpoint to retrieve a list of blogs.
     Requires valid authentication token.
     """
-    blogs = devto_service.get_articles()
+    blogs = blog_feed_service.get_articles()
     if blogs is None:
         return jsonify({"error": "Failed to fetch blogs"}), 500
     
@@ -1,20 +1,59 @@
-from flask import Blueprint, jsonify, request
-from services.project_users_service import ProjectUsersService
-from services.rsa_encryption_service import RSAEncryption
-from database.helpers import hash_password
+import logging
+import datetime
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
+from database.helpers import hash_password, hash_passwords, encode_page_cursor, decode_page_cursor
+from config import USERS_PAGE_DEFAULT_LIMIT, USERS_PAGE_MAX_LIMIT
+from middleware.rate_limit import rate_limited
+from middleware.conditional import conditional_get
+
+# Text filters accepted by /search
+SEARCH_TEXT_FILTERS = ('project_prefix', 'project_contains', 'username_prefix', 'username_contains')
 
 # Create a blueprint
 project_users_bp = Blueprint('project_users', __name__)
 
-# Initialize service
-project_users_service = ProjectUsersService()
-rsa_manager = RSAEncryption()
+logger = logging.getLogger(__name__)
+
+# Services are created on the first request to this blueprint
+project_users_service = None
+rsa_manager = None
+
+
+@project_users_bp.before_request
+def init_services():
+    global project_users_service, rsa_manager
+    if project_users_service is None:
+        from services.project_users_service import ProjectUsersService
+        from services.rsa_encryption_service import rsa_manager as shared_rsa_manager
+        rsa_manager = shared_rsa_manager
+        project_users_service = ProjectUsersService()
+
+
+def _page_args_error():
+    return _parse_page_args()[2]
+
+
+def _search_args_error():
+    return _parse_search_args()[3]
+
 
 @project_users_bp.route('/', methods=['GET'])
+@conditional_get(validate=_page_args_error)
 def get_all_users():
     """
-    Endpoint to retrieve all project users.
+    Endpoint to retrieve project users.
+    Query parameters:
+    - limit, after: keyset pagination; `after` is the `next_cursor` of the previous page
+    - stream=1 (or Accept: application/x-ndjson): stream every user as NDJSON
+    Without any of these, all users are returned in a single JSON payload.
     """
+    if request.args.get('stream') in ('1', 'true') or \
+            request.accept_mimetypes.best == 'application/x-ndjson':
+        return _stream_users()
+
+    if 'limit' in request.args or 'after' in request.args:
+        return _get_users_page()
+
     users = project_users_service.get_all_users()
     if users is None:
         return jsonify({"error": "Failed to fetch users"}), 500
@@ -24,7 +63,128 @@ def get_all_users():
         "users": users
     }), 200
     
+
+def _parse_page_args():
+    """
+    Read the `limit` / `after` paging parameters.
+    Returns (limit, after, None), or (None, None, error response).
+    """
+    try:
+        limit = int(request.args.get('limit', USERS_PAGE_DEFAULT_LIMIT))
+    except ValueError:
+        return None, None, (jsonify({"error": "'limit' must be an integer"}), 400)
+
+    if limit < 1 or limit > USERS_PAGE_MAX_LIMIT:
+        return None, None, (jsonify({"error": f"'limit' must be between 1 and {USERS_PAGE_MAX_LIMIT}"}), 400)
+
+    after = request.args.get('after')
+    if not after:
+        return limit, None, None
+    try:
+        return limit, decode_page_cursor(after), None
+    except ValueError:
+        return None, None, (jsonify({"error": "Invalid 'after' cursor"}), 400)
+
+
+def _get_users_page():
+    """
+    Keyset-paginated listing ordered by (created_at, id).
+    """
+    limit, after, error = _parse_page_args()
+    if error:
+        return error
+
+    users, next_position = project_users_service.get_users_page(limit, after)
+    if users is None:
+        return jsonify({"error": "Failed to fetch users"}), 500
+
+    return jsonify({
+        "message": "List of project users",
+        "users": users,
+        "limit": limit,
+        "next_cursor": encode_page_cursor(*next_position) if next_position else None
+    }), 200
+
+
+def _stream_users():
+    """
+    Stream all users as newline-delimited JSON, one object per line.
+    The first batch is read before responding, so an unavailable database is a 500; a failure
+    after that aborts the response instead of ending it early.
+    """
+    json_provider = current_app.json
+    users = project_users_service.iter_all_users()
+    try:
+        first = next(users, None)
+    except Exception:
+        return jsonify({"error": "Failed to fetch users"}), 500
+
+    def generate():
+        if first is None:
+            return
+        yield json_provider.dumps(first) + "\n"
+        for user in users:
+            yield json_provider.dumps(user) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def _parse_search_args():
+    """
+    Read the /search filters and paging parameters.
+    Returns (filters, limit, after, None), or (None, None, None, error response).
+    """
+    filters = {field: request.args.get(field) for field in SEARCH_TEXT_FILTERS}
+
+    is_active = request.args.get('is_active')
+    if is_active is not None:
+        if is_active.lower() not in ('true', 'false', '1', '0'):
+            return None, None, None, (jsonify({"error": "'is_active' must be true or false"}), 400)
+        filters['is_active'] = is_active.lower() in ('true', '1')
+
+    for field in ('created_after', 'created_before'):
+        value = request.args.get(field)
+        if value:
+            try:
+                filters[field] = datetime.datetime.fromisoformat(value)
+            except ValueError:
+                return None, None, None, (jsonify({"error": f"'{field}' must be an ISO 8601 timestamp"}), 400)
+
+    limit, after, error = _parse_page_args()
+    if error:
+        return None, None, None, error
+    return filters, limit, after, None
+
+
+@project_users_bp.route('/search', methods=['GET'])
+@conditional_get(validate=_search_args_error)
+def search_users():
+    """
+    Endpoint to search project users, one keyset page at a time (ordered by created_at, id).
+    Query parameters (all optional, combined with AND):
+    - project_prefix, project_contains, username_prefix, username_contains: case-sensitive matches
+    - is_active: true / false
+    - created_after, created_before: ISO 8601 timestamps (exclusive)
+    - limit, after: paging, as for the listing endpoint
+    """
+    filters, limit, after, error = _parse_search_args()
+    if error:
+        return error
+
+    users, next_position = project_users_service.search_users(filters, limit, after)
+    if users is None:
+        return jsonify({"error": "Failed to search users"}), 500
+
+    return jsonify({
+        "message": "Matching project users",
+        "users": users,
+        "limit": limit,
+        "next_cursor": encode_page_cursor(*next_position) if next_position else None
+    }), 200
+
+
 @project_users_bp.route('/<string:username>', methods=['GET'])
+@conditional_get()
 def get_user_by_username(username):
     """
     Endpoint to retrieve a project user by their username.
@@ -39,6 +199,7 @@ def get_user_by_username(username):
     }), 200
     
 @project_users_bp.route('/create', methods=['POST'])
+@rate_limited("create_user")
 def create_user():
     """
     Endpoint to create a new project user.
@@ -47,8 +208,6 @@ def create_user():
     data = request.get_json()
     required_fields = ['project', 'username', 'password']
     
-    print(f"Received data for new user: {data}")
-    
     # Mandatory field check
     if not data or not all(field in data for field in required_fields):
         return jsonify({"error": f"Missing one of the required fields: {required_fields}"}), 400
@@ -61,6 +220,8 @@ def create_user():
     if not project_name or not username or not password:
         return jsonify({"error": "Project name, username, and password cannot be empty"}), 400
     
+    logger.info("Creating user %s in project %s", username, project_name)
+    
     # Decrypt the password using RSA
     decrypted_password = rsa_manager.decrypt(password)
     if decrypted_password is None:
@@ -143,4 +304,127 @@ def deactivate_user():
     
     return jsonify({
         "message": f"User {username} deactivated successfully"
-    }), 200
\ No newline at end of file
+    }), 200
+
+
+@project_users_bp.route('/bulk/create', methods=['POST'])
+@rate_limited("bulk_create_user")
+def bulk_create_users():
+    """
+    Endpoint to create several project users in one transaction.
+    Expects JSON body with 'users': a list of objects with 'project', 'username' and 'password' fields.
+    Returns a result for each item, in request order.
+    """
+    data = request.get_json()
+    if not isinstance(data, dict) or not isinstance(data.get('users'), list):
+        return jsonify({"error": "Missing 'users' list in request body"}), 400
+
+    items = data['users']
+    if len(items) > project_users_service.batch_size_limit:
+        return jsonify({"error": f"Too many users in batch (limit {project_users_service.batch_size_limit})"}), 400
+
+    results = []
+    accepted = []  # (project, username, decrypted password)
+    seen = set()
+    for item in items:
+        if not isinstance(item, dict) or not all(isinstance(item.get(field), str) and item[field]
+                                                 for field in ['project', 'username', 'password']):
+            username = item.get('username') if isinstance(item, dict) else None
+            results.append({"username": username if isinstance(username, str) else None,
+                            "status": "invalid", "error": "Project name, username, and password must be non-empty strings"})
+            continue
+
+        username = item['username']
+        if username in seen:
+            results.append({"username": username, "status": "invalid", "error": "Duplicate username in batch"})
+            continue
+        seen.add(username)
+
+        decrypted_password = rsa_manager.decrypt(item['password'])
+        if decrypted_password is None:
+            results.append({"username": username, "status": "invalid", "error": "Failed to decrypt password"})
+            continue
+
+        accepted.append((item['project'], username, decrypted_password))
+        results.append({"username": username, "status": None})
+
+    # Hashed in parallel on the Argon2 pool rather than one at a time on this thread
+    password_hashes = hash_passwords([password for _, _, password in accepted])
+    rows = [(project, username, password_hash)
+            for (project, username, _), password_hash in zip(accepted, password_hashes)]
+
+    created = project_users_service.create_users(rows)
+    if created is None:
+        return jsonify({"error": "Failed to create users"}), 500
+
+    for result in results:
+        if result["status"] is None:
+            user = created.get(result["username"])
+            if user:
+                result.update(status="created", user=user)
+            else:
+                result.update(status="conflict", error="Project name or username already exists")
+
+    return jsonify({
+        "message": "Bulk create processed",
+        "created": sum(1 for result in results if result["status"] == "created"),
+        "results": results
+    }), 200
+
+
+@project_users_bp.route('/bulk/activate', methods=['POST'])
+def bulk_activate_users():
+    """
+    Endpoint to activate several project users.
+    Expects JSON body with 'usernames': a list of usernames.
+    """
+    return _bulk_update_users(project_users_service.activate_users, "activated")
+
+
+@project_users_bp.route('/bulk/deactivate', methods=['POST'])
+def bulk_deactivate_users():
+    """
+    Endpoint to deactivate several project users.
+    Expects JSON body with 'usernames': a list of usernames.
+    """
+    return _bulk_update_users(project_users_service.deactivate_users, "deactivated")
+
+
+@project_users_bp.route('/bulk/delete', methods=['POST'])
+def bulk_delete_users():
+    """
+    Endpoint to delete several project users.
+    Expects JSON body with 'usernames': a list of usernames.
+    """
+    return _bulk_update_users(project_users_service.delete_users, "deleted")
+
+
+def _bulk_update_users(operation, done_status: str):
+    """
+    Shared handler for the username-list bulk endpoints.
+    """
+    data = request.get_json()
+    usernames = data.get('usernames') if isinstance(data, dict) else None
+    if not isinstance(usernames, list) or not all(isinstance(u, str) and u for u in usernames):
+        return jsonify({"error": "'usernames' must be a list of non-empty strings"}), 400
+
+    # Preserve request order while dropping duplicates
+    usernames = list(dict.fromkeys(usernames))
+
+    try:
+        outcome = operation(usernames)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if outcome is None:
+        return jsonify({"error": "Failed to update users"}), 500
+
+    results = [
+        {"username": username, "status": done_status if outcome[username] else "not_found"}
+        for username in usernames
+    ]
+    return jsonify({
+        "message": "Bulk update processed",
+        done_status: sum(1 for result in results if result["status"] == done_status),
+        "results": results
+    }), 200
@@ -0,0 +1,213 @@
+# Production entry point outside Vercel: a pre-forking gunicorn server around the Flask app
+#
+#   python api/server.py
+#
+# Requires the packages in requirements-server.txt. Signals (sent to the master process):
+#   TERM / INT  graceful shutdown: workers stop accepting, finish in-flight requests and exit
+#   HUP         graceful reload: new workers are started, then the old ones drain and exit
+#   USR2        start a new master running the current code; TERM the old one once it is up
+
+import sys
+import os
+import time
+import signal
+import logging
+import importlib
+import threading
+
+# Add the current directory to Python path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import config
+from gunicorn.app.base import BaseApplication
+
+# Each worker gets its own Argon2 process pool. Unless configured, share the cores between the
+# workers rather than starting a pool of one process per core in every one of them.
+if "PASSWORD_HASH_WORKERS" not in os.environ and config.PASSWORD_HASH_WORKERS:
+    config.PASSWORD_HASH_WORKERS = max(1, (os.cpu_count() or 1) // config.SERVER_WORKERS)
+
+# Likewise each worker has its own connection pool, and all of them count against the database's
+# max_connections. Unless configured, a worker holds one connection per request thread plus one
+# for background jobs (token revocations, cache refreshes).
+if "DB_POOL_MAX_SIZE" not in os.environ:
+    config.DB_POOL_MAX_SIZE = config.SERVER_THREADS + 1
+    config.DB_POOL_MIN_SIZE = min(config.DB_POOL_MIN_SIZE, config.DB_POOL_MAX_SIZE)
+
+logger = logging.getLogger("server")  # not __name__, which is "__main__" when run as a script
+
+# Imported lazily by the app; loading them before fork shares them between workers
+PRELOAD_MODULES = ("jwt", "argon2", "requests", "requests.adapters", "psycopg2.extras",
+                   "services.blog_feed_service", "services.devto_service", "services.project_users_service")
+
+
+def preload():
+    """
+    Runs once in the master, after the app is imported: everything done here is shared copy-on-write
+    by the workers. Connections, threads and process pools must not be started here.
+    """
+    from services.rsa_encryption_service import rsa_manager
+
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    rsa_manager.public_key  # parses the current and retired keys
+
+
+def before_fork():
+    """
+    Close what the master opened while importing the app (e.g. the connections used to check the
+    schema and load token revocations): sockets and process pools can't be shared with workers.
+    """
+    from database.database import close_pool
+    from services.password_hash_service import password_hash_service
+
+    close_pool()
+    password_hash_service.shutdown(wait=True)
+
+
+def _warm_database():
+    from database.database import ensure_schema, get_pool, get_connection
+    from database.statements import prepare_statements
+    from routes import project_users_routes
+
+    ensure_schema()
+    get_pool().prefill()
+    project_users_routes.init_services()
+    conn = get_connection()
+    if conn:
+        try:
+            prepare_statements(conn)
+        finally:
+            conn.close()
+
+
+def _warm_rsa_keys():
+    from services.rsa_encryption_service import rsa_manager
+    rsa_manager.public_key
+
+
+def _warm_password_hash():
+    from services.password_hash_service import password_hash_service
+    password_hash_service.hash("warm-up")  # starts the Argon2 pool and sizes its memory
+
+
+def _prime_blog_feed(blog_feed_service):
+    try:
+        if not blog_feed_service.prime():
+            # Another worker is fetching it, or dev.to is down: the first request reads or fetches it
+            logger.info("Blog feed not primed in this worker")
+    except Exception as e:
+        logger.exception("Error priming the blog feed: %s", e)
+
+
+def warm_up():
+    """
+    Runs in each worker before it accepts requests, so the first ones don't pay for connecting
+    to the database, loading keys or starting the Argon2 pool. A failed step is logged and left
+    to the first request that needs it. The blog feed is primed in the background: it may wait
+    on dev.to, and requests for it meanwhile share the same fetch.
+    """
+    for name, step in (("database", _warm_database), ("rsa_keys", _warm_rsa_keys),
+                       ("password_hash", _warm_password_hash)):
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e, extra={"step": name})
+            continue
+        duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.info("Warm-up step %s done in %.1f ms", name, duration_ms,
+                    extra={"step": name, "duration_ms": duration_ms})
+
+    from routes import portfolio_app_routes
+    portfolio_app_routes.init_services()
+    threading.Thread(target=_prime_blog_feed, args=(portfolio_app_routes.blog_feed_service,),
+                     name="warm-up-blog-feed", daemon=True).start()
+
+
+def shut_down():
+    """
+    Release a worker's resources once it has drained: refresh timers, the dev.to session,
+    database connections, the Argon2 processes, and the log records still queued.
+    """
+    from database.database import close_pool
+    from routes import portfolio_app_routes
+    from services.password_hash_service import password_hash_service
+    from structured_logging import stop_logging
+
+    if portfolio_app_routes.blog_feed_service is not None:
+        portfolio_app_routes.blog_feed_service.close()
+    close_pool()
+    # Interpreter exit hooks don't run in forked workers, so wait for the pool here
+    password_hash_service.shutdown(wait=True)
+    stop_logging()
+
+
+# Gunicorn server hooks
+
+def _pre_fork(server, worker):
+    before_fork()
+
+
+def _post_worker_init(worker):
+    if not config.SERVER_WARMUP:
+        return
+    # The worker's heartbeat only starts after this hook, so the master would kill a worker whose
+    # warm-up outlasts SERVER_TIMEOUT. Past the deadline it finishes while requests are served.
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    thread.join(config.SERVER_TIMEOUT / 2)
+    if thread.is_alive():
+        logger.warning("Warm-up still running after %ss, serving requests meanwhile", config.SERVER_TIMEOUT / 2)
+
+
+def _worker_exit(server, worker):
+    # Also called in the master for workers that died; only a worker cleans up after itself
+    if worker.pid == os.getpid():
+        # The master repeats SIGTERM until the worker is gone; once it is exiting anyway, a TERM
+        # landing after the interpreter resets signal handlers would kill it with an error
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        shut_down()
+
+
+class PreforkServer(BaseApplication):
+    """
+    Gunicorn with threaded workers (one per SERVER_WORKERS), the app loaded before fork and
+    the hooks above. Settings come from config.py.
+    """
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app import app
+        preload()
+        return app
+
+
+def server_options() -> dict:
+    return {
+        "bind": config.SERVER_BIND,
+        "workers": config.SERVER_WORKERS,
+        "worker_class": "gthread",
+        "threads": config.SERVER_THREADS,
+        "timeout": config.SERVER_TIMEOUT,
+        "graceful_timeout": config.SERVER_GRACEFUL_TIMEOUT,
+        "keepalive": config.SERVER_KEEPALIVE,
+        "max_requests": config.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": config.SERVER_MAX_REQUESTS // 10,
+        "preload_app": True,
+        "pre_fork": _pre_fork,
+        "post_worker_init": _post_worker_init,
+        "worker_exit": _worker_exit,
+    }
+
+
+if __name__ == '__main__':
+    PreforkServer(server_options()).run()
@@ -0,0 +1,112 @@
+import logging
+import asyncio
+import time
+from extensions import SingleFlightTimeout
+from metrics import BLOG_FEED_REQUESTS, BLOG_FEED_REFRESHES
+from services.blog_feed_service import BlogFeedService, FEED_CACHE_KEY, REFRESH_LOCK_KEY
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBlogFeedService(BlogFeedService):
+    """
+    BlogFeedService for the ASGI entry point: the same fresh/stale/refresh-ahead rules and the
+    same cache entries, with AsyncDevToService fetching on the event loop. Cache backend calls
+    run in the default executor; refreshes are tasks and the refresh-ahead timer is a loop callback.
+    """
+
+    def __init__(self, devto_service, store, **kwargs):
+        super().__init__(devto_service, store, **kwargs)
+        self._tasks = set()
+
+    async def get_articles(self):
+        """
+        Return the articles, or None if there is no copy at all and dev.to can't be reached.
+        """
+        entry = self._track(await self._in_executor(self._read))
+        state = self._state(entry)
+        if state == "fresh":
+            BLOG_FEED_REQUESTS.inc(result="fresh")
+            return entry[1]
+        if state == "stale":
+            BLOG_FEED_REQUESTS.inc(result="stale")
+            await self._refresh_in_background()
+            return entry[1]
+
+        # Too old to serve without asking dev.to first (unless another worker already is);
+        # concurrent requests in this process wait for the same fetch
+        if entry is None or await self._in_executor(self._claim_refresh):
+            try:
+                fetched = await self._fetches.do_async(FEED_CACHE_KEY, self._refresh, "expired" if entry else "cold")
+            except SingleFlightTimeout as e:
+                logger.warning("Blog feed fetch abandoned: %s", e)
+                fetched = None
+            if fetched is not None:
+                BLOG_FEED_REQUESTS.inc(result="refetched")
+                return fetched[1]
+        BLOG_FEED_REQUESTS.inc(result="fallback" if entry else "unavailable")
+        return entry[1] if entry else None
+
+    @staticmethod
+    async def _in_executor(f, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, f, *args)
+
+    def _spawn(self, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _start_timer(self, delay: float, fetched_at):
+        # _track() runs on the event loop thread
+        return asyncio.get_running_loop().call_later(delay, lambda: self._spawn(self._on_refresh_ahead(fetched_at)))
+
+    async def _on_refresh_ahead(self, fetched_at):
+        if not self._refresh_ahead_due(fetched_at):
+            return
+        newer = self._adopt_if_newer(await self._in_executor(self._read), fetched_at)
+        if newer is None and await self._in_executor(self._claim_refresh):
+            await self._refresh("ahead")
+
+    async def _refresh_in_background(self):
+        if not self._begin_refresh():
+            return
+        if not await self._in_executor(self._claim_refresh):
+            self._end_refresh()
+            return
+        self._spawn(self._refresh("stale"))
+
+    async def _refresh(self, trigger: str):
+        """
+        Fetch the feed from dev.to and store it. Returns the new (fetched_at, articles), or None.
+        """
+        with self._lock:
+            self._refreshing = True
+        try:
+            current = self._entry
+            newer = self._adopt_if_newer(await self._in_executor(self._read), current[0] if current else None)
+            if newer is not None:
+                await self._in_executor(self.store.delete, REFRESH_LOCK_KEY)
+                return newer
+
+            articles = await self.devto_service.get_articles()
+            if articles is None:
+                BLOG_FEED_REFRESHES.inc(trigger=trigger, result="failure")
+                logger.warning("Refresh (%s) failed, keeping the last good copy", trigger, extra={"trigger": trigger})
+                return None
+
+            entry = (time.time(), articles)
+            await self._in_executor(self._save, entry)
+            BLOG_FEED_REFRESHES.inc(trigger=trigger, result="success")
+            return self._track(entry, hit=False)
+        finally:
+            self._end_refresh()
+
+    async def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        for task in list(self._tasks):
+            task.cancel()
+        await self.devto_service.close()
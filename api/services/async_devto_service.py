@@ -0,0 +1,149 @@
+import logging
+import os
+import asyncio
+import random
+from extensions import lazy_module
+from metrics import timed, DEVTO_FETCH_DURATION
+from services.devto_service import RETRY_STATUSES
+from config import (
+    DEV_TO_API_URL,
+    DEVTO_CONNECT_TIMEOUT,
+    DEVTO_READ_TIMEOUT,
+    DEVTO_MAX_RETRIES,
+    DEVTO_BACKOFF_BASE,
+    DEVTO_BACKOFF_MAX,
+    DEVTO_PER_PAGE,
+    DEVTO_MAX_PARALLEL,
+    DEVTO_MAX_PAGES,
+)
+
+# Only needed by the ASGI entry point (see requirements-async.txt)
+httpx = lazy_module("httpx")
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDevToService:
+    """
+    asyncio counterpart of DevToService, on an httpx.AsyncClient.
+
+    Same behaviour: keep-alive connections with connect/read timeouts, capped and fully
+    jittered retries, conditional page requests (If-None-Match), and every page of
+    /articles/me fetched at most `max_parallel` at a time (up to `max_pages`), without a
+    thread per request.
+    """
+    def __init__(self, api_url=DEV_TO_API_URL, api_key=None, connect_timeout=DEVTO_CONNECT_TIMEOUT,
+                 read_timeout=DEVTO_READ_TIMEOUT, max_retries=DEVTO_MAX_RETRIES, backoff_base=DEVTO_BACKOFF_BASE,
+                 backoff_max=DEVTO_BACKOFF_MAX, per_page=DEVTO_PER_PAGE, max_parallel=DEVTO_MAX_PARALLEL,
+                 max_pages=DEVTO_MAX_PAGES):
+        self.api_url = api_url
+        self.headers = {
+            "Accept": "application/json",
+            "api-key": api_key or os.getenv("DEV_TO_API_KEY"),  # Ensure this is set in your environment
+        }
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.per_page = per_page
+        self.max_parallel = max_parallel
+        self.max_pages = max_pages
+
+        self._client = None
+        self._validators = {}  # page -> (etag, articles) from the last 200 response
+
+    @property
+    def client(self):
+        # Created on first use so it binds to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={name: value for name, value in self.headers.items() if value is not None},
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_parallel, max_keepalive_connections=self.max_parallel),
+            )
+        return self._client
+
+    @timed(DEVTO_FETCH_DURATION)
+    async def get_articles(self):
+        """
+        Fetch all articles from the Dev.to API.
+        Returns None if any page could not be fetched.
+        """
+        try:
+            articles = await self._fetch_page(1)
+            if len(articles) < self.per_page:
+                return articles
+
+            # More pages exist: fetch them in parallel waves until a short page shows up
+            next_page = 2
+            while next_page <= self.max_pages:
+                pages = range(next_page, min(next_page + self.max_parallel, self.max_pages + 1))
+                results = await asyncio.gather(*(self._fetch_page(page) for page in pages))
+                for page_articles in results:
+                    articles.extend(page_articles)
+                    if len(page_articles) < self.per_page:
+                        return articles
+                next_page += self.max_parallel
+            logger.warning("Stopped after %s full pages of articles", self.max_pages,
+                           extra={"max_pages": self.max_pages})
+            return articles
+        except httpx.HTTPError as e:
+            logger.warning("Error fetching articles: %s", e)
+            return None
+
+    async def _fetch_page(self, page: int) -> list:
+        """
+        GET one page, sending If-None-Match when an ETag for it is known.
+        """
+        params = {"page": page, "per_page": self.per_page}
+        cached = self._validators.get(page)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+
+        response = await self._request(params, headers)
+        if response.status_code == 304 and cached:
+            return list(cached[1])
+
+        response.raise_for_status()  # Raise an error for bad responses
+        articles = response.json()
+
+        etag = response.headers.get("ETag")
+        if etag:
+            self._validators[page] = (etag, articles)
+        else:
+            self._validators.pop(page, None)
+        return list(articles)
+
+    async def _request(self, params: dict, headers: dict):
+        """
+        GET with bounded retries on connection errors, timeouts and retryable statuses.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.get(self.api_url, params=params, headers=headers)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._retry_after(response) or self._backoff(attempt)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _retry_after(self, response):
+        value = response.headers.get("Retry-After")
+        if value and value.isdigit():
+            return min(float(value), self.backoff_max)
+        return None
+
+    async def close(self):
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
@@ -1,5 +1,5 @@
 from services.project_users_service import ProjectUsersService
-from database.helpers import validate_jwt, generate_jwt
+from database.helpers import validate_jwt, generate_jwt, revoke_jwt
 
 # Initialize service
 project_users_service = ProjectUsersService()
@@ -9,10 +9,11 @@ class AuthService:
     @staticmethod
     def login(username: str, password: str):
         """ login and return auth token if successful """
-        if not project_users_service.validate_user(username, password):
+        # One lookup serves both the credential check and the user id
+        user = project_users_service.authenticate(username, password)
+        if not user:
             return {"error": "Invalid username or password"}, 401
         
-        user = project_users_service.get_user_by_username(username)
         token = generate_jwt(user["id"])
         
         if not token:
@@ -28,4 +29,15 @@ class AuthService:
             return {"message": "Token is valid"}, 200
         else:
             return {"error": "Invalid or expired token"}, 401
-        
\ No newline at end of file
+
+    @staticmethod
+    def logout(token: str):
+        """ Revoke the provided token so it can no longer be used """
+        persisted = revoke_jwt(token)
+        if persisted is None:
+            return {"error": "Invalid or expired token"}, 401
+        if not persisted:
+            # Only this process knows; other workers would keep accepting the token
+            return {"error": "Logout could not be saved, please retry"}, 503
+        
+        return {"message": "Logout successful"}, 200
@@ -0,0 +1,245 @@
+import logging
+import threading
+import time
+from extensions import SingleFlight, SingleFlightTimeout
+from metrics import BLOG_FEED_REQUESTS, BLOG_FEED_REFRESHES
+from config import (
+    BLOGS_FRESH_TTL,
+    BLOGS_STALE_TTL,
+    BLOGS_REFRESH_AHEAD,
+    BLOGS_REFRESH_AHEAD_MIN_HITS,
+    BLOGS_REFRESH_RETRY,
+)
+
+# Keys in the response cache backend (shared by the workers on a host with CACHE_BACKEND=sqlite)
+FEED_CACHE_KEY = "devto/articles"  # (fetched_at, articles)
+REFRESH_LOCK_KEY = "devto/articles/refreshing"
+
+logger = logging.getLogger(__name__)
+
+
+class BlogFeedService:
+    """
+    Dev.to articles served stale-while-revalidate.
+
+    - Fresh (younger than `fresh_ttl`): served as is.
+    - Stale (up to `stale_ttl` more): served at once while one background refresh runs.
+    - Older, or not cached: fetched before responding (once for all concurrent requests); if dev.to
+      fails, the last good copy is served.
+    - Refresh-ahead: a feed requested at least `refresh_ahead_min_hits` times is renewed once
+      `refresh_ahead` of its fresh lifetime has passed, so popular feeds never go stale.
+
+    The feed is kept without expiry in the given cache backend, so every worker serves and refreshes
+    the same copy; an add-only lock key lets one of them refresh at a time, and while dev.to is
+    failing, at most once per `refresh_retry` seconds. A per-process copy covers cache evictions.
+    """
+
+    def __init__(self, devto_service, store, fresh_ttl=BLOGS_FRESH_TTL, stale_ttl=BLOGS_STALE_TTL,
+                 refresh_ahead=BLOGS_REFRESH_AHEAD, refresh_ahead_min_hits=BLOGS_REFRESH_AHEAD_MIN_HITS,
+                 refresh_retry=BLOGS_REFRESH_RETRY):
+        self.devto_service = devto_service
+        self.store = store
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+        self.refresh_ahead_min_hits = refresh_ahead_min_hits
+        self.refresh_retry = refresh_retry
+
+        self._entry = None  # (fetched_at, articles) last served or fetched by this process
+        self._hits = 0  # requests served from self._entry
+        self._refreshing = False
+        self._timer = None  # pending refresh-ahead (anything with cancel())
+        self._timer_for = None  # fetched_at of the entry the timer was scheduled for
+        self._lock = threading.Lock()
+        self._fetches = SingleFlight("blog_feed")
+
+    def get_articles(self):
+        """
+        Return the articles, or None if there is no copy at all and dev.to can't be reached.
+        """
+        entry = self._track(self._read())
+        state = self._state(entry)
+        if state == "fresh":
+            BLOG_FEED_REQUESTS.inc(result="fresh")
+            return entry[1]
+        if state == "stale":
+            BLOG_FEED_REQUESTS.inc(result="stale")
+            self._refresh_in_background()
+            return entry[1]
+
+        # Too old to serve without asking dev.to first (unless another worker already is);
+        # concurrent requests in this process wait for the same fetch
+        if entry is None or self._claim_refresh():
+            try:
+                fetched = self._fetches.do(FEED_CACHE_KEY, self._refresh, "expired" if entry else "cold")
+            except SingleFlightTimeout as e:
+                logger.warning("Blog feed fetch abandoned: %s", e)
+                fetched = None
+            if fetched is not None:
+                BLOG_FEED_REQUESTS.inc(result="refetched")
+                return fetched[1]
+        BLOG_FEED_REQUESTS.inc(result="fallback" if entry else "unavailable")
+        return entry[1] if entry else None
+
+    def fresh_for(self) -> float:
+        """
+        Seconds the copy this process served last stays fresh (0 if stale), e.g. to bound how long
+        a response rendered from it may be cached.
+        """
+        entry = self._entry
+        return max(0.0, entry[0] + self.fresh_ttl - time.time()) if entry else 0.0
+
+    def prime(self) -> bool:
+        """
+        Load the stored feed into this process, e.g. when a worker starts. Only fetches from dev.to
+        if nothing is stored and no other worker is already fetching, so a fleet of starting workers
+        costs dev.to one request. Returns True if the process now holds a copy.
+        """
+        entry = self._track(self._read(), hit=False)
+        if entry is None and self._claim_refresh():
+            try:
+                entry = self._fetches.do(FEED_CACHE_KEY, self._refresh, "cold")
+            except SingleFlightTimeout as e:
+                logger.warning("Blog feed fetch abandoned: %s", e)
+        return entry is not None
+
+    # ------------------------------------------------------------------
+    # State shared with AsyncBlogFeedService
+    # ------------------------------------------------------------------
+
+    def _read(self):
+        return self.store.get(FEED_CACHE_KEY)
+
+    def _claim_refresh(self) -> bool:
+        return bool(self.store.add(REFRESH_LOCK_KEY, time.time(), timeout=self.refresh_retry))
+
+    def _save(self, entry):
+        self.store.set(FEED_CACHE_KEY, entry, timeout=0)  # no expiry: the last good copy
+        # Released only on success: after a failure, the lock's timeout spaces out the retries
+        self.store.delete(REFRESH_LOCK_KEY)
+
+    def _state(self, entry):
+        if entry is None:
+            return None
+        age = time.time() - entry[0]
+        if age < self.fresh_ttl:
+            return "fresh"
+        if age < self.fresh_ttl + self.stale_ttl:
+            return "stale"
+        return "expired"
+
+    def _track(self, entry, hit=True):
+        """
+        Adopt `entry` (read from the store) unless this process holds a newer copy, count the
+        request against it and make sure its refresh-ahead timer is set. Returns the copy to serve.
+        """
+        with self._lock:
+            current = self._entry
+            if entry is None or (current is not None and current[0] >= entry[0]):
+                entry = current
+            elif current is None or current[0] != entry[0]:
+                self._entry, self._hits = entry, 0
+            if hit and entry is not None:
+                self._hits += 1
+
+            if entry is None or self.refresh_ahead <= 0 or self._timer_for == entry[0]:
+                return entry
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer_for = entry[0]
+            self._timer = None
+            now = time.time()
+            if now < entry[0] + self.fresh_ttl:  # stale copies are refreshed on demand instead
+                delay = max(0.0, entry[0] + self.fresh_ttl * self.refresh_ahead - now)
+                self._timer = self._start_timer(delay, entry[0])
+        return entry
+
+    def _refresh_ahead_due(self, fetched_at) -> bool:
+        """
+        Called when the timer for the copy fetched at `fetched_at` fires.
+        """
+        with self._lock:
+            self._timer = None
+            if self._entry is None or self._entry[0] != fetched_at:
+                return False  # superseded; the newer copy has its own timer
+            if self._hits < self.refresh_ahead_min_hits:
+                return False  # not popular: left to go stale and refresh on demand
+            return not self._refreshing
+
+    def _begin_refresh(self) -> bool:
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+            return True
+
+    def _end_refresh(self):
+        with self._lock:
+            self._refreshing = False
+
+    def _adopt_if_newer(self, entry, fetched_at):
+        """
+        `entry` if another worker stored it after the copy fetched at `fetched_at` (adopted by
+        this process), else None.
+        """
+        if entry is not None and (fetched_at is None or entry[0] > fetched_at):
+            return self._track(entry, hit=False)
+        return None
+
+    # ------------------------------------------------------------------
+    # Thread-based refreshes
+    # ------------------------------------------------------------------
+
+    def _start_timer(self, delay: float, fetched_at):
+        timer = threading.Timer(delay, self._on_refresh_ahead, args=(fetched_at,))
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def _on_refresh_ahead(self, fetched_at):
+        if not self._refresh_ahead_due(fetched_at):
+            return
+        newer = self._adopt_if_newer(self._read(), fetched_at)
+        if newer is None and self._claim_refresh():
+            self._refresh("ahead")
+
+    def _refresh_in_background(self):
+        if not self._begin_refresh():
+            return
+        if not self._claim_refresh():
+            self._end_refresh()
+            return
+        threading.Thread(target=self._refresh, args=("stale",), daemon=True).start()
+
+    def _refresh(self, trigger: str):
+        """
+        Fetch the feed from dev.to and store it. Returns the new (fetched_at, articles), or None.
+        """
+        with self._lock:
+            self._refreshing = True
+        try:
+            current = self._entry
+            newer = self._adopt_if_newer(self._read(), current[0] if current else None)
+            if newer is not None:
+                self.store.delete(REFRESH_LOCK_KEY)
+                return newer
+
+            articles = self.devto_service.get_articles()
+            if articles is None:
+                BLOG_FEED_REFRESHES.inc(trigger=trigger, result="failure")
+                logger.warning("Refresh (%s) failed, keeping the last good copy", trigger, extra={"trigger": trigger})
+                return None
+
+            entry = (time.time(), articles)
+            self._save(entry)
+            BLOG_FEED_REFRESHES.inc(trigger=trigger, result="success")
+            return self._track(entry, hit=False)
+        finally:
+            self._end_refresh()
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.devto_service.close()
@@ -1,30 +1,161 @@
+import logging
 import os
-from config import DEV_TO_API_URL
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from extensions import lazy_module
+from metrics import timed, DEVTO_FETCH_DURATION
+from config import (
+    DEV_TO_API_URL,
+    DEVTO_CONNECT_TIMEOUT,
+    DEVTO_READ_TIMEOUT,
+    DEVTO_MAX_RETRIES,
+    DEVTO_BACKOFF_BASE,
+    DEVTO_BACKOFF_MAX,
+    DEVTO_PER_PAGE,
+    DEVTO_MAX_PARALLEL,
+    DEVTO_MAX_PAGES,
+)
+
+requests = lazy_module("requests")
+requests_adapters = lazy_module("requests.adapters")
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limiting and transient upstream failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
 
 class DevToService:
     """
     Service to interact with the Dev.to API.
+
+    - One keep-alive session per service instance, with connect/read timeouts.
+    - Transient failures are retried with capped, fully jittered exponential backoff.
+    - Each page is requested conditionally (If-None-Match); a 304 reuses the last body.
+    - All pages of /articles/me are fetched, at most `max_parallel` at a time and no more than
+      `max_pages` in all.
     """
-    def __init__(self):
-        self.api_url = DEV_TO_API_URL
+    def __init__(self, api_url=DEV_TO_API_URL, api_key=None, connect_timeout=DEVTO_CONNECT_TIMEOUT,
+                 read_timeout=DEVTO_READ_TIMEOUT, max_retries=DEVTO_MAX_RETRIES, backoff_base=DEVTO_BACKOFF_BASE,
+                 backoff_max=DEVTO_BACKOFF_MAX, per_page=DEVTO_PER_PAGE, max_parallel=DEVTO_MAX_PARALLEL,
+                 max_pages=DEVTO_MAX_PAGES):
+        self.api_url = api_url
         self.headers = {
-            "Content-Type": "application/json",
-            "api-key": os.getenv("DEV_TO_API_KEY"),  # Ensure this is set in your environment
-            "Cache-Control": "max-age=604800, must-revalidate"
+            "Accept": "application/json",
+            "api-key": api_key or os.getenv("DEV_TO_API_KEY"),  # Ensure this is set in your environment
         }
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.per_page = per_page
+        self.max_parallel = max_parallel
+        self.max_pages = max_pages
+
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._validators = {}  # page -> (etag, articles) from the last 200 response
+        self._validators_lock = threading.Lock()
 
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = requests_adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.max_parallel)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(self.headers)
+                    self._session = session
+        return self._session
+
+    @timed(DEVTO_FETCH_DURATION)
     def get_articles(self):
         """
-        Fetch articles from the Dev.to API.
+        Fetch all articles from the Dev.to API.
+        Returns None if any page could not be fetched.
         """
-        import requests
-        
         try:
-            response = requests.get(self.api_url, headers=self.headers)
-            response.raise_for_status()  # Raise an error for bad responses
-            return response.json()
+            articles = self._fetch_page(1)
+            if len(articles) < self.per_page:
+                return articles
+
+            # More pages exist: fetch them in parallel waves until a short page shows up
+            next_page = 2
+            with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+                while next_page <= self.max_pages:
+                    pages = range(next_page, min(next_page + self.max_parallel, self.max_pages + 1))
+                    results = list(executor.map(self._fetch_page, pages))
+                    for page_articles in results:
+                        articles.extend(page_articles)
+                        if len(page_articles) < self.per_page:
+                            return articles
+                    next_page += self.max_parallel
+            logger.warning("Stopped after %s full pages of articles", self.max_pages,
+                           extra={"max_pages": self.max_pages})
+            return articles
         except requests.exceptions.RequestException as e:
-            print(f"[DevToService][get_articles] >> Error fetching articles: {e}")
+            logger.warning("Error fetching articles: %s", e)
             return None
-        
-        
\ No newline at end of file
+
+    def _fetch_page(self, page: int) -> list:
+        """
+        GET one page, sending If-None-Match when an ETag for it is known.
+        """
+        params = {"page": page, "per_page": self.per_page}
+        with self._validators_lock:
+            cached = self._validators.get(page)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+
+        response = self._request(params, headers)
+        if response.status_code == 304 and cached:
+            return list(cached[1])
+
+        response.raise_for_status()  # Raise an error for bad responses
+        articles = response.json()
+
+        etag = response.headers.get("ETag")
+        with self._validators_lock:
+            if etag:
+                self._validators[page] = (etag, articles)
+            else:
+                self._validators.pop(page, None)
+        return list(articles)
+
+    def _request(self, params: dict, headers: dict):
+        """
+        GET with bounded retries on connection errors, timeouts and retryable statuses.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(self.api_url, params=params, headers=headers, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._retry_after(response) or self._backoff(attempt)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+
+            attempt += 1
+            time.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _retry_after(self, response):
+        value = response.headers.get("Retry-After")
+        if value and value.isdigit():
+            return min(float(value), self.backoff_max)
+        return None
+
+    def close(self):
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
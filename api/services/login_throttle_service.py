@@ -0,0 +1,199 @@
+import ipaddress
+import math
+import threading
+import time
+from config import (
+    RATE_LIMIT_SWEEP_INTERVAL,
+    LOGIN_IP_RATE,
+    LOGIN_IP_BURST,
+    LOGIN_USERNAME_RATE,
+    LOGIN_USERNAME_BURST,
+    LOGIN_LOCKOUT_THRESHOLD,
+    LOGIN_LOCKOUT_BASE,
+    LOGIN_LOCKOUT_MAX,
+    USER_CREATE_IP_RATE,
+    USER_CREATE_IP_BURST,
+)
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by an arbitrary hashable (e.g. an IP address).
+    Each key holds up to `burst` tokens, refilled at `rate` tokens per second.
+
+    State is two floats per key, and only for keys seen recently: a bucket that has
+    refilled completely is indistinguishable from a new one, so sweep() drops it.
+    Not thread-safe on its own; LoginThrottle serializes access.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}  # key -> [tokens, updated_at]
+
+    def _tokens(self, key, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return self.burst
+        return min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+
+    def wait_time(self, key, now: float) -> float:
+        """
+        Seconds until one token is available (0 if one is available now).
+        """
+        missing = 1 - self._tokens(key, now)
+        return missing / self.rate if missing > 0 else 0.0
+
+    def consume(self, key, now: float, cost: float = 1):
+        """
+        Take `cost` tokens. A cost above what is left leaves the bucket in debt, so the key
+        waits until it has refilled past zero again.
+        """
+        self._buckets[key] = [self._tokens(key, now) - cost, now]
+
+    def sweep(self, now: float) -> int:
+        full = [key for key, (tokens, updated_at) in self._buckets.items()
+                if tokens + (now - updated_at) * self.rate >= self.burst]
+        for key in full:
+            del self._buckets[key]
+        return len(full)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class LoginThrottle:
+    """
+    In-process limiter for credential endpoints, checked before any RSA or Argon2 work.
+
+    - Login attempts draw one token from the client IP's bucket.
+    - Failed logins also draw from a bucket keyed by username and client network (/24 for IPv4,
+      /64 for IPv6), which bounds guesses spread across the addresses of one network. Neither
+      successful logins nor attempts from other networks can empty it, so a third party can't
+      throttle a user's logins from where they actually are.
+    - After `lockout_threshold` consecutive failures for an (IP, username) pair, that pair is
+      locked out for lockout_base * 2^(extra failures) seconds, capped at lockout_max. A success
+      clears the pair's failures.
+    - User creation draws from a separate per-IP bucket, one token per user created.
+
+    Idle keys are swept every `sweep_interval` seconds. State is per process.
+    """
+
+    def __init__(self, ip_rate=LOGIN_IP_RATE, ip_burst=LOGIN_IP_BURST, username_rate=LOGIN_USERNAME_RATE,
+                 username_burst=LOGIN_USERNAME_BURST, lockout_threshold=LOGIN_LOCKOUT_THRESHOLD,
+                 lockout_base=LOGIN_LOCKOUT_BASE, lockout_max=LOGIN_LOCKOUT_MAX,
+                 create_ip_rate=USER_CREATE_IP_RATE, create_ip_burst=USER_CREATE_IP_BURST,
+                 sweep_interval=RATE_LIMIT_SWEEP_INTERVAL):
+        self.ip_buckets = TokenBucketLimiter(ip_rate, ip_burst)
+        self.username_buckets = TokenBucketLimiter(username_rate, username_burst)
+        self.create_buckets = TokenBucketLimiter(create_ip_rate, create_ip_burst)
+        self.lockout_threshold = lockout_threshold
+        self.lockout_base = lockout_base
+        self.lockout_max = lockout_max
+        self.sweep_interval = sweep_interval
+
+        self._failures = {}  # (ip, username) -> [consecutive failures, locked_until, last_failure]
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._stats = {"allowed": 0, "throttled": 0, "locked_out": 0}
+
+    def check_login(self, ip: str, username: str) -> int:
+        """
+        Admit a login attempt, or return the number of seconds to wait before retrying.
+        Returns 0 (and consumes tokens) when the attempt may proceed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._maybe_sweep(now)
+
+            failure = self._failures.get((ip, username))
+            if failure is not None and failure[1] > now:
+                self._stats["locked_out"] += 1
+                return math.ceil(failure[1] - now)
+
+            wait = max(self.ip_buckets.wait_time(ip, now),
+                       self.username_buckets.wait_time(_username_key(ip, username), now))
+            if wait > 0:
+                self._stats["throttled"] += 1
+                return math.ceil(wait)
+
+            self.ip_buckets.consume(ip, now)
+            self._stats["allowed"] += 1
+            return 0
+
+    def check_create(self, ip: str, count: int = 1) -> int:
+        """
+        Admit a request creating `count` users, or return the number of seconds to wait before
+        retrying. A batch is admitted while the IP has a token left and charged in full, so the
+        IP's next creation waits until the batch has been paid for.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._maybe_sweep(now)
+
+            wait = self.create_buckets.wait_time(ip, now)
+            if wait > 0:
+                self._stats["throttled"] += 1
+                return math.ceil(wait)
+
+            self.create_buckets.consume(ip, now, max(count, 1))
+            self._stats["allowed"] += 1
+            return 0
+
+    def record_failure(self, ip: str, username: str):
+        now = time.monotonic()
+        with self._lock:
+            self.username_buckets.consume(_username_key(ip, username), now)
+
+            failure = self._failures.get((ip, username))
+            if failure is None or now - failure[2] > self.lockout_max:
+                failure = self._failures[(ip, username)] = [0, 0.0, now]
+
+            failure[0] += 1
+            failure[2] = now
+            extra = failure[0] - self.lockout_threshold
+            if extra >= 0:
+                failure[1] = now + min(self.lockout_max, self.lockout_base * (2 ** min(extra, 32)))
+
+    def record_success(self, ip: str, username: str):
+        with self._lock:
+            self._failures.pop((ip, username), None)
+
+    def _maybe_sweep(self, now: float):
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+
+        self.ip_buckets.sweep(now)
+        self.username_buckets.sweep(now)
+        self.create_buckets.sweep(now)
+        # Failure counts are forgotten once idle for lockout_max, as in record_failure
+        stale = [key for key, (_, locked_until, last_failure) in self._failures.items()
+                 if locked_until <= now and now - last_failure > self.lockout_max]
+        for key in stale:
+            del self._failures[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "ip_keys": len(self.ip_buckets),
+                "username_keys": len(self.username_buckets),
+                "create_keys": len(self.create_buckets),
+                "failure_keys": len(self._failures),
+            }
+
+
+def _username_key(ip: str, username: str):
+    """
+    (username, client network) for the failed-login bucket.
+    """
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return username, ip
+    prefix = 24 if address.version == 4 else 64
+    return username, str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+
+login_throttle = LoginThrottle()
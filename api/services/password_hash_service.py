@@ -0,0 +1,171 @@
+import threading
+import concurrent.futures
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from extensions import lazy_module
+from metrics import timed, PASSWORD_HASH_DURATION
+from config import (
+    ARGON2_TIME_COST,
+    ARGON2_MEMORY_COST,
+    ARGON2_PARALLELISM,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_QUEUE_SIZE,
+    PASSWORD_HASH_TIMEOUT,
+)
+
+# Imported on first hash/verify to keep cold starts light
+argon2 = lazy_module("argon2")
+argon2_exceptions = lazy_module("argon2.exceptions")
+
+
+class PasswordHashUnavailable(Exception):
+    """
+    Raised when a hash/verify job cannot be queued or does not finish in time.
+    Routes surface this as 503 so clients back off instead of piling up.
+    """
+
+
+def build_password_hasher(time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST,
+                          parallelism=ARGON2_PARALLELISM):
+    return argon2.PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+
+# Shared hasher for the current process (also used inside each worker process), built on first use
+_password_hasher = None
+
+
+def get_password_hasher():
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = build_password_hasher()
+    return _password_hasher
+
+
+def _hash(password: str) -> str:
+    return get_password_hasher().hash(password)
+
+
+def _verify(stored_hash: str, password: str) -> bool:
+    try:
+        return get_password_hasher().verify(stored_hash, password)
+    except (argon2_exceptions.VerificationError, argon2_exceptions.InvalidHashError):
+        return False
+
+
+class PasswordHashService:
+    """
+    Runs Argon2 hash/verify off the request thread in a process pool.
+
+    At most `workers + queue_size` jobs may be pending; further calls fail
+    immediately with PasswordHashUnavailable, as do jobs that exceed `timeout`.
+    With workers=0 the work runs inline on the calling thread (useful where
+    forking is unavailable, e.g. some serverless runtimes).
+    """
+
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, queue_size=PASSWORD_HASH_QUEUE_SIZE,
+                 timeout=PASSWORD_HASH_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_size)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _submit(self, fn, *args):
+        """
+        Admit a job and hand it to the worker pool, returning its future.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashUnavailable("Password hashing queue is full")
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _run(self, fn, *args):
+        if self.workers == 0:
+            if not self._slots.acquire(blocking=False):
+                raise PasswordHashUnavailable("Password hashing queue is full")
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+
+        future = self._submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHashUnavailable(f"Password hashing timed out after {self.timeout}s")
+
+    @timed(PASSWORD_HASH_DURATION, operation="hash")
+    def hash(self, password: str) -> str:
+        """
+        Hash a password with the shared Argon2 parameters.
+        """
+        return self._run(_hash, password)
+
+    @timed(PASSWORD_HASH_DURATION, operation="verify")
+    def verify(self, stored_hash: str, password: str) -> bool:
+        """
+        Check a password against a stored Argon2 hash.
+        """
+        return self._run(_verify, stored_hash, password)
+
+    @timed(PASSWORD_HASH_DURATION, operation="hash_many")
+    def hash_many(self, passwords: list) -> list:
+        """
+        Hash several passwords in parallel, returning the hashes in order. At most one job per
+        worker process is in flight at a time, so a batch doesn't take the queue slots that
+        other requests' jobs need.
+        """
+        if self.workers == 0:
+            return [self._run(_hash, password) for password in passwords]
+
+        hashes = [None] * len(passwords)
+        pending = {}  # future -> index in passwords
+        next_index = 0
+        try:
+            while next_index < len(passwords) or pending:
+                while next_index < len(passwords) and len(pending) < self.workers:
+                    try:
+                        future = self._submit(_hash, passwords[next_index])
+                    except PasswordHashUnavailable:
+                        if not pending:
+                            raise
+                        break  # wait for one of ours to finish instead
+                    pending[future] = next_index
+                    next_index += 1
+
+                done, _ = concurrent.futures.wait(pending, timeout=self.timeout,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                if not done:
+                    raise PasswordHashUnavailable(f"Password hashing timed out after {self.timeout}s")
+                for future in done:
+                    hashes[pending.pop(future)] = future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+        return hashes
+
+    def shutdown(self, wait: bool = False):
+        """
+        Stop the worker processes. Pass wait=True where interpreter exit hooks won't run
+        (e.g. in multiprocessing children), otherwise the workers can be left behind.
+        """
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+
+password_hash_service = PasswordHashService()
@@ -1,22 +1,74 @@
+import logging
+import uuid
+import threading
 from database.database import get_connection
-from psycopg2.extras import RealDictCursor
+from database.statements import execute_statement
+from psycopg2.extras import RealDictCursor, execute_values
 from database.helpers import verify_hashed_password
+from extensions import TTLCache, SingleFlight, SingleFlightTimeout
+from metrics import timed, register_cache_stats, DB_QUERY_DURATION
+from config import (
+    USERS_STREAM_BATCH_SIZE,
+    USERS_BATCH_MAX_SIZE,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL,
+    USER_CACHE_NEGATIVE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cached marker for usernames known not to exist
+_NOT_FOUND = False
+
+# Single-flight key prefix for the narrow records used by login
+_AUTH_KEY = "auth"
+
+
+def _escape_like(value: str) -> str:
+    # Match the text literally inside a LIKE pattern (backslash is the default escape)
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 class ProjectUsersService:
     """
     Service to manage project users
+
+    User lookups by username go through a read-through cache shared by all instances in
+    the process (positive entries for USER_CACHE_TTL, unknown usernames for
+    USER_CACHE_NEGATIVE_TTL). Every write drops the affected usernames from it.
+    Concurrent misses for the same username share one query.
+
+    Login never reads the cache: invalidation only reaches this process, and a user deactivated
+    or deleted through another worker must not keep logging in for USER_CACHE_TTL.
     """
+
+    user_cache = TTLCache(maxsize=USER_CACHE_SIZE, default_ttl=USER_CACHE_TTL)
+    user_lookups = SingleFlight("users")
+
+    # Bumped on every invalidation, so a lookup that raced with a write doesn't cache the old row
+    _cache_generation = 0
+    _cache_lock = threading.Lock()
     
-    def __init__(self):
-        pass
+    def __init__(self, batch_size_limit: int = USERS_BATCH_MAX_SIZE):
+        self.batch_size_limit = batch_size_limit
+
+    @classmethod
+    def invalidate_users(cls, usernames):
+        """
+        Drop cached records for the given usernames.
+        """
+        with cls._cache_lock:
+            cls._cache_generation += 1
+            for username in usernames:
+                cls.user_cache.delete(username)
     
+    @timed(DB_QUERY_DURATION, query="get_all_users")
     def get_all_users(self):
         """
         Retrieve all project users from the database.
         """
         conn = get_connection()
         if not conn:
-            print("Failed to connect to the database.")
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
             return None
         
         cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -26,139 +78,480 @@ class ProjectUsersService:
             users = cur.fetchall()
             return users
         except Exception as e:
-            print(f"Error fetching users: {e}")
+            logger.exception("Error fetching users: %s", e)
             return None
         finally:
             cur.close()
             conn.close()
-            
+
+    @timed(DB_QUERY_DURATION, query="get_users_page")
+    def get_users_page(self, limit: int, after: tuple = None):
+        """
+        Retrieve one page of project users ordered by (created_at, id), users without a
+        created_at last. `after` is the (created_at, id) of the last row of the previous page.
+        Returns (users, next_position) where next_position is None on the last page.
+        """
+        conn = get_connection()
+        if not conn:
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
+            return None, None
+
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+
+        try:
+            # Fetch one extra row to know whether another page exists
+            if after is None:
+                cur.execute("""
+                    SELECT id, project_name, username, created_at, is_active FROM project_users
+                    ORDER BY created_at, id
+                    LIMIT %s;
+                """, (limit + 1,))
+            elif after[0] is None:
+                cur.execute("""
+                    SELECT id, project_name, username, created_at, is_active FROM project_users
+                    WHERE created_at IS NULL AND id > %s
+                    ORDER BY created_at, id
+                    LIMIT %s;
+                """, (after[1], limit + 1))
+            else:
+                # (created_at, id) > (...) never matches a NULL created_at, so the rows that sort
+                # last are read separately. Each branch is an index range scan.
+                cur.execute("""
+                    SELECT * FROM (
+                        (SELECT id, project_name, username, created_at, is_active FROM project_users
+                         WHERE (created_at, id) > (%s, %s)
+                         ORDER BY created_at, id
+                         LIMIT %s)
+                        UNION ALL
+                        (SELECT id, project_name, username, created_at, is_active FROM project_users
+                         WHERE created_at IS NULL
+                         ORDER BY id
+                         LIMIT %s)
+                    ) AS page
+                    ORDER BY created_at, id
+                    LIMIT %s;
+                """, (after[0], after[1], limit + 1, limit + 1, limit + 1))
+
+            users = cur.fetchall()
+            if len(users) <= limit:
+                return users, None
+
+            users = users[:limit]
+            last = users[-1]
+            return users, (last['created_at'], last['id'])
+        except Exception as e:
+            logger.exception("Error fetching users page: %s", e)
+            return None, None
+        finally:
+            cur.close()
+            conn.close()
+
+    @timed(DB_QUERY_DURATION, query="iter_all_users")
+    def iter_all_users(self, batch_size: int = USERS_STREAM_BATCH_SIZE):
+        """
+        Yield every project user through a server-side (named) cursor so that
+        memory use stays constant regardless of table size.
+        Raises ConnectionError if the database is unavailable, and re-raises query errors,
+        so a caller can tell a failed stream from an empty table.
+        """
+        conn = get_connection()
+        if not conn:
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
+            raise ConnectionError("Database unavailable")
+
+        # Named cursors live on the server and are fetched `itersize` rows at a time
+        cur = conn.cursor(name=f"project_users_export_{uuid.uuid4().hex}", cursor_factory=RealDictCursor)
+        cur.itersize = batch_size
+
+        try:
+            cur.execute("SELECT id, project_name, username, created_at, is_active FROM project_users ORDER BY created_at, id;")
+            for user in cur:
+                yield user
+        except Exception as e:
+            logger.exception("Error streaming users: %s", e)
+            raise
+        finally:
+            try:
+                cur.close()
+            except Exception:
+                pass
+            conn.close()
+
+    @staticmethod
+    def build_search_query(filters: dict, limit: int, after: tuple = None):
+        """
+        SQL and parameters for search_users(). Recognized filters (all optional, ANDed):
+        project_prefix, project_contains, username_prefix, username_contains (case-sensitive),
+        is_active (bool), created_after / created_before (exclusive datetimes).
+        """
+        conditions = []
+        params = []
+        for field, column in (("project", "project_name"), ("username", "username")):
+            if filters.get(f"{field}_prefix"):
+                conditions.append(f"{column} LIKE %s")
+                params.append(_escape_like(filters[f"{field}_prefix"]) + "%")
+            if filters.get(f"{field}_contains"):
+                conditions.append(f"{column} LIKE %s")
+                params.append("%" + _escape_like(filters[f"{field}_contains"]) + "%")
+        if filters.get("is_active") is not None:
+            conditions.append("is_active = %s")
+            params.append(filters["is_active"])
+        if filters.get("created_after") is not None:
+            conditions.append("created_at > %s")
+            params.append(filters["created_after"])
+        if filters.get("created_before") is not None:
+            conditions.append("created_at < %s")
+            params.append(filters["created_before"])
+        if after is not None:
+            conditions.append("(created_at, id) > (%s, %s)")
+            params.extend(after)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"""
+            SELECT id, project_name, username, created_at, is_active FROM project_users
+            {where}
+            ORDER BY created_at, id
+            LIMIT %s;
+        """
+        # One extra row tells whether another page exists
+        return query, params + [limit + 1]
+
+    @timed(DB_QUERY_DURATION, query="search_users")
+    def search_users(self, filters: dict, limit: int, after: tuple = None):
+        """
+        Retrieve one page of project users matching `filters` (see build_search_query),
+        ordered by (created_at, id). Returns (users, next_position) like get_users_page.
+        """
+        conn = get_connection()
+        if not conn:
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
+            return None, None
+
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+
+        try:
+            cur.execute(*self.build_search_query(filters, limit, after))
+            users = cur.fetchall()
+            if len(users) <= limit:
+                return users, None
+
+            users = users[:limit]
+            last = users[-1]
+            return users, (last['created_at'], last['id'])
+        except Exception as e:
+            logger.exception("Error searching users: %s", e)
+            return None, None
+        finally:
+            cur.close()
+            conn.close()
+
     def get_user_by_username(self, username: str):
         """
         Retrieve a project user by their Username.
+        Served from the user cache when possible; returns None if not found or on error.
+        """
+        return self._cached_lookup(username, username, self._fetch_user_by_username)
+
+    def get_auth_record(self, username: str):
+        """
+        Retrieve only what login needs (id, password_hash, is_active) for a username.
+        Always read from the database; concurrent logins for one username share the query.
+        Returns None if not found or on error.
+        """
+        try:
+            found, record = self.user_lookups.do((_AUTH_KEY, username), self._fetch_auth_record, username)
+        except SingleFlightTimeout as e:
+            logger.warning("User lookup abandoned: %s", e)
+            return None
+        return dict(record) if found and record is not None else None  # callers may share the leader's record
+
+    def _cached_lookup(self, key, username: str, fetch):
+        cached = self.user_cache.get(key)
+        if cached is not None:
+            return dict(cached) if cached is not _NOT_FOUND else None
+
+        try:
+            record = self.user_lookups.do(key, self._load, key, username, fetch)
+        except SingleFlightTimeout as e:
+            logger.warning("User lookup abandoned: %s", e)
+            return None
+        return dict(record) if record is not None else None  # callers may share the leader's record
+
+    def _load(self, key, username: str, fetch):
+        generation = self._cache_generation
+        found, record = fetch(username)
+        if not found:
+            return None  # Database error; nothing to cache
+
+        with self._cache_lock:
+            if generation == self._cache_generation:
+                if record is None:
+                    self.user_cache.set(key, _NOT_FOUND, USER_CACHE_NEGATIVE_TTL)
+                else:
+                    self.user_cache.set(key, dict(record))
+        return record
+
+    @timed(DB_QUERY_DURATION, query="get_user_by_username")
+    def _fetch_user_by_username(self, username: str):
+        """
+        Query one user. Returns (True, user or None) on success and (False, None) on error.
         """
+        return self._fetch_one("user_by_username", username)
+
+    @timed(DB_QUERY_DURATION, query="get_auth_record")
+    def _fetch_auth_record(self, username: str):
+        """
+        Query a user's login fields. Returns (True, record or None) on success and (False, None) on error.
+        """
+        return self._fetch_one("user_auth_by_username", username)
+
+    def _fetch_one(self, statement: str, username: str):
         conn = get_connection()
         if not conn:
-            print("Failed to connect to the database.")
-            return None
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
+            return False, None
         
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
-            cur.execute("SELECT id, project_name, username, password_hash, created_at, is_active FROM project_users WHERE username = %s;", (username,))
-            user = cur.fetchone()
-            return user
+            execute_statement(cur, statement, (username,))
+            return True, cur.fetchone()
         except Exception as e:
-            print(f"Error fetching user by ID: {e}")
-            return None
+            logger.exception("Error fetching user by username: %s", e)
+            return False, None
         finally:
             cur.close()
             conn.close()
             
+    @timed(DB_QUERY_DURATION, query="create_user")
     def create_user(self, project_name: str, username: str, password_hash: str):
         """
         Create a new project user.
         """
         conn = get_connection()
         if not conn:
-            print("Failed to connect to the database.")
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
             return None
         
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         try:
-            cur.execute("""
-                INSERT INTO project_users (project_name, username, password_hash)
-                VALUES (%s, %s, %s)
-                RETURNING id, project_name, username, created_at, is_active;
-            """, (project_name, username, password_hash))
+            execute_statement(cur, "insert_user", (project_name, username, password_hash))
             
             new_user = cur.fetchone()
             conn.commit()
             return new_user
         except Exception as e:
-            print(f"Error creating user: {e}")
+            logger.error("Error creating user: %s", e)
             conn.rollback()
             return None
         finally:
             cur.close()
             conn.close()
+            self.invalidate_users([username])
                 
+    @timed(DB_QUERY_DURATION, query="delete_user")
     def delete_user(self, username: str) -> bool:
         """
         Delete a project user by their username.
         """
         conn = get_connection()
         if not conn:
-            print("Failed to connect to the database.")
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
             return False
         
         cur = conn.cursor()
         
         try:
-            cur.execute("DELETE FROM project_users WHERE username = %s;", (username,))
+            execute_statement(cur, "delete_user", (username,))
             conn.commit()
             return cur.rowcount > 0
         except Exception as e:
-            print(f"Error deleting user: {e}")
+            logger.exception("Error deleting user: %s", e)
             conn.rollback()
             return False
         finally:
             cur.close()
             conn.close()
+            self.invalidate_users([username])
             
+    @timed(DB_QUERY_DURATION, query="activate_user")
     def activate_user(self, username: str) -> bool:
         """
         Activate a project user account.
         """
         conn = get_connection()
         if not conn:
-            print("Failed to connect to the database.")
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
             return False
         
         cur = conn.cursor()
         
         try:
-            cur.execute("UPDATE project_users SET is_active = TRUE WHERE username = %s;", (username,))
+            execute_statement(cur, "activate_user", (username,))
             conn.commit()
             return cur.rowcount > 0
         except Exception as e:
-            print(f"Error activating user: {e}")
+            logger.exception("Error activating user: %s", e)
             conn.rollback()
             return False
         finally:
             cur.close()
             conn.close()
+            self.invalidate_users([username])
             
+    @timed(DB_QUERY_DURATION, query="deactivate_user")
     def deactivate_user(self, username: str) -> bool:
         """
         Deactivate a project user account.
         """
         conn = get_connection()
         if not conn:
-            print("Failed to connect to the database.")
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
             return False
         
         cur = conn.cursor()
         
         try:
-            cur.execute("UPDATE project_users SET is_active = FALSE WHERE username = %s;", (username,))
+            execute_statement(cur, "deactivate_user", (username,))
             conn.commit()
             return cur.rowcount > 0
         except Exception as e:
-            print(f"Error deactivating user: {e}")
+            logger.exception("Error deactivating user: %s", e)
             conn.rollback()
             return False
         finally:
             cur.close()
             conn.close()
+            self.invalidate_users([username])
             
     def validate_user(self, username: str, password: str) -> bool:
         """
         Validate user credentials.
         """
-        user = self.get_user_by_username(username)
+        return self.authenticate(username, password) is not None
+
+    def authenticate(self, username: str, password: str):
+        """
+        Check credentials with a single lookup of the login fields.
+        Returns the record (id, password_hash, is_active) if they are valid and the account is active, else None.
+        """
+        user = self.get_auth_record(username)
         if not user:
-            return False
+            return None
         
-        return verify_hashed_password(user['password_hash'], password) and user['is_active']
-        
\ No newline at end of file
+        if not verify_hashed_password(user['password_hash'], password) or not user['is_active']:
+            return None
+        return user
+
+    def _check_batch_size(self, items: list):
+        if len(items) > self.batch_size_limit:
+            raise ValueError(f"Batch too large: {len(items)} items (limit {self.batch_size_limit})")
+
+    @timed(DB_QUERY_DURATION, query="create_users")
+    def create_users(self, users: list):
+        """
+        Create several project users in a single transaction.
+        `users` is a list of (project_name, username, password_hash) tuples.
+        Rows that clash with an existing project name or username are skipped.
+        Returns a dict of username -> created user (or None if skipped), or None on error.
+        Raises ValueError if the batch exceeds the configured limit.
+        """
+        self._check_batch_size(users)
+        if not users:
+            return {}
+
+        conn = get_connection()
+        if not conn:
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
+            return None
+
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+
+        try:
+            created = execute_values(cur, """
+                INSERT INTO project_users (project_name, username, password_hash)
+                VALUES %s
+                ON CONFLICT DO NOTHING
+                RETURNING id, project_name, username, created_at, is_active;
+            """, users, page_size=len(users), fetch=True)
+            conn.commit()
+
+            created_by_username = {user['username']: user for user in created}
+            return {username: created_by_username.get(username) for _, username, _ in users}
+        except Exception as e:
+            logger.error("Error creating users: %s", e)
+            conn.rollback()
+            return None
+        finally:
+            cur.close()
+            conn.close()
+            self.invalidate_users(username for _, username, _ in users)
+
+    @timed(DB_QUERY_DURATION, query="delete_users")
+    def delete_users(self, usernames: list):
+        """
+        Delete several project users in a single statement.
+        Returns a dict of username -> deleted flag, or None on error.
+        Raises ValueError if the batch exceeds the configured limit.
+        """
+        return self._update_users_by_username(
+            "DELETE FROM project_users WHERE username = ANY(%s) RETURNING username;",
+            usernames, "deleting"
+        )
+
+    @timed(DB_QUERY_DURATION, query="activate_users")
+    def activate_users(self, usernames: list):
+        """
+        Activate several project user accounts in a single statement.
+        Returns a dict of username -> updated flag, or None on error.
+        Raises ValueError if the batch exceeds the configured limit.
+        """
+        return self._update_users_by_username(
+            "UPDATE project_users SET is_active = TRUE WHERE username = ANY(%s) RETURNING username;",
+            usernames, "activating"
+        )
+
+    @timed(DB_QUERY_DURATION, query="deactivate_users")
+    def deactivate_users(self, usernames: list):
+        """
+        Deactivate several project user accounts in a single statement.
+        Returns a dict of username -> updated flag, or None on error.
+        Raises ValueError if the batch exceeds the configured limit.
+        """
+        return self._update_users_by_username(
+            "UPDATE project_users SET is_active = FALSE WHERE username = ANY(%s) RETURNING username;",
+            usernames, "deactivating"
+        )
+
+    def _update_users_by_username(self, query: str, usernames: list, action: str):
+        """
+        Run a `... WHERE username = ANY(%s) RETURNING username` statement in one transaction.
+        """
+        self._check_batch_size(usernames)
+        if not usernames:
+            return {}
+
+        conn = get_connection()
+        if not conn:
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
+            return None
+
+        cur = conn.cursor()
+
+        try:
+            cur.execute(query, (list(usernames),))
+            affected = {row[0] for row in cur.fetchall()}
+            conn.commit()
+            return {username: username in affected for username in usernames}
+        except Exception as e:
+            logger.exception("Error %s users: %s", action, e)
+            conn.rollback()
+            return None
+        finally:
+            cur.close()
+            conn.close()
+            self.invalidate_users(usernames)
+
+
+register_cache_stats("users", ProjectUsersService.user_cache.stats)
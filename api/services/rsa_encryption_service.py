@@ -1,15 +1,119 @@
+import logging
 import os
+import re
+import json
+import hashlib
+import threading
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
 import base64
+from extensions import TTLCache
+from metrics import register_cache_stats, RSA_DECRYPT_DURATION
+from config import SESSION_KEY_CACHE_SIZE, SESSION_KEY_TTL
+
+logger = logging.getLogger(__name__)
+
+# Hybrid envelope: "env1.<kid>.<wrapped_key>.<nonce>.<ciphertext>", each part base64url without padding.
+# - wrapped_key: RSA-OAEP(SHA-256) encryption of a random 32-byte AES key; may be left empty once the
+#   server has seen it, in which case the cached key for <kid> is used
+# - kid: base64url(SHA-256(wrapped_key bytes)[:16]); also used as AES-GCM associated data
+# - nonce: 12 random bytes, unique per payload
+ENVELOPE_PREFIX = "env1."
+
+PEM_BLOCK = re.compile(r"-----BEGIN [A-Z ]+-----.*?-----END [A-Z ]+-----", re.DOTALL)
+
+OAEP_PADDING = padding.OAEP(
+    mgf=padding.MGF1(algorithm=hashes.SHA256()),
+    algorithm=hashes.SHA256(),
+    label=None
+)
+
+
+def _b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _b64url_uint(value: int) -> str:
+    return _b64url_encode(value.to_bytes((value.bit_length() + 7) // 8, 'big'))
+
+
+def envelope_key_id(wrapped_key: bytes) -> str:
+    return _b64url_encode(hashlib.sha256(wrapped_key).digest()[:16])
+
+
+def public_jwk(public_key) -> dict:
+    """
+    JWK for an RSA public key, with `kid` set to its RFC 7638 thumbprint.
+    """
+    numbers = public_key.public_numbers()
+    required = {"e": _b64url_uint(numbers.e), "kty": "RSA", "n": _b64url_uint(numbers.n)}
+    thumbprint = hashlib.sha256(json.dumps(required, separators=(',', ':'), sort_keys=True).encode('utf-8')).digest()
+    return {**required, "kid": _b64url_encode(thumbprint), "use": "enc", "alg": "RSA-OAEP-256"}
+
 
 class RSAEncryption:
+    """
+    Process-wide RSA key manager.
+
+    Keys are parsed from the environment on first use, not at construction:
+    - RSA_PRIVATE_KEY / RSA_PUBLIC_KEY: the current key pair (the public key is derived if omitted)
+    - RSA_RETIRED_PRIVATE_KEYS: optional concatenated PEMs still accepted for decryption during rotation
+    The public PEM and JWKS are serialized once and reused.
+    """
+    # Unwrapped AES session keys shared by all instances in the process
+    session_keys = TTLCache(maxsize=SESSION_KEY_CACHE_SIZE, default_ttl=SESSION_KEY_TTL)
+
     def __init__(self):
-        self.private_key = self.load_private_key()
-        self.public_key = self.load_public_key()
-        
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._private_keys = []  # [(kid, private_key)], current key first
+        self._public_key = None
+        self._key_id = None
+        self._public_key_pem = None
+        self._jwks = None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+
+            private_key = self.load_private_key()
+            public_key = self.load_public_key()
+            if public_key is None and private_key is not None:
+                public_key = private_key.public_key()
+
+            keys = []
+            if private_key is not None:
+                keys.append(private_key)
+            keys.extend(self.load_retired_private_keys())
+            self._private_keys = [(public_jwk(key.public_key())["kid"], key) for key in keys]
+
+            jwks = []
+            if public_key is not None:
+                current = public_jwk(public_key)
+                self._key_id = current["kid"]
+                self._public_key_pem = public_key.public_bytes(
+                    encoding=serialization.Encoding.PEM,
+                    format=serialization.PublicFormat.SubjectPublicKeyInfo
+                )
+                jwks.append(current)
+            for kid, key in self._private_keys:
+                if kid != self._key_id:
+                    jwks.append(public_jwk(key.public_key()))
+
+            self._public_key = public_key
+            self._jwks = {"keys": jwks}
+            self._loaded = True
+
     def load_private_key(self):
         # Load private key from environment variable
         private_key = os.getenv("RSA_PRIVATE_KEY")
@@ -17,7 +121,7 @@ class RSAEncryption:
             return serialization.load_pem_private_key(private_key.encode('utf-8'), password=None, backend=default_backend())
         else:
             return None
-        
+
     def load_public_key(self):
         # Load public key from environment variable
         public_key = os.getenv("RSA_PUBLIC_KEY")
@@ -25,42 +129,148 @@ class RSAEncryption:
             return serialization.load_pem_public_key(public_key.encode('utf-8'), backend=default_backend())
         else:
             return None
-    
+
+    def load_retired_private_keys(self):
+        # Load previous private keys (one or more concatenated PEM blocks) kept for key rotation
+        retired = os.getenv("RSA_RETIRED_PRIVATE_KEYS", "")
+        return [
+            serialization.load_pem_private_key(block.encode('utf-8'), password=None, backend=default_backend())
+            for block in PEM_BLOCK.findall(retired)
+        ]
+
+    @property
+    def private_key(self):
+        self._ensure_loaded()
+        return self._private_keys[0][1] if self._private_keys else None
+
+    @property
+    def public_key(self):
+        self._ensure_loaded()
+        return self._public_key
+
+    @property
+    def key_id(self):
+        """ Key ID (JWK thumbprint) of the current public key """
+        self._ensure_loaded()
+        return self._key_id
+
+    @property
+    def public_key_pem(self) -> bytes:
+        """ Current public key in PEM (SubjectPublicKeyInfo) form, or None """
+        self._ensure_loaded()
+        return self._public_key_pem
+
+    @property
+    def jwks(self) -> dict:
+        """ JSON Web Key Set of the current and retired public keys """
+        self._ensure_loaded()
+        return self._jwks
+
     def encrypt(self, plaintext):
         if self.public_key:
             try:
-                ciphertext = self.public_key.encrypt(
-                    plaintext.encode('utf-8'),
-                    padding.OAEP(
-                        mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                        algorithm=hashes.SHA256(),
-                        label=None
-                    )
-                )
+                ciphertext = self.public_key.encrypt(plaintext.encode('utf-8'), OAEP_PADDING)
                 return base64.b64encode(ciphertext).decode('utf-8')  # return Base64
             except Exception as e:
-                print(f"[RSAEncryption][encrypt] >> Error encrypting data: {e}")
+                logger.error("Error encrypting data: %s", e)
                 return None
         else:
             raise ValueError("Public key not loaded")
-        
+
     def decrypt(self, ciphertext_b64):
+        """
+        Decrypt either a hybrid envelope (see ENVELOPE_PREFIX) or a legacy Base64 RSA-OAEP ciphertext.
+        """
+        if isinstance(ciphertext_b64, str) and ciphertext_b64.startswith(ENVELOPE_PREFIX):
+            with RSA_DECRYPT_DURATION.time(format="envelope"):
+                return self.decrypt_envelope(ciphertext_b64)
+
         if self.private_key:
-            try:
-                ciphertext = base64.b64decode(ciphertext_b64)  # decode from base64
-                plaintext = self.private_key.decrypt(
-                    ciphertext,
-                    padding.OAEP(
-                        mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                        algorithm=hashes.SHA256(),
-                        label=None
-                    )
-                )
-                return plaintext.decode('utf-8')
-            except Exception as e:
-                print(f"[RSAEncryption][decrypt] >> Error decrypting data: {e}")
-                return None
+            with RSA_DECRYPT_DURATION.time(format="legacy"):
+                try:
+                    ciphertext = base64.b64decode(ciphertext_b64)  # decode from base64
+                    plaintext = self._rsa_decrypt(ciphertext)
+                    return plaintext.decode('utf-8')
+                except Exception as e:
+                    logger.warning("Error decrypting data: %s", e, extra={"sample": "decrypt_failed"})
+                    return None
         else:
             raise ValueError("Private key not loaded")
-        
-    
\ No newline at end of file
+
+    def _rsa_decrypt(self, ciphertext: bytes) -> bytes:
+        """
+        RSA-OAEP decrypt with the current key, falling back to retired keys.
+        """
+        error = None
+        for _, key in self._private_keys:
+            try:
+                return key.decrypt(ciphertext, OAEP_PADDING)
+            except ValueError as e:
+                error = e
+        raise error
+
+    def encrypt_envelope(self, plaintext, session_key=None, wrapped_key=None, include_wrapped_key=True):
+        """
+        Build a hybrid envelope the way a client would. Mainly for tests and benchmarks.
+        Returns (envelope, session_key, wrapped_key); pass the last two back in to reuse the session.
+        """
+        if session_key is None or wrapped_key is None:
+            if not self.public_key:
+                raise ValueError("Public key not loaded")
+
+            session_key = AESGCM.generate_key(bit_length=256)
+            wrapped_key = self.public_key.encrypt(session_key, OAEP_PADDING)
+        kid = envelope_key_id(wrapped_key)
+        nonce = os.urandom(12)
+        ciphertext = AESGCM(session_key).encrypt(nonce, plaintext.encode('utf-8'), kid.encode('ascii'))
+
+        envelope = ".".join([
+            ENVELOPE_PREFIX.rstrip('.'),
+            kid,
+            _b64url_encode(wrapped_key) if include_wrapped_key else "",
+            _b64url_encode(nonce),
+            _b64url_encode(ciphertext),
+        ])
+        return envelope, session_key, wrapped_key
+
+    def decrypt_envelope(self, envelope):
+        """
+        Decrypt a hybrid envelope. The RSA private-key operation only runs the first time a
+        session key is seen; afterwards the cached AES key is used.
+        """
+        if not self.private_key:
+            raise ValueError("Private key not loaded")
+
+        try:
+            _, kid, wrapped_b64, nonce_b64, ciphertext_b64 = envelope.split('.')
+
+            session_key = self.session_keys.get(kid)
+            if session_key is None:
+                if not wrapped_b64:
+                    logger.warning("Unknown session key id: %s", kid, extra={"sample": "decrypt_failed"})
+                    return None
+
+                wrapped_key = _b64url_decode(wrapped_b64)
+                if envelope_key_id(wrapped_key) != kid:
+                    logger.warning("Session key id does not match wrapped key", extra={"sample": "decrypt_failed"})
+                    return None
+
+                session_key = self._rsa_decrypt(wrapped_key)
+                if len(session_key) != 32:
+                    logger.warning("Session key must be 256 bits", extra={"sample": "decrypt_failed"})
+                    return None
+                self.session_keys.set(kid, session_key)
+
+            plaintext = AESGCM(session_key).decrypt(
+                _b64url_decode(nonce_b64), _b64url_decode(ciphertext_b64), kid.encode('ascii')
+            )
+            return plaintext.decode('utf-8')
+        except Exception as e:
+            logger.warning("Error decrypting envelope: %s", e, extra={"sample": "decrypt_failed"})
+            return None
+
+
+# Shared key manager; import this instead of constructing RSAEncryption()
+rsa_manager = RSAEncryption()
+
+register_cache_stats("session_keys", RSAEncryption.session_keys.stats)
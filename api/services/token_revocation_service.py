@@ -0,0 +1,255 @@
+import logging
+import hashlib
+import threading
+import time
+from database.database import get_connection
+from config import (
+    REVOCATION_SWEEP_INTERVAL,
+    REVOCATION_RELOAD_INTERVAL,
+    REVOCATION_BLOOM_ENABLED,
+    REVOCATION_BLOOM_CAPACITY,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings. Answers "definitely not present"
+    without touching the backing set; false positives fall through to it.
+    """
+
+    def __init__(self, capacity: int, hashes: int = 4, bits_per_item: int = 10):
+        self.size = max(capacity * bits_per_item, 8)
+        self.hashes = hashes
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=8 * self.hashes).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[i * 8:(i + 1) * 8], 'little') % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class TokenRevocationStore:
+    """
+    In-memory set of revoked token IDs (JWT `jti`) with expiry, persisted to Postgres.
+
+    - is_revoked() is a dict lookup (optionally fronted by a Bloom filter), never a DB call.
+    - Entries are swept once their token would have expired anyway.
+    - Revocations are written through to the revoked_tokens table, bulk-loaded at
+      startup and re-synced in the background so other workers pick them up.
+      Writes that fail are retried on each background sync.
+    """
+
+    def __init__(self, sweep_interval=REVOCATION_SWEEP_INTERVAL, reload_interval=REVOCATION_RELOAD_INTERVAL,
+                 bloom_enabled=REVOCATION_BLOOM_ENABLED, bloom_capacity=REVOCATION_BLOOM_CAPACITY):
+        self.sweep_interval = sweep_interval
+        self.reload_interval = reload_interval
+        self.bloom_enabled = bloom_enabled
+        self.bloom_capacity = bloom_capacity
+
+        self._revoked = {}  # jti -> expiry (epoch seconds)
+        self._pending = {}  # revocations not yet persisted: jti -> expiry
+        self._bloom = BloomFilter(bloom_capacity) if bloom_enabled else None
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._last_reload = time.monotonic()
+        self._loaded_until = None  # revoked_at of the newest row seen in the database
+        self._reloading = False
+        self._initial_load_done = False
+        self._initial_load_lock = threading.Lock()
+
+    def revoke(self, jti: str, expires_at: float) -> bool:
+        """
+        Revoke a token until `expires_at` (epoch seconds).
+        Returns False if the revocation could not be persisted; it still applies to this process
+        and the write is retried in the background.
+        """
+        with self._lock:
+            self._revoked[jti] = expires_at
+            if self._bloom is not None:
+                self._bloom.add(jti)
+        persisted = self._persist(jti, expires_at)
+        with self._lock:
+            if persisted:
+                self._pending.pop(jti, None)
+            else:
+                self._pending[jti] = expires_at
+        return persisted
+
+    def is_pending(self, jti: str) -> bool:
+        """
+        True if the token was revoked in this process but the revocation isn't persisted yet.
+        """
+        return jti in self._pending
+
+    def is_revoked(self, jti: str) -> bool:
+        if not self._initial_load_done:
+            self._initial_load()
+        self._maybe_maintain()
+        if self._bloom is not None and jti not in self._bloom:
+            return False
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def load(self):
+        """
+        Bulk-load unexpired revocations from the database, e.g. at startup.
+        """
+        try:
+            self._load()
+        finally:
+            self._initial_load_done = True
+
+    def _load(self):
+        conn = get_connection()
+        if not conn:
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
+            return
+
+        cur = conn.cursor()
+        try:
+            if self._loaded_until is None:
+                cur.execute("SELECT jti, expires_at, revoked_at FROM revoked_tokens WHERE expires_at > NOW();")
+            else:
+                cur.execute("""
+                    SELECT jti, expires_at, revoked_at FROM revoked_tokens
+                    WHERE expires_at > NOW() AND revoked_at >= %s - INTERVAL '1 minute';
+                """, (self._loaded_until,))  # overlap covers transactions that committed late
+            rows = cur.fetchall()
+            conn.commit()
+        except Exception as e:
+            logger.exception("Error loading revoked tokens: %s", e)
+            conn.rollback()
+            return
+        finally:
+            cur.close()
+            conn.close()
+
+        with self._lock:
+            for jti, expires_at, revoked_at in rows:
+                self._revoked[jti] = expires_at.timestamp()
+                if self._bloom is not None:
+                    self._bloom.add(jti)
+                if self._loaded_until is None or revoked_at > self._loaded_until:
+                    self._loaded_until = revoked_at
+            self._last_reload = time.monotonic()
+
+    def _initial_load(self):
+        """
+        Load revocations on first use when they were not preloaded at startup (lazy init).
+        If the database is unavailable, the background reload keeps retrying.
+        """
+        with self._initial_load_lock:
+            if not self._initial_load_done:
+                self.load()
+
+    def sweep(self):
+        """
+        Drop revocations whose tokens have expired, in memory and in the database.
+        """
+        now = time.time()
+        with self._lock:
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            if self._bloom is not None:
+                # Bloom filters cannot delete, so rebuild from what is left
+                self._bloom = BloomFilter(max(self.bloom_capacity, len(self._revoked)))
+                for jti in self._revoked:
+                    self._bloom.add(jti)
+            self._last_sweep = time.monotonic()
+
+        conn = get_connection()
+        if not conn:
+            return
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM revoked_tokens WHERE expires_at <= NOW();")
+            conn.commit()
+        except Exception as e:
+            logger.exception("Error purging revoked tokens: %s", e)
+            conn.rollback()
+        finally:
+            cur.close()
+            conn.close()
+
+    def _persist(self, jti: str, expires_at: float) -> bool:
+        conn = get_connection()
+        if not conn:
+            logger.error("Failed to connect to the database.", extra={"sample": "db_unavailable"})
+            return False
+
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                INSERT INTO revoked_tokens (jti, expires_at)
+                VALUES (%s, to_timestamp(%s))
+                ON CONFLICT (jti) DO NOTHING;
+            """, (jti, expires_at))
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.exception("Error persisting revoked token: %s", e)
+            conn.rollback()
+            return False
+        finally:
+            cur.close()
+            conn.close()
+
+    def _persist_pending(self):
+        """
+        Retry writing revocations that failed to persist; drops those whose token has expired.
+        """
+        now = time.time()
+        with self._lock:
+            pending = list(self._pending.items())
+        for jti, expires_at in pending:
+            if expires_at > now and not self._persist(jti, expires_at):
+                return  # still failing; try again on the next run
+            with self._lock:
+                self._pending.pop(jti, None)
+
+    def _maybe_maintain(self):
+        """
+        Kick off sweep/reload in a background thread when due, so requests never wait on the DB.
+        """
+        now = time.monotonic()
+        sweep_due = now - self._last_sweep >= self.sweep_interval
+        # Unpersisted revocations are retried on the reload schedule
+        reload_due = now - self._last_reload >= self.reload_interval
+        if not (sweep_due or reload_due):
+            return
+
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+            # Push the timers forward now so concurrent callers don't start another run
+            if sweep_due:
+                self._last_sweep = now
+            if reload_due:
+                self._last_reload = now
+
+        def run():
+            try:
+                if sweep_due:
+                    self.sweep()
+                if reload_due:
+                    self._persist_pending()
+                    self.load()
+            finally:
+                self._reloading = False
+
+        threading.Thread(target=run, name="token-revocation-maintenance", daemon=True).start()
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+revocation_store = TokenRevocationStore()
@@ -0,0 +1,274 @@
+import atexit
+import contextvars
+import datetime
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from metrics import LOG_RECORDS_DROPPED
+from config import (
+    LOG_LEVEL,
+    LOG_LEVELS,
+    LOG_FORMAT,
+    LOG_ASYNC,
+    LOG_QUEUE_SIZE,
+    LOG_SAMPLE_BURST,
+    LOG_SAMPLE_WINDOW,
+)
+
+# ID of the request being served, set by middleware/request_id.py and attached to every record
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# Keys whose values never reach the logs, wherever they appear in a record's arguments or extras
+SENSITIVE_KEY = re.compile(r"pass(word|wd)?|secret|token|authori[sz]ation|cookie|private_key|session_key|api_key",
+                           re.IGNORECASE)
+REDACTED = "[REDACTED]"
+
+# Credentials recognisable in message text
+_SENSITIVE_TEXT = [
+    (re.compile(r"-----BEGIN [A-Z ]*PRIVATE KEY-----.*?-----END [A-Z ]*PRIVATE KEY-----", re.DOTALL), REDACTED),
+    (re.compile(r"\b(Bearer|Basic)\s+[\w\-.~+/]+=*", re.IGNORECASE), r"\1 " + REDACTED),
+    (re.compile(r"\beyJ[\w-]+\.[\w-]+\.[\w-]*"), REDACTED),  # JWTs
+    # Quoted keys ({'password': ...}, {"token": ...}) and key=value pairs
+    (re.compile(r"""((["'])[\w-]*(?:pass(?:word|wd)?|secret|token|private_key|api_key)[\w-]*\2\s*:\s*"""
+                r"""|\b[\w-]*(?:pass(?:word|wd)?|secret|token|private_key|api_key)[\w-]*=)"""
+                r"""("[^"]*"|'[^']*'|[^\s,;&}\]]+)""", re.IGNORECASE), r"\1" + REDACTED),
+]
+
+# LogRecord attributes; anything else on a record came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id", "sample"}
+
+
+def redact(value, depth: int = 0):
+    """
+    Copy of `value` with the values of sensitive keys replaced, in nested dicts and lists too.
+    """
+    if depth > 4:
+        return value
+    if isinstance(value, dict):
+        return {k: REDACTED if isinstance(k, str) and SENSITIVE_KEY.search(k) else redact(v, depth + 1)
+                for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(v, depth + 1) for v in value)
+    return value
+
+
+def redact_text(text: str) -> str:
+    for pattern, replacement in _SENSITIVE_TEXT:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class ContextFilter(logging.Filter):
+    """
+    Stamp records with the current request ID. Runs on the calling thread, where the ID is set.
+    """
+
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limit records logged with `extra={"sample": "<key>"}`: the first `burst` per key in each
+    `window` seconds pass, the rest are dropped. The first record of the next window carries the
+    number dropped as `suppressed`.
+    """
+
+    def __init__(self, burst: int = LOG_SAMPLE_BURST, window: float = LOG_SAMPLE_WINDOW):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._windows = {}  # key -> [window start, passed, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, "sample", None)
+        if key is None or self.burst <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if state[1] < self.burst:
+                state[1] += 1
+                return True
+            state[2] += 1
+        LOG_RECORDS_DROPPED.inc(reason="sampled")
+        return False
+
+
+class RedactingFilter(logging.Filter):
+    """
+    Replace sensitive values in a record's arguments and extras before it leaves the calling thread
+    (message text is scrubbed by the formatters).
+    """
+
+    def filter(self, record):
+        if isinstance(record.args, dict):
+            record.args = redact(record.args)
+        elif record.args:
+            record.args = tuple(redact(arg) if isinstance(arg, (dict, list, tuple)) else arg for arg in record.args)
+        for key, value in list(vars(record).items()):
+            if key in _RECORD_ATTRS:
+                continue
+            if SENSITIVE_KEY.search(key):
+                setattr(record, key, REDACTED)
+            elif isinstance(value, (dict, list, tuple)):
+                setattr(record, key, redact(value))
+        return True
+
+
+def _extras(record) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, function, message, request ID (when serving
+    a request), the record's extras and the formatted exception, if any.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc)
+                            .isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "message": redact_text(record.getMessage()),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        entry.update(_extras(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = redact_text(record.exc_text)
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Human-readable lines for local development, extras appended as key=value.
+    """
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def formatMessage(self, record):
+        line = self._fmt % dict(vars(record), request_id=getattr(record, "request_id", None) or "-")
+        extras = _extras(record)
+        if extras:
+            line += " " + " ".join(f"{key}={value}" for key, value in extras.items())
+        return redact_text(line)
+
+    def formatException(self, ei):
+        return redact_text(super().formatException(ei))
+
+
+class _QueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread with only the message interpolated; formatting
+    (exceptions included) happens there. A full queue drops the record instead of blocking.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(reason="queue_full")
+
+
+_listener = None
+_configured = False
+
+
+def _restart_listener_after_fork():
+    # The writer thread doesn't survive fork() and the queue's locks may have been held when it
+    # happened, so a forked child (e.g. a server worker) gets a fresh queue and writer
+    global _listener
+    if _listener is None:
+        return
+    queue_handler = next((h for h in logging.getLogger().handlers if isinstance(h, _QueueHandler)), None)
+    if queue_handler is None:
+        _listener = None
+        return
+    queue_handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    _listener = QueueListener(queue_handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _parse_levels(spec: str) -> dict:
+    levels = {}
+    for item in spec.split(","):
+        name, sep, level = item.strip().partition("=")
+        if sep and name.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging():
+    """
+    Route all logging through one stdout handler (idempotent). Records are stamped with the
+    request ID, sampled and redacted on the calling thread, then, with LOG_ASYNC, queued for a
+    background thread that formats and writes them.
+    """
+    global _listener, _configured
+    if _configured:
+        return
+    _configured = True
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+    if LOG_ASYNC:
+        handler = _QueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        _listener = QueueListener(handler.queue, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        os.register_at_fork(after_in_child=_restart_listener_after_fork)
+    else:
+        handler = stream
+
+    for log_filter in (ContextFilter(), SamplingFilter(), RedactingFilter()):
+        handler.addFilter(log_filter)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    for name, level in _parse_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+
+def stop_logging():
+    """
+    Write out the queued records and stop the writer thread.
+    """
+    global _listener
+    if _listener is not None:
+        listener, _listener = _listener, None
+        listener.stop()
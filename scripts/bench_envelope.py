@@ -0,0 +1,79 @@
+"""
+Micro-benchmark: legacy RSA-OAEP payloads vs hybrid RSA + AES-GCM envelopes.
+
+Usage:
+    python scripts/bench_envelope.py [--iterations 500]
+
+Uses RSA_PRIVATE_KEY / RSA_PUBLIC_KEY from the environment (or .env) when set,
+otherwise generates a throwaway 2048-bit key pair.
+"""
+import argparse
+import os
+import sys
+import time
+
+# Make the api package importable the same way api/index.py does
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+sys.path.insert(0, os.path.abspath(API_DIR))
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+
+import config  # noqa: E402,F401  (loads .env)
+
+
+def ensure_keys():
+    if os.getenv("RSA_PRIVATE_KEY") and os.getenv("RSA_PUBLIC_KEY"):
+        return
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    os.environ["RSA_PRIVATE_KEY"] = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode("utf-8")
+    os.environ["RSA_PUBLIC_KEY"] = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode("utf-8")
+
+
+def timed(label, fn, payloads):
+    start = time.perf_counter()
+    for payload in payloads:
+        if fn(payload) is None:
+            raise RuntimeError(f"{label}: decryption failed")
+    elapsed = time.perf_counter() - start
+    per_op_us = elapsed / len(payloads) * 1e6
+    print(f"{label:<34} {len(payloads) / elapsed:>10.0f} ops/s {per_op_us:>10.1f} us/op")
+    return per_op_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare legacy RSA-OAEP and hybrid envelope decryption.")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    ensure_keys()
+    from services.rsa_encryption_service import RSAEncryption, rsa_manager as manager
+
+    password = "correct horse battery staple"
+
+    legacy = [manager.encrypt(password) for _ in range(args.iterations)]
+
+    # One session key reused for every payload, as a client would within a session
+    first, session_key, wrapped_key = manager.encrypt_envelope(password)
+    full = [first] + [
+        manager.encrypt_envelope(password, session_key, wrapped_key)[0] for _ in range(args.iterations - 1)
+    ]
+    compact = [
+        manager.encrypt_envelope(password, session_key, wrapped_key, include_wrapped_key=False)[0]
+        for _ in range(args.iterations)
+    ]
+
+    RSAEncryption.session_keys.clear()
+    legacy_us = timed("legacy RSA-OAEP", manager.decrypt, legacy)
+    envelope_us = timed("envelope (wrapped key included)", manager.decrypt, full)
+    compact_us = timed("envelope (cached key id only)", manager.decrypt, compact)
+
+    print(f"\nspeedup: {legacy_us / envelope_us:.1f}x (full), {legacy_us / compact_us:.1f}x (compact)")
+
+
+if __name__ == "__main__":
+    main()
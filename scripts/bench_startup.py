@@ -0,0 +1,99 @@
+"""
+Cold-start benchmark for the Vercel entry point.
+
+Each run starts a fresh interpreter, imports api/index.py and serves one GET /api/v1/health
+through the Flask test client, reporting:
+- import_ms: time to import the entry point (app creation included)
+- first_health_ms: time from the start of the import until the first /health response
+- heavy_modules: which heavy dependencies were loaded by then (should be empty in lazy mode)
+
+Usage:
+    python scripts/bench_startup.py [--runs 10] [--lazy | --eager] [--json out.json] [--max-first-health-ms 400]
+
+Exits with status 1 when the median time to first /health exceeds --max-first-health-ms,
+so it can guard against regressions in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+API_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+HEAVY_MODULES = ["cryptography", "psycopg2", "argon2", "jwt", "requests"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import index
+imported = time.perf_counter()
+response = index.app.test_client().get('/api/v1/health')
+served = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_health_ms": (served - start) * 1000,
+    "heavy_modules": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_once(env):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=API_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    # The app may print startup messages; the probe's JSON is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(values):
+    return {
+        "median": statistics.median(values),
+        "min": min(values),
+        "max": max(values),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time to first /health response.")
+    parser.add_argument("--runs", type=int, default=10)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--lazy", dest="lazy", action="store_true", default=None, help="Force LAZY_INIT=true")
+    mode.add_argument("--eager", dest="lazy", action="store_false", help="Force LAZY_INIT=false")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--max-first-health-ms", type=float, help="Fail if the median exceeds this budget")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.lazy is not None:
+        env["LAZY_INIT"] = "true" if args.lazy else "false"
+
+    samples = [run_once(env) for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "lazy_init": env.get("LAZY_INIT", "default"),
+        "import_ms": summarize([s["import_ms"] for s in samples]),
+        "first_health_ms": summarize([s["first_health_ms"] for s in samples]),
+        "heavy_modules": sorted({m for s in samples for m in s["heavy_modules"]}),
+    }
+
+    print(f"LAZY_INIT={report['lazy_init']}  runs={args.runs}")
+    for key in ("import_ms", "first_health_ms"):
+        stats = report[key]
+        print(f"{key:<16} median {stats['median']:8.1f}  min {stats['min']:8.1f}  max {stats['max']:8.1f}")
+    print(f"heavy modules loaded: {', '.join(report['heavy_modules']) or 'none'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.max_first_health_ms is not None and report["first_health_ms"]["median"] > args.max_first_health_ms:
+        print(f"FAIL: median first /health {report['first_health_ms']['median']:.1f} ms "
+              f"exceeds budget {args.max_first_health_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
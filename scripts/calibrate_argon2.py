@@ -0,0 +1,71 @@
+"""
+Pick Argon2 time/memory cost for a target hashing latency on this machine.
+
+Usage:
+    python scripts/calibrate_argon2.py --target-ms 250 [--max-memory-mib 256] [--parallelism 4]
+
+Following RFC 9106, memory is preferred over iterations: the script starts from
+the largest allowed memory cost, halves it until a single pass fits the target,
+then raises time_cost as far as the budget allows. The result is printed as
+environment variables for .env / the Vercel dashboard.
+"""
+import argparse
+import statistics
+import time
+
+from argon2 import PasswordHasher
+
+MIN_MEMORY_KIB = 8 * 1024
+
+
+def measure_ms(time_cost: int, memory_cost: int, parallelism: int, rounds: int) -> float:
+    """ Median wall-clock time of a single hash, in milliseconds """
+    hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hasher.hash("calibration-password")
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def calibrate(target_ms: float, max_memory_kib: int, parallelism: int, rounds: int):
+    memory_cost = max_memory_kib
+    elapsed = measure_ms(1, memory_cost, parallelism, rounds)
+    while elapsed > target_ms and memory_cost > MIN_MEMORY_KIB:
+        memory_cost //= 2
+        elapsed = measure_ms(1, memory_cost, parallelism, rounds)
+
+    time_cost = 1
+    while True:
+        candidate = measure_ms(time_cost + 1, memory_cost, parallelism, rounds)
+        if candidate > target_ms:
+            break
+        time_cost += 1
+        elapsed = candidate
+
+    return time_cost, memory_cost, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate Argon2 cost parameters for a target latency.")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Target time for one hash (default: 250)")
+    parser.add_argument("--max-memory-mib", type=int, default=256, help="Upper bound for memory cost (default: 256)")
+    parser.add_argument("--parallelism", type=int, default=4, help="Argon2 lanes (default: 4)")
+    parser.add_argument("--rounds", type=int, default=5, help="Samples per measurement (default: 5)")
+    args = parser.parse_args()
+
+    time_cost, memory_cost, elapsed = calibrate(
+        args.target_ms, args.max_memory_mib * 1024, args.parallelism, args.rounds
+    )
+
+    print(f"# Argon2 calibrated for ~{args.target_ms:.0f} ms (measured {elapsed:.1f} ms)")
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST={memory_cost}")
+    print(f"ARGON2_PARALLELISM={args.parallelism}")
+    if elapsed > args.target_ms:
+        print("# Warning: even the minimum memory cost exceeds the target on this machine")
+
+
+if __name__ == "__main__":
+    main()
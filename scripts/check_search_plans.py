@@ -0,0 +1,121 @@
+"""
+Check that user searches are planned with the intended indexes.
+
+Usage:
+    python scripts/check_search_plans.py [--rows 20000]
+
+The checks never touch project_users itself. Inside a transaction that is rolled back at the
+end, the script creates a temporary project_users with the real table's columns and indexes
+(it shadows the real one for this session), fills it with --rows synthetic users and runs
+ANALYZE on it. Writes to the real table are not blocked, and the
+real table's statistics are left alone.
+It then EXPLAINs the exact queries ProjectUsersService.search_users runs for each kind of
+filter and checks that the expected index appears in the plan. Substring filters are only
+checked when pg_trgm is installed. Exits non-zero if any plan misses its index.
+Uses DATABASE_URL from the environment (or .env); run scripts/migrate.py --apply first.
+tests/test_search_plans.py runs the same checks against TEST_DATABASE_URL.
+"""
+import argparse
+import datetime
+import os
+import sys
+
+# Make the api package importable the same way api/index.py does
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+sys.path.insert(0, os.path.abspath(API_DIR))
+
+import config  # noqa: E402,F401  (loads .env)
+from database.database import get_pool  # noqa: E402
+from services.project_users_service import ProjectUsersService  # noqa: E402
+
+NOW = datetime.datetime(2030, 1, 1)
+
+# (description, filters, index expected in the plan, needs pg_trgm)
+CASES = [
+    ("project prefix", {"project_prefix": "plan-check-p1234"}, "project_users_project_name_pattern_idx", False),
+    ("username prefix", {"username_prefix": "plan-check-u3456"}, "project_users_username_pattern_idx", False),
+    ("inactive users", {"is_active": False}, "project_users_inactive_created_at_idx", False),
+    ("created range", {"created_after": NOW - datetime.timedelta(hours=2), "created_before": NOW},
+     "project_users_created_at_id_idx", False),
+    ("inactive, project prefix", {"is_active": False, "project_prefix": "plan-check-p1"},
+     "project_users_inactive_created_at_idx", False),
+    ("project substring", {"project_contains": "check-p123"}, "project_users_project_name_trgm_idx", True),
+    ("username substring", {"username_contains": "check-u456"}, "project_users_username_trgm_idx", True),
+]
+
+
+def plan_indexes(node) -> set:
+    """ Names of all indexes used anywhere in an EXPLAIN (FORMAT JSON) plan node """
+    names = {node["Index Name"]} if "Index Name" in node else set()
+    for child in node.get("Plans", []):
+        names |= plan_indexes(child)
+    return names
+
+
+def check_plans(cur, rows: int, limit: int) -> list:
+    """
+    Run the CASES on the cursor's connection and return (description, indexes used) pairs,
+    with None for the indexes when a case was skipped. Leaves the transaction open: the
+    caller rolls it back to drop the temporary table.
+    """
+    cur.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm');")
+    has_trgm = cur.fetchone()[0]
+
+    # Same columns and index names as the real table
+    cur.execute("SELECT current_schema();")
+    schema = cur.fetchone()[0]
+    cur.execute("SELECT indexdef FROM pg_indexes WHERE schemaname = %s AND tablename = 'project_users';", (schema,))
+    indexes = [row[0] for row in cur.fetchall()]
+    # No defaults either: the id default would draw from the real table's sequence
+    cur.execute(f'CREATE TEMP TABLE project_users (LIKE "{schema}".project_users) ON COMMIT DROP;')
+    for indexdef in indexes:
+        # pg_indexes qualifies the table as it would be quoted in SQL
+        table = indexdef.split(" ON ", 1)[1].split(" USING ", 1)[0]
+        cur.execute(indexdef.replace(f" ON {table} ", " ON pg_temp.project_users ", 1))
+
+    # One inactive user in 50, created a minute apart
+    cur.execute("""
+        INSERT INTO pg_temp.project_users (id, project_name, username, password_hash, is_active, created_at)
+        SELECT i, 'plan-check-p' || i, 'plan-check-u' || i, 'x', i %% 50 <> 0, %s - i * INTERVAL '1 minute'
+        FROM generate_series(1, %s) AS i;
+    """, (NOW, rows))
+    cur.execute("ANALYZE pg_temp.project_users;")
+
+    results = []
+    for description, filters, expected, needs_trgm in CASES:
+        if needs_trgm and not has_trgm:
+            results.append((description, expected, None))
+            continue
+        query, params = ProjectUsersService.build_search_query(filters, limit)
+        cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+        results.append((description, expected, plan_indexes(cur.fetchone()[0][0]["Plan"])))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN user searches and check index usage.")
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic users in the temporary table")
+    parser.add_argument("--limit", type=int, default=50, help="Page size used in the queries")
+    args = parser.parse_args()
+
+    conn = get_pool().getconn()
+    cur = conn.cursor()
+    failures = 0
+    try:
+        for description, expected, used in check_plans(cur, args.rows, args.limit):
+            if used is None:
+                print(f"SKIP {description}: pg_trgm is not installed")
+                continue
+            ok = expected in used
+            failures += not ok
+            print(f"{'OK  ' if ok else 'FAIL'} {description}: uses {', '.join(sorted(used)) or 'no index'}")
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Show or apply the schema migrations in api/database/migrations.py.
+
+Usage:
+    python scripts/migrate.py            # print the current version and pending migrations
+    python scripts/migrate.py --apply    # apply pending migrations (e.g. from a deploy step)
+
+Uses DATABASE_URL from the environment (or .env). The app applies pending migrations on its
+own at startup; running this before a deploy keeps the DDL off the first request.
+"""
+import argparse
+import os
+import sys
+
+# Make the api package importable the same way api/index.py does
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+sys.path.insert(0, os.path.abspath(API_DIR))
+
+import config  # noqa: E402,F401  (loads .env)
+from database.database import get_pool  # noqa: E402
+from database.migrations import MIGRATIONS, LATEST_VERSION, migrate, schema_version  # noqa: E402
+from structured_logging import setup_logging  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or apply schema migrations.")
+    parser.add_argument("--apply", action="store_true", help="Apply pending migrations")
+    args = parser.parse_args()
+    setup_logging()
+
+    conn = get_pool().getconn()
+    try:
+        version = schema_version(conn)
+        print(f"Schema version: {version} (latest {LATEST_VERSION})")
+        pending = [(v, description) for v, description, _ in MIGRATIONS if v > version]
+        for v, description in pending:
+            print(f"  pending {v}: {description}")
+
+        if args.apply and pending:
+            version = migrate(conn)
+            print(f"Schema version: {version}")
+        return 0 if args.apply or not pending else 1
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Import the api modules the way api/index.py does
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+sys.path.insert(0, os.path.abspath(API_DIR))
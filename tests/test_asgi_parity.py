@@ -0,0 +1,64 @@
+"""
+The ASGI app must answer like the Flask app: same status and JSON body for the same request.
+Only requests that need no database or dev.to are compared.
+"""
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("a2wsgi")
+pytest.importorskip("httpx")
+
+from starlette.testclient import TestClient  # noqa: E402
+
+from app import create_app  # noqa: E402
+from asgi import create_asgi_app  # noqa: E402
+from middleware import rate_limit  # noqa: E402
+from services.login_throttle_service import LoginThrottle  # noqa: E402
+
+REQUESTS = [
+    ("GET", "/api/v1/health", {}),
+    ("GET", "/api/v1/portfolio/blogs", {}),
+    ("GET", "/api/v1/portfolio/blogs", {"headers": {"Authorization": "Token abc"}}),
+    ("GET", "/api/v1/portfolio/blogs", {"headers": {"Authorization": "Bearer "}}),
+    ("GET", "/api/v1/portfolio/blogs", {"headers": {"Authorization": "Bearer not-a-jwt"}}),
+    ("GET", "/api/v1/users/?limit=0", {}),
+    ("GET", "/api/v1/users/?limit=ten", {}),
+    ("GET", "/api/v1/users/?after=bogus", {}),
+    ("GET", "/api/v1/users/search?is_active=maybe", {}),
+    ("GET", "/api/v1/users/search?created_after=yesterday", {}),
+    ("POST", "/api/v1/auth/login", {"json": ["alice", "secret"]}),
+    ("POST", "/api/v1/auth/login", {"json": {"username": "alice"}}),
+    ("POST", "/api/v1/users/create", {"json": {"project": "p"}}),
+    ("POST", "/api/v1/users/bulk/create", {"json": [{"project": "p"}]}),
+    ("POST", "/api/v1/users/activate", {"json": {"username": ""}}),
+    ("GET", "/api/v1/no-such-route", {}),
+]
+
+
+@pytest.fixture(scope="module")
+def clients():
+    return create_app().test_client(), TestClient(create_asgi_app())
+
+
+@pytest.fixture(autouse=True)
+def fresh_throttle(monkeypatch):
+    # Both apps share the process-wide throttle; keep these requests from spending other tests' tokens
+    monkeypatch.setattr(rate_limit, "login_throttle", LoginThrottle())
+
+
+def _body(response):
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+@pytest.mark.parametrize("method, path, kwargs", REQUESTS)
+def test_same_answer(clients, method, path, kwargs):
+    flask_client, asgi_client = clients
+    expected = flask_client.open(path, method=method, **kwargs)
+    actual = asgi_client.request(method, path, **kwargs)
+
+    assert actual.status_code == expected.status_code
+    assert _body(actual) == (expected.get_json() if expected.is_json else expected.get_data(as_text=True))
+    assert actual.headers.get("cache-control") == expected.headers.get("Cache-Control")
@@ -0,0 +1,137 @@
+import pytest
+
+from services import blog_feed_service
+from services.blog_feed_service import BlogFeedService, FEED_CACHE_KEY, REFRESH_LOCK_KEY
+
+
+class Store:
+    """
+    The parts of the cache backend the service uses, in a dict (timeouts ignored).
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.data[key] = value
+
+    def add(self, key, value, timeout=None):
+        if key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class DevTo:
+    def __init__(self):
+        self.articles = ["a1"]
+        self.calls = 0
+
+    def get_articles(self):
+        self.calls += 1
+        return self.articles
+
+    def close(self):
+        pass
+
+
+class InlineThread:
+    """
+    Runs a background refresh at start(), so the test sees its result.
+    """
+
+    def __init__(self, target, args=(), daemon=None):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.target(*self.args)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(blog_feed_service, "time", clock)
+    monkeypatch.setattr(blog_feed_service.threading, "Thread", InlineThread)
+    return clock
+
+
+@pytest.fixture
+def devto():
+    return DevTo()
+
+
+@pytest.fixture
+def service(clock, devto):
+    return BlogFeedService(devto, Store(), fresh_ttl=60, stale_ttl=300, refresh_ahead=0, refresh_retry=30)
+
+
+def test_cold_fetch_then_fresh(service, devto):
+    assert service.get_articles() == ["a1"]
+    assert service.get_articles() == ["a1"]
+    assert devto.calls == 1
+    assert REFRESH_LOCK_KEY not in service.store.data
+
+
+def test_stale_is_served_while_refreshing(service, devto, clock):
+    service.get_articles()
+    devto.articles = ["a2"]
+    clock.now += 90  # stale
+
+    assert service.get_articles() == ["a1"]
+    assert devto.calls == 2
+    assert service.get_articles() == ["a2"]
+
+
+def test_expired_is_refetched_before_responding(service, devto, clock):
+    service.get_articles()
+    devto.articles = ["a2"]
+    clock.now += 400  # past fresh_ttl + stale_ttl
+
+    assert service.get_articles() == ["a2"]
+    assert devto.calls == 2
+
+
+def test_last_good_copy_is_served_when_devto_fails(service, devto, clock):
+    service.get_articles()
+    devto.articles = None
+    clock.now += 400
+
+    assert service.get_articles() == ["a1"]
+    # The refresh lock stays until it times out, spacing out the retries
+    assert REFRESH_LOCK_KEY in service.store.data
+    assert service.get_articles() == ["a1"]
+    assert devto.calls == 2
+
+
+def test_unavailable_without_any_copy(service, devto):
+    devto.articles = None
+    assert service.get_articles() is None
+
+
+def test_newer_copy_from_another_worker_is_adopted(service, devto, clock):
+    service.get_articles()
+    clock.now += 400
+    service.store.set(FEED_CACHE_KEY, (clock.now, ["from-another-worker"]))
+
+    assert service.get_articles() == ["from-another-worker"]
+    assert devto.calls == 1
+
+
+def test_prime_fetches_only_when_nothing_is_stored(service, devto):
+    assert service.prime() is True
+    assert service.prime() is True
+    assert devto.calls == 1
@@ -0,0 +1,34 @@
+import pytest
+
+from app import create_app
+import routes.project_users_routes as project_users_routes
+
+
+class StubService:
+    batch_size_limit = 500
+
+    def activate_users(self, usernames):
+        raise AssertionError("not reached for invalid bodies")
+
+    deactivate_users = delete_users = activate_users
+
+
+@pytest.fixture
+def client(monkeypatch):
+    app = create_app()
+    monkeypatch.setattr(project_users_routes, "project_users_service", StubService())
+    monkeypatch.setattr(project_users_routes, "rsa_manager", object())
+    return app.test_client()
+
+
+@pytest.mark.parametrize("body", [[{"usernames": ["a"]}], 5, "users", True])
+@pytest.mark.parametrize("path, error", [
+    ("/api/v1/users/bulk/create", "Missing 'users' list in request body"),
+    ("/api/v1/users/bulk/activate", "'usernames' must be a list of non-empty strings"),
+    ("/api/v1/users/bulk/deactivate", "'usernames' must be a list of non-empty strings"),
+    ("/api/v1/users/bulk/delete", "'usernames' must be a list of non-empty strings"),
+])
+def test_non_object_body_is_rejected(client, path, error, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}
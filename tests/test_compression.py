@@ -0,0 +1,45 @@
+import gzip
+
+import pytest
+
+from middleware import compression
+from middleware.compression import negotiate_encoding, compress
+
+
+@pytest.fixture
+def gzip_only(monkeypatch):
+    monkeypatch.setattr(compression, "SUPPORTED_ENCODINGS", ("gzip",))
+
+
+@pytest.fixture
+def br_and_gzip(monkeypatch):
+    monkeypatch.setattr(compression, "SUPPORTED_ENCODINGS", ("br", "gzip"))
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0", None),
+    ("*", "gzip"),
+    ("*, gzip;q=0", None),
+    ("br", None),
+])
+def test_negotiate_gzip_only(gzip_only, accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, br", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("br", "br"),
+])
+def test_negotiate_prefers_brotli(br_and_gzip, accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_gzip_output_is_deterministic():
+    data = b'{"users": []}' * 100
+    assert compress(data, "gzip") == compress(data, "gzip")
+    assert gzip.decompress(compress(data, "gzip", best=True)) == data
@@ -0,0 +1,88 @@
+import pytest
+from flask import Flask, jsonify
+
+from middleware import compression
+from middleware.compression import init_compression
+from middleware.conditional import conditional_get, init_conditional_get
+
+ITEMS = [{"id": i, "name": f"user-{i}"} for i in range(200)]  # large enough to be compressed
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(compression, "SUPPORTED_ENCODINGS", ("gzip",))
+    app = Flask(__name__)
+    init_conditional_get(app)
+    init_compression(app)
+    app.calls = []
+
+    def bad_limit():
+        return (jsonify({"error": "bad limit"}), 400) if app.config.get("REJECT") else None
+
+    @app.route("/items")
+    @conditional_get(validate=bad_limit)
+    def items():
+        app.calls.append("items")
+        return jsonify(ITEMS)
+
+    @app.route("/private")
+    @conditional_get(private=True)
+    def private():
+        return jsonify({"ok": True})
+
+    client = app.test_client()
+    client.application = app
+    return client
+
+
+def test_body_etag_and_cache_headers(client):
+    response = client.get("/items")
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "no-cache"
+
+
+def test_matching_etag_gets_304(client):
+    etag = client.get("/items").headers["ETag"]
+    response = client.get("/items", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_compressed_etag_is_suffixed_and_revalidates(client):
+    plain = client.get("/items").headers["ETag"]
+    response = client.get("/items", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == plain[:-1] + '-gzip"'
+
+    revalidated = client.get("/items", headers={"Accept-Encoding": "gzip",
+                                                "If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_changed_body_gets_200(client):
+    etag = client.get("/items").headers["ETag"]
+    ITEMS.append({"id": 200, "name": "user-200"})
+    try:
+        response = client.get("/items", headers={"If-None-Match": etag})
+    finally:
+        ITEMS.pop()
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_validate_rejects_before_the_view(client):
+    client.application.config["REJECT"] = True
+    response = client.get("/items")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "bad limit"}
+    assert "ETag" not in response.headers
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert client.application.calls == []
+
+
+def test_private_routes_vary_on_authorization(client):
+    response = client.get("/private")
+    assert response.headers["Cache-Control"] in ("no-cache, private", "private, no-cache")
+    assert "Authorization" in response.headers["Vary"]
@@ -0,0 +1,73 @@
+import base64
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from extensions import TTLCache
+from services.rsa_encryption_service import RSAEncryption, OAEP_PADDING
+
+
+def _pem(key) -> str:
+    return key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                             serialization.NoEncryption()).decode("ascii")
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return [rsa.generate_private_key(public_exponent=65537, key_size=2048) for _ in range(2)]
+
+
+@pytest.fixture
+def manager(monkeypatch, keys):
+    current, retired = keys
+    monkeypatch.setenv("RSA_PRIVATE_KEY", _pem(current))
+    monkeypatch.delenv("RSA_PUBLIC_KEY", raising=False)
+    monkeypatch.setenv("RSA_RETIRED_PRIVATE_KEYS", _pem(retired))
+    monkeypatch.setattr(RSAEncryption, "session_keys", TTLCache(maxsize=100))
+    return RSAEncryption()
+
+
+def test_envelope_round_trip_and_session_reuse(manager):
+    envelope, session_key, wrapped_key = manager.encrypt_envelope("s3cret")
+    assert envelope.startswith("env1.")
+    assert manager.decrypt(envelope) == "s3cret"
+
+    # Later payloads may leave the wrapped key out once the server has seen it
+    reused, _, _ = manager.encrypt_envelope("again", session_key, wrapped_key, include_wrapped_key=False)
+    assert reused.split(".")[2] == ""
+    assert manager.decrypt(reused) == "again"
+
+
+def test_envelope_without_wrapped_key_needs_a_known_session(manager):
+    envelope, _, _ = manager.encrypt_envelope("s3cret", include_wrapped_key=False)
+    assert manager.decrypt(envelope) is None
+
+
+def test_tampered_envelopes_are_rejected(manager):
+    envelope, _, _ = manager.encrypt_envelope("s3cret")
+    prefix, kid, wrapped, nonce, ciphertext = envelope.split(".")
+    flipped = ("A" if ciphertext[0] != "A" else "B") + ciphertext[1:]
+    assert manager.decrypt(".".join([prefix, kid, wrapped, nonce, flipped])) is None
+    assert manager.decrypt(".".join([prefix, "x" + kid[1:], wrapped, nonce, ciphertext])) is None
+    assert manager.decrypt("env1.not.enough") is None
+
+
+def test_envelope_wrapped_with_a_retired_key(manager, keys):
+    retired_public = keys[1].public_key()
+    session_key = bytes(range(32))
+    wrapped_key = retired_public.encrypt(session_key, OAEP_PADDING)
+    envelope, _, _ = manager.encrypt_envelope("rotated", session_key, wrapped_key)
+    assert manager.decrypt(envelope) == "rotated"
+
+
+def test_legacy_ciphertext_with_a_retired_key(manager, keys):
+    ciphertext = keys[1].public_key().encrypt(b"legacy", OAEP_PADDING)
+    assert manager.decrypt(base64.b64encode(ciphertext).decode("ascii")) == "legacy"
+    assert manager.decrypt(manager.encrypt("current")) == "current"
+
+
+def test_jwks_lists_current_key_first(manager):
+    kids = [key["kid"] for key in manager.jwks["keys"]]
+    assert len(kids) == 2
+    assert kids[0] == manager.key_id
@@ -0,0 +1,72 @@
+import pytest
+
+from services.login_throttle_service import TokenBucketLimiter, LoginThrottle, _username_key
+
+
+def test_token_bucket_burst_then_refill():
+    bucket = TokenBucketLimiter(rate=1.0, burst=2)
+    for _ in range(2):
+        assert bucket.wait_time("ip", 0.0) == 0
+        bucket.consume("ip", 0.0)
+    assert bucket.wait_time("ip", 0.0) == pytest.approx(1.0)
+    assert bucket.wait_time("ip", 0.5) == pytest.approx(0.5)
+    assert bucket.wait_time("ip", 1.0) == 0
+
+
+def test_token_bucket_debt_and_sweep():
+    bucket = TokenBucketLimiter(rate=1.0, burst=5)
+    bucket.consume("ip", 0.0, cost=10)
+    assert bucket.wait_time("ip", 0.0) == pytest.approx(6.0)
+    assert bucket.sweep(5.0) == 0
+    assert bucket.sweep(10.0) == 1
+    assert len(bucket) == 0
+
+
+@pytest.mark.parametrize("ip, network", [
+    ("203.0.113.77", "203.0.113.0/24"),
+    ("2001:db8::1", "2001:db8::/64"),
+    ("not-an-ip", "not-an-ip"),
+])
+def test_username_key_uses_the_client_network(ip, network):
+    assert _username_key(ip, "alice") == ("alice", network)
+
+
+def _throttle(**overrides):
+    settings = dict(ip_rate=0.001, ip_burst=100, username_rate=0.001, username_burst=3,
+                    lockout_threshold=100, lockout_base=1, lockout_max=60,
+                    create_ip_rate=0.001, create_ip_burst=5, sweep_interval=3600)
+    return LoginThrottle(**{**settings, **overrides})
+
+
+def test_successful_logins_do_not_drain_the_username_bucket():
+    throttle = _throttle()
+    for _ in range(10):
+        assert throttle.check_login("198.51.100.1", "alice") == 0
+        throttle.record_success("198.51.100.1", "alice")
+
+
+def test_failures_elsewhere_do_not_throttle_the_user():
+    throttle = _throttle()
+    for i in range(10):
+        ip = f"192.0.2.{i}"
+        if throttle.check_login(ip, "alice") == 0:
+            throttle.record_failure(ip, "alice")
+    assert throttle.check_login("192.0.2.200", "alice") > 0  # same /24 as the attacker
+    assert throttle.check_login("198.51.100.1", "alice") == 0
+
+
+def test_lockout_after_repeated_failures():
+    throttle = _throttle(lockout_threshold=2, username_burst=100)
+    for _ in range(2):
+        assert throttle.check_login("198.51.100.1", "alice") == 0
+        throttle.record_failure("198.51.100.1", "alice")
+    assert throttle.check_login("198.51.100.1", "alice") >= 1
+    assert throttle.stats()["locked_out"] == 1
+    assert throttle.check_login("198.51.100.2", "alice") == 0
+
+
+def test_bulk_create_is_charged_per_user():
+    throttle = _throttle()
+    assert throttle.check_create("198.51.100.1", 50) == 0
+    assert throttle.check_create("198.51.100.1") > 0
+    assert throttle.check_create("198.51.100.2") == 0
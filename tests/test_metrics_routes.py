@@ -0,0 +1,30 @@
+import pytest
+
+from app import create_app
+import routes.metrics_routes as metrics_routes
+
+
+@pytest.fixture
+def client():
+    return create_app().test_client()
+
+
+def test_token_required(monkeypatch, client):
+    monkeypatch.setattr(metrics_routes, "METRICS_TOKEN", "s3cret")
+    assert client.get("/api/v1/metrics").status_code == 401
+    assert client.get("/api/v1/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/api/v1/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+
+
+def test_non_ascii_authorization_is_unauthorized(monkeypatch, client):
+    monkeypatch.setattr(metrics_routes, "METRICS_TOKEN", "s3cret")
+    response = client.get("/api/v1/metrics", headers={"Authorization": "Bearer s3crét"})
+    assert response.status_code == 401
+
+
+def test_hidden_in_production_without_token(monkeypatch, client):
+    monkeypatch.setattr(metrics_routes, "METRICS_TOKEN", None)
+    monkeypatch.setattr(metrics_routes, "is_production", True)
+    assert client.get("/api/v1/metrics").status_code == 404
@@ -0,0 +1,22 @@
+import datetime
+
+import pytest
+
+from database.helpers import encode_page_cursor, decode_page_cursor
+
+
+def test_cursor_round_trip():
+    position = (datetime.datetime(2024, 5, 17, 12, 30, 1, 250000), 42)
+    cursor = encode_page_cursor(*position)
+    assert "=" not in cursor
+    assert decode_page_cursor(cursor) == position
+
+
+def test_cursor_round_trip_without_created_at():
+    assert decode_page_cursor(encode_page_cursor(None, 7)) == (None, 7)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "MjAyNC0wNS0xNw", "!!!!"])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_page_cursor(cursor)
@@ -0,0 +1,47 @@
+"""
+Index usage of user searches: the checks of scripts/check_search_plans.py as a test.
+
+Needs a disposable PostgreSQL database in TEST_DATABASE_URL and is skipped without one. The
+schema is migrated there; the searches run on a temporary table that is rolled back.
+"""
+import os
+import sys
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if not TEST_DATABASE_URL:
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "api"))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from database.migrations import migrate  # noqa: E402
+from check_search_plans import CASES, check_plans  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def plans():
+    try:
+        conn = psycopg2.connect(TEST_DATABASE_URL, connect_timeout=5)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Test database unavailable: {e}")
+    try:
+        migrate(conn)
+        with conn.cursor() as cur:
+            results = check_plans(cur, rows=20000, limit=50)
+        return {description: (expected, used) for description, expected, used in results}
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@pytest.mark.parametrize("description", [case[0] for case in CASES])
+def test_search_uses_index(plans, description):
+    expected, used = plans[description]
+    if used is None:
+        pytest.skip("pg_trgm is not installed")
+    assert expected in used, f"{description} uses {', '.join(sorted(used)) or 'no index'}"
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import extensions
+from extensions import SingleFlight, SingleFlightTimeout
+
+
+class RecordingCounter:
+    def __init__(self):
+        self.results = []
+
+    def inc(self, amount=1, **labels):
+        self.results.append(labels["result"])
+
+    def wait_for(self, result, count):
+        deadline = time.monotonic() + 5
+        while self.results.count(result) < count and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+
+@pytest.fixture
+def calls_counter(monkeypatch):
+    counter = RecordingCounter()
+    monkeypatch.setattr(extensions, "SINGLE_FLIGHT_CALLS", counter)
+    return counter
+
+
+def test_concurrent_calls_share_one_execution(calls_counter):
+    flight = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"value": 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", fetch))) for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    calls_counter.wait_for("coalesced", 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert len(results) == 5 and all(result is results[0] for result in results)
+    assert len(flight) == 0
+
+
+def test_calls_after_completion_run_again():
+    flight = SingleFlight("test")
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+
+
+def test_waiters_get_the_leaders_exception(calls_counter):
+    flight = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("key", fail)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    waiter = threading.Thread(target=call)
+    waiter.start()
+    calls_counter.wait_for("coalesced", 1)
+    release.set()
+    leader.join()
+    waiter.join()
+
+    assert len(errors) == 2 and errors[0] is errors[1]
+
+
+def test_waiter_times_out_without_stopping_the_leader():
+    flight = SingleFlight("test", timeout=0.05)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    leader_result = []
+    leader = threading.Thread(target=lambda: leader_result.append(flight.do("key", slow)))
+    leader.start()
+    started.wait(5)
+
+    with pytest.raises(SingleFlightTimeout):
+        flight.do("key", slow)
+
+    release.set()
+    leader.join()
+    assert leader_result == ["done"]
+
+
+def test_coroutine_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("key", fetch) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["value"] * 5
+    assert calls == [1]
+    assert len(flight) == 0
+
+
+def test_waiters_retry_when_the_coroutine_leader_is_cancelled():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do_async("key", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do_async("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    # The waiter isn't cancelled with the leader; it leads a second call instead
+    assert asyncio.run(main()) == 2
+    assert len(flight) == 0
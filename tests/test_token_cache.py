@@ -0,0 +1,68 @@
+import datetime
+import time
+
+import jwt
+import pytest
+
+from extensions import TTLCache
+import database.helpers as helpers
+
+SECRET = "test-secret-key-with-enough-length"
+
+
+def test_ttl_cache_get_set_and_expiry():
+    cache = TTLCache(maxsize=10)
+    cache.set("a", 1, ttl=0.05)
+    cache.set("b", 2)  # no default TTL: kept until evicted
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a", "missing") == "missing"
+    assert cache.get("b") == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (2, 1, 1)
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    cache.delete("a")
+    assert len(cache) == 1
+
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    monkeypatch.setattr(helpers, "JWT_SECRET_KEY", SECRET)
+    cache = TTLCache(maxsize=100)
+    monkeypatch.setattr(helpers, "_token_cache", cache)
+    return cache
+
+
+def _token(**claims):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    payload = {"user_id": 1, "jti": "test-jti", "exp": now + datetime.timedelta(hours=1), **claims}
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+def test_cached_payload_is_copied(token_cache):
+    token = _token()
+    first = helpers._decode_jwt(token)
+    first["user_id"] = 99
+    assert helpers._decode_jwt(token)["user_id"] == 1
+    assert token_cache.stats()["hits"] == 1
+
+
+def test_invalid_token_rejection_is_cached(token_cache):
+    assert helpers._decode_jwt(_token() + "x") is None
+    assert len(token_cache) == 1
+
+
+def test_immature_token_is_not_negatively_cached(token_cache):
+    future = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=5)
+    assert helpers._decode_jwt(_token(nbf=future)) is None
+    assert len(token_cache) == 0
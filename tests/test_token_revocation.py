@@ -0,0 +1,95 @@
+import datetime
+import time
+
+import jwt
+import pytest
+
+import database.helpers as helpers
+import services.token_revocation_service as revocation
+from extensions import TTLCache
+from services.token_revocation_service import BloomFilter, TokenRevocationStore
+
+SECRET = "test-secret-key-with-enough-length"
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+
+
+def test_bloom_filter_false_positive_rate_is_low():
+    bloom = BloomFilter(capacity=1000)
+    for i in range(1000):
+        bloom.add(f"jti-{i}")
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    # ~1.2% expected with 4 hashes and 10 bits per item
+    assert false_positives < 300
+
+
+class FakeDatabase:
+    def __init__(self, available=True):
+        self.available = available
+        self.rows = {}
+
+    def persist(self, jti, expires_at):
+        if self.available:
+            self.rows[jti] = expires_at
+        return self.available
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(revocation, "get_connection", lambda: None)  # sweeps skip the table
+    return FakeDatabase()
+
+
+@pytest.fixture
+def store(monkeypatch, db):
+    store = TokenRevocationStore(sweep_interval=3600, reload_interval=3600,
+                                 bloom_enabled=True, bloom_capacity=100)
+    store._initial_load_done = True
+    monkeypatch.setattr(store, "_persist", db.persist)
+    return store
+
+
+def test_revoked_until_expiry(store):
+    assert store.revoke("live", time.time() + 60)
+    store.revoke("expired", time.time() - 1)
+    assert store.is_revoked("live")
+    assert not store.is_revoked("expired")
+    assert not store.is_revoked("unknown")
+
+
+def test_sweep_drops_expired_entries(store):
+    store.revoke("live", time.time() + 60)
+    store.revoke("expired", time.time() - 1)
+    store.sweep()
+    assert len(store) == 1
+    assert store.is_revoked("live")
+
+
+def test_unpersisted_revocation_is_retried(store, db):
+    db.available = False
+    assert store.revoke("jti", time.time() + 60) is False
+    assert store.is_revoked("jti") and store.is_pending("jti")
+
+    db.available = True
+    store._persist_pending()
+    assert not store.is_pending("jti")
+    assert "jti" in db.rows
+
+
+def test_logout_invalidates_the_cached_token(monkeypatch, store):
+    monkeypatch.setattr(helpers, "JWT_SECRET_KEY", SECRET)
+    monkeypatch.setattr(helpers, "_token_cache", TTLCache(maxsize=100))
+    monkeypatch.setattr(helpers, "revocation_store", store)
+    exp = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)
+    token = jwt.encode({"user_id": 1, "jti": "abc", "exp": exp}, SECRET, algorithm="HS256")
+
+    assert helpers.validate_jwt(token)["user_id"] == 1  # now cached
+    assert helpers.revoke_jwt(token) is True
+    assert helpers.validate_jwt(token) is None
+    assert helpers.revoke_jwt(token) is None  # already revoked
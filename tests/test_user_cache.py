@@ -0,0 +1,50 @@
+import pytest
+
+from extensions import TTLCache
+from services.project_users_service import ProjectUsersService
+
+USER = {"id": 1, "project_name": "p", "username": "alice", "is_active": True}
+AUTH = {"id": 1, "password_hash": "hash", "is_active": True}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(ProjectUsersService, "user_cache", TTLCache(maxsize=100, default_ttl=60))
+    service = ProjectUsersService()
+    service.queries = []
+
+    def fetch(statement, username):
+        service.queries.append(statement)
+        record = USER if statement == "user_by_username" else AUTH
+        return True, dict(record) if username == "alice" else None
+
+    monkeypatch.setattr(service, "_fetch_one", fetch)
+    return service
+
+
+def test_lookups_are_cached_until_invalidated(service):
+    assert service.get_user_by_username("alice") == USER
+    assert service.get_user_by_username("alice") == USER
+    assert service.queries == ["user_by_username"]
+
+    ProjectUsersService.invalidate_users(["alice"])
+    service.get_user_by_username("alice")
+    assert len(service.queries) == 2
+
+
+def test_cached_record_is_copied(service):
+    service.get_user_by_username("alice")["is_active"] = False
+    assert service.get_user_by_username("alice")["is_active"] is True
+
+
+def test_unknown_usernames_are_cached(service):
+    assert service.get_user_by_username("bob") is None
+    assert service.get_user_by_username("bob") is None
+    assert service.queries == ["user_by_username"]
+
+
+def test_login_record_is_always_read_from_the_database(service):
+    assert service.get_auth_record("alice") == AUTH
+    assert service.get_auth_record("alice") == AUTH
+    assert service.get_auth_record("bob") is None
+    assert service.queries == ["user_auth_by_username"] * 3